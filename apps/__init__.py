@@ -13,6 +13,7 @@ urlpatterns = [
     path('payments/', include('apps.payments.urls')),
     path('messaging/', include('apps.messaging.urls')),
     path('reviews/', include('apps.reviews.urls')),
+    path('monitoring/', include('apps.core.urls')),
 ]
 
 if settings.DEBUG:
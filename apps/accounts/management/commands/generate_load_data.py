@@ -0,0 +1,424 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate, islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.accounts.models import Skill
+from apps.gigs.models import Gig, GigCategory, GigImage, GigOrder
+from apps.messaging.models import Conversation, Message
+from apps.payments.models import Transaction, Wallet
+from apps.projects.models import Project, ProjectProposal
+from apps.reviews.models import Review
+
+User = get_user_model()
+
+WORDS = (
+    'website logo design app mobile fast professional modern responsive brand content seo article '
+    'video edit animation voice translation english hausa yoruba igbo data entry research shop '
+    'payment landing page wordpress django react python marketing social media campaign audio mix'
+).split()
+
+ORDER_STATUSES = (('completed', 60), ('in_progress', 15), ('delivered', 8), ('pending', 8), ('cancelled', 7), ('disputed', 2))
+PROJECT_STATUSES = (('open', 60), ('in_progress', 15), ('completed', 20), ('cancelled', 5))
+EXPERIENCE_LEVELS = (('entry', 35), ('intermediate', 45), ('expert', 20))
+STAR_RATINGS = ((5, 55), (4, 25), (3, 10), (2, 5), (1, 5))
+
+
+@contextmanager
+def timestamps_as_given(*models):
+    """Let bulk_create keep the generated created_at/updated_at values instead of now()"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Weighted:
+    """Fast repeated weighted choice from a fixed population"""
+
+    def __init__(self, rng, population, weights):
+        self.rng = rng
+        self.population = list(population)
+        self.cum_weights = list(accumulate(weights))
+
+    def __call__(self):
+        return self.rng.choices(self.population, cum_weights=self.cum_weights)[0]
+
+    @classmethod
+    def pairs(cls, rng, pairs):
+        return cls(rng, [value for value, weight in pairs], [weight for value, weight in pairs])
+
+    @classmethod
+    def power_law(cls, rng, population, exponent=1.1):
+        """Earlier items are picked far more often (popular sellers, busy clients)"""
+        return cls(rng, population, [1 / (rank + 1) ** exponent for rank in range(len(population))])
+
+
+class Command(BaseCommand):
+    help = 'Generate a large, deterministic synthetic dataset for load tests and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help='Multiply every volume below')
+        parser.add_argument('--users', type=int, default=20000)
+        parser.add_argument('--freelancer-share', type=float, default=0.4)
+        parser.add_argument('--gigs-per-freelancer', type=float, default=2.5)
+        parser.add_argument('--projects', type=int, default=20000)
+        parser.add_argument('--proposals-per-project', type=float, default=6)
+        parser.add_argument('--orders', type=int, default=100000)
+        parser.add_argument('--messages-per-order', type=float, default=4)
+        parser.add_argument('--days', type=int, default=365, help='Spread activity over this many days')
+        parser.add_argument('--prefix', default='load', help='Username/reference prefix for generated rows')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--skip-rebuild', action='store_true', help='Do not rebuild search, ratings, inboxes and seller rollups')
+
+    def handle(self, *args, **options):
+        if not connection.features.can_return_rows_from_bulk_insert:
+            raise CommandError('This command needs a database that returns ids from bulk inserts (PostgreSQL, SQLite 3.35+).')
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f"Users prefixed '{prefix}_' already exist; pick another --prefix.")
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = prefix
+        self.days = options['days']
+        self.end = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.total_rows = 0
+        scale = options['scale']
+
+        call_command('populate_initial_data', stdout=self.stdout)
+        self.skills = list(Skill.objects.values_list('pk', flat=True))
+        self.categories = list(GigCategory.objects.values_list('pk', flat=True))
+        if not self.skills or not self.categories:
+            raise CommandError('No skills or gig categories to attach generated rows to.')
+
+        started = time.perf_counter()
+        with timestamps_as_given(User, Gig, GigOrder, Project, ProjectProposal, Transaction, Conversation, Message, Review, Wallet):
+            users = int(options['users'] * scale)
+            freelancers, clients = self.create_users(users, options['freelancer_share'])
+            gigs = self.create_gigs(freelancers, int(len(freelancers) * options['gigs_per_freelancer']))
+            projects = self.create_projects(clients, int(options['projects'] * scale))
+            self.create_proposals(projects, freelancers, options['proposals_per_project'])
+            orders = self.create_orders(gigs, clients, int(options['orders'] * scale))
+            self.create_transactions(orders)
+            self.create_conversations(orders, options['messages_per_order'])
+            self.create_reviews(orders)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {self.total_rows} rows in {elapsed:.1f}s ({self.total_rows / elapsed:.0f} rows/s)'
+        ))
+
+        if not options['skip_rebuild']:
+            # bulk_create sends no signals, so derived tables are rebuilt in one pass each
+            for command in (
+                'rebuild_rating_aggregates', 'rebuild_conversation_summaries', 'rebuild_search_index',
+                'rebuild_seller_rollups',
+            ):
+                call_command(command, stdout=self.stdout)
+
+    # Helpers
+
+    def insert(self, model, objects, keep=True):
+        """bulk_create `objects` (any iterable) in batches; returns the saved objects if `keep`"""
+        saved = []
+        count = 0
+        started = time.perf_counter()
+        objects = iter(objects)
+        with transaction.atomic():
+            while True:
+                batch = list(islice(objects, self.batch_size))
+                if not batch:
+                    break
+                model.objects.bulk_create(batch)
+                count += len(batch)
+                if keep:
+                    saved.extend(batch)
+        elapsed = time.perf_counter() - started
+        self.total_rows += count
+        self.stdout.write(f'{model._meta.label}: {count} rows in {elapsed:.1f}s')
+        return saved
+
+    def insert_m2m(self, through, rows, label):
+        started = time.perf_counter()
+        rows = list(rows)
+        through.objects.bulk_create(rows, batch_size=self.batch_size, ignore_conflicts=True)
+        self.total_rows += len(rows)
+        self.stdout.write(f'{label}: {len(rows)} rows in {time.perf_counter() - started:.1f}s')
+
+    def moment(self, after=None):
+        """Random time in the generated window, optionally after `after`"""
+        start = after or self.end - timedelta(days=self.days)
+        span = max((self.end - start).total_seconds(), 1)
+        return start + timedelta(seconds=self.rng.random() * span)
+
+    def text(self, words):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(words))
+
+    def price(self, median=15000, spread=0.8):
+        # Prices are roughly log-normal around the median, rounded to ₦100
+        return Decimal(max(500, round(self.rng.lognormvariate(0, spread) * median, -2)))
+
+    # Stages
+
+    def create_users(self, count, freelancer_share):
+        password = make_password(f'{self.prefix}-password')
+        users = self.insert(User, (
+            User(
+                username=f'{self.prefix}_{n}',
+                email=f'{self.prefix}_{n}@example.com',
+                password=password,
+                date_joined=self.moment(),
+            )
+            for n in range(count)
+        ))
+        self.insert(Wallet, (Wallet(user_id=user.pk, created_at=user.date_joined, updated_at=user.date_joined) for user in users), keep=False)
+
+        freelancer_count = int(count * freelancer_share)
+        return users[:freelancer_count], users[freelancer_count:]
+
+    def create_gigs(self, freelancers, count):
+        if not freelancers:
+            return []
+        seller = Weighted.power_law(self.rng, freelancers, exponent=0.8)
+        gigs = []
+        for n in range(count):
+            freelancer = seller()
+            created_at = self.moment(freelancer.date_joined)
+            basic = self.price()
+            has_packages = self.rng.random() < 0.5
+            gigs.append(Gig(
+                title=f'I will {self.text(5)}',
+                description=self.text(60),
+                freelancer_id=freelancer.pk,
+                category_id=self.rng.choice(self.categories),
+                basic_price=basic,
+                basic_description=self.text(15),
+                basic_delivery_time=self.rng.choice((1, 2, 3, 3, 5, 7, 7, 14, 21)),
+                basic_revisions=self.rng.randint(0, 3),
+                standard_price=basic * 2 if has_packages else None,
+                standard_description=self.text(15) if has_packages else '',
+                premium_price=basic * 4 if has_packages else None,
+                premium_description=self.text(15) if has_packages else '',
+                is_active=self.rng.random() < 0.9,
+                views=int(self.rng.paretovariate(1.2) * 20),
+                created_at=created_at,
+                updated_at=created_at,
+            ))
+        gigs = self.insert(Gig, gigs)
+
+        self.insert_m2m(Gig.skills.through, (
+            Gig.skills.through(gig_id=gig.pk, skill_id=skill_id)
+            for gig in gigs
+            for skill_id in self.rng.sample(self.skills, min(len(self.skills), self.rng.randint(1, 5)))
+        ), 'gig skills')
+        self.insert(GigImage, (
+            GigImage(gig_id=gig.pk, image=f'gig_images/{self.prefix}/{(gig.pk + i) % 100}.jpg', is_main=i == 0)
+            for gig in gigs
+            for i in range(self.rng.randint(1, 3))
+        ), keep=False)
+        return gigs
+
+    def create_projects(self, clients, count):
+        if not clients:
+            return []
+        client = Weighted.power_law(self.rng, clients)
+        status = Weighted.pairs(self.rng, PROJECT_STATUSES)
+        level = Weighted.pairs(self.rng, EXPERIENCE_LEVELS)
+        projects = []
+        for n in range(count):
+            owner = client()
+            created_at = self.moment(owner.date_joined)
+            fixed = self.rng.random() < 0.8
+            budget = self.price(median=120000, spread=1.0)
+            projects.append(Project(
+                title=f'Need {self.text(5)}',
+                description=self.text(120),
+                client_id=owner.pk,
+                project_type='fixed' if fixed else 'hourly',
+                budget_min=budget / 2 if fixed else None,
+                budget_max=budget if fixed else None,
+                hourly_rate_min=None if fixed else Decimal(self.rng.randint(10, 40) * 100),
+                hourly_rate_max=None if fixed else Decimal(self.rng.randint(40, 100) * 100),
+                duration=self.rng.choice(('1 week', '2 weeks', '1 month', '3 months')),
+                experience_level=level(),
+                status=status(),
+                featured=self.rng.random() < 0.05,
+                urgent=self.rng.random() < 0.1,
+                created_at=created_at,
+                updated_at=created_at,
+            ))
+        projects = self.insert(Project, projects)
+
+        self.insert_m2m(Project.skills_required.through, (
+            Project.skills_required.through(project_id=project.pk, skill_id=skill_id)
+            for project in projects
+            for skill_id in self.rng.sample(self.skills, min(len(self.skills), self.rng.randint(1, 6)))
+        ), 'project skills')
+        return projects
+
+    def create_proposals(self, projects, freelancers, per_project):
+        if not projects or not freelancers:
+            return
+        bidder = Weighted.power_law(self.rng, freelancers, exponent=0.6)
+        proposals = []
+        assigned = []
+        for project in projects:
+            count = min(len(freelancers), int(self.rng.expovariate(1 / per_project)))
+            bidders = {bidder().pk: None for _ in range(count)}
+            winner = None
+            if project.status in ('in_progress', 'completed') and bidders:
+                winner = self.rng.choice(list(bidders))
+                project.assigned_freelancer_id = winner
+                assigned.append(project)
+            for freelancer_id in bidders:
+                created_at = self.moment(project.created_at)
+                if freelancer_id == winner:
+                    status = 'accepted'
+                elif project.status == 'open':
+                    status = self.rng.choice(('pending', 'pending', 'pending', 'withdrawn'))
+                else:
+                    status = 'rejected'
+                proposals.append(ProjectProposal(
+                    project_id=project.pk,
+                    freelancer_id=freelancer_id,
+                    cover_letter=self.text(40),
+                    proposed_amount=((project.budget_max or Decimal(50000)) * Decimal(self.rng.uniform(0.6, 1.1))).quantize(Decimal('0.01')),
+                    proposed_duration=project.duration,
+                    status=status,
+                    created_at=created_at,
+                    updated_at=created_at,
+                ))
+        self.insert(ProjectProposal, proposals, keep=False)
+        Project.objects.bulk_update(assigned, ['assigned_freelancer'], batch_size=self.batch_size)
+
+    def create_orders(self, gigs, clients, count):
+        active = [gig for gig in gigs if gig.is_active]
+        if not active or not clients:
+            return []
+        gig = Weighted.power_law(self.rng, active)
+        buyer = Weighted.power_law(self.rng, clients, exponent=0.7)
+        status = Weighted.pairs(self.rng, ORDER_STATUSES)
+        orders = []
+        for n in range(count):
+            chosen = gig()
+            created_at = self.moment(chosen.created_at)
+            order_status = status()
+            delivery_date = created_at + timedelta(days=chosen.basic_delivery_time)
+            orders.append(GigOrder(
+                gig_id=chosen.pk,
+                buyer_id=buyer().pk,
+                package='basic',
+                price=chosen.basic_price,
+                requirements=self.text(30),
+                status=order_status,
+                delivery_date=delivery_date,
+                actual_delivery_date=delivery_date if order_status in ('delivered', 'completed') else None,
+                created_at=created_at,
+                updated_at=created_at,
+            ))
+            # Kept on the object for later stages; not a model field
+            orders[-1].seller_id = chosen.freelancer_id
+        orders = self.insert(GigOrder, orders)
+
+        completed = GigOrder.objects.filter(gig=OuterRef('pk'), status='completed').order_by().values('gig').annotate(total=Count('pk')).values('total')
+        Gig.objects.filter(freelancer__username__startswith=f'{self.prefix}_').update(
+            orders_completed=Coalesce(Subquery(completed), 0)
+        )
+        return orders
+
+    def create_transactions(self, orders):
+        self.insert(Transaction, (
+            Transaction(
+                reference=f'{self.prefix.upper()}-{order.pk}',
+                user_id=order.buyer_id,
+                transaction_type='refund' if order.status == 'cancelled' else 'payment',
+                amount=order.price,
+                status='pending' if order.status == 'pending' else 'completed',
+                gig_order_id=order.pk,
+                description=f'Payment for order #{order.pk}',
+                created_at=order.created_at,
+                updated_at=order.created_at,
+                completed_at=None if order.status == 'pending' else order.created_at + timedelta(minutes=2),
+            )
+            for order in orders
+        ), keep=False)
+
+    def create_conversations(self, orders, messages_per_order):
+        with_chat = [order for order in orders if self.rng.random() < 0.7]
+        conversations = self.insert(Conversation, (
+            Conversation(
+                subject=f'Order #{order.pk}',
+                gig_order_id=order.pk,
+                created_at=order.created_at,
+                updated_at=order.created_at,
+            )
+            for order in with_chat
+        ))
+        self.insert_m2m(Conversation.participants.through, (
+            Conversation.participants.through(conversation_id=conversation.pk, user_id=user_id)
+            for conversation, order in zip(conversations, with_chat)
+            for user_id in (order.buyer_id, order.seller_id)
+        ), 'conversation participants')
+
+        def messages():
+            for conversation, order in zip(conversations, with_chat):
+                sent_at = order.created_at
+                count = max(1, int(self.rng.expovariate(1 / messages_per_order)))
+                for n in range(count):
+                    sent_at += timedelta(minutes=self.rng.expovariate(1 / 240))
+                    yield Message(
+                        conversation_id=conversation.pk,
+                        sender_id=order.buyer_id if n % 2 == 0 else order.seller_id,
+                        content=self.text(self.rng.randint(3, 40)),
+                        is_read=n < count - 1 or self.rng.random() < 0.5,
+                        created_at=sent_at,
+                    )
+
+        self.insert(Message, messages(), keep=False)
+
+    def create_reviews(self, orders):
+        stars = Weighted.pairs(self.rng, STAR_RATINGS)
+
+        def detail(rating):
+            return min(5, max(1, rating + self.rng.choice((-1, 0, 0, 0, 1))))
+
+        def reviews():
+            for order in orders:
+                if order.status != 'completed' or self.rng.random() >= 0.6:
+                    continue
+                rating = stars()
+                yield Review(
+                    reviewer_id=order.buyer_id,
+                    reviewee_id=order.seller_id,
+                    gig_order_id=order.pk,
+                    rating=rating,
+                    title=self.text(4),
+                    comment=self.text(self.rng.randint(5, 60)),
+                    communication=detail(rating),
+                    quality=detail(rating),
+                    timeliness=detail(rating),
+                    created_at=self.moment(order.actual_delivery_date or order.created_at),
+                )
+
+        self.insert(Review, reviews(), keep=False)
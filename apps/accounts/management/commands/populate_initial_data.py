@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from apps.accounts.models import Skill, Language
+from apps.gigs.models import GigCategory
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = 'Populate initial data for the application'
+
+    def handle(self, *args, **options):
+        # Create skills
+        skills_data = [
+            {'name': 'Python', 'category': 'Programming'},
+            {'name': 'JavaScript', 'category': 'Programming'},
+            {'name': 'React', 'category': 'Programming'},
+            {'name': 'Django', 'category': 'Programming'},
+            {'name': 'PHP', 'category': 'Programming'},
+            {'name': 'WordPress', 'category': 'Programming'},
+            {'name': 'Graphic Design', 'category': 'Design'},
+            {'name': 'UI/UX Design', 'category': 'Design'},
+            {'name': 'Logo Design', 'category': 'Design'},
+            {'name': 'Digital Marketing', 'category': 'Marketing'},
+            {'name': 'SEO', 'category': 'Marketing'},
+            {'name': 'Content Writing', 'category': 'Writing'},
+            {'name': 'Copywriting', 'category': 'Writing'},
+            {'name': 'Translation', 'category': 'Writing'},
+            {'name': 'Video Editing', 'category': 'Video'},
+            {'name': 'Animation', 'category': 'Video'},
+        ]
+
+        self.create_missing(Skill, skills_data, 'skill')
+
+        # Create languages
+        languages_data = [
+            {'name': 'English', 'code': 'en'},
+            {'name': 'French', 'code': 'fr'},
+            {'name': 'Arabic', 'code': 'ar'},
+            {'name': 'Swahili', 'code': 'sw'},
+            {'name': 'Hausa', 'code': 'ha'},
+            {'name': 'Yoruba', 'code': 'yo'},
+            {'name': 'Igbo', 'code': 'ig'},
+            {'name': 'Amharic', 'code': 'am'},
+        ]
+
+        self.create_missing(Language, languages_data, 'language')
+
+        # Create gig categories
+        categories_data = [
+            {'name': 'Programming & Tech', 'description': 'Web development, mobile apps, and software development'},
+            {'name': 'Design & Creative', 'description': 'Graphic design, UI/UX, and creative services'},
+            {'name': 'Digital Marketing', 'description': 'SEO, social media, and online marketing'},
+            {'name': 'Writing & Translation', 'description': 'Content writing, copywriting, and translation services'},
+            {'name': 'Video & Animation', 'description': 'Video editing, animation, and motion graphics'},
+            {'name': 'Music & Audio', 'description': 'Audio editing, voice-over, and music production'},
+            {'name': 'Business', 'description': 'Business consulting, data entry, and virtual assistance'},
+            {'name': 'Lifestyle', 'description': 'Health, fitness, and lifestyle coaching'},
+        ]
+
+        self.create_missing(GigCategory, categories_data, 'category')
+
+        self.stdout.write(
+            self.style.SUCCESS('Successfully populated initial data!')
+        )
+
+    def create_missing(self, model, rows, label):
+        """Insert the rows whose name is not taken yet, in one query"""
+        existing = set(model.objects.filter(name__in=[row['name'] for row in rows]).values_list('name', flat=True))
+        missing = [model(**row) for row in rows if row['name'] not in existing]
+        model.objects.bulk_create(missing, ignore_conflicts=True)
+        for obj in missing:
+            self.stdout.write(f'Created {label}: {obj.name}')
\ No newline at end of file
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class AnalyticsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.analytics'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from apps.gigs.counters import gig_view_counter
+        from .rollups import add_views
+
+        gig_view_counter.listeners.append(add_views)
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.analytics.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute daily seller and gig rollups from orders, transactions and favorites (views are kept)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        sellers, gigs = rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {sellers} seller days and {gigs} gig days in {time.perf_counter() - started:.1f}s.'
+        ))
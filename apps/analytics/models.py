@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.db import models
+
+
+class DailyStats(models.Model):
+    """One day of seller activity; maintained by apps/analytics/rollups.py"""
+    day = models.DateField()
+
+    # Orders by the day they were placed, counted under their current status
+    orders_placed = models.IntegerField(default=0)
+    orders_pending = models.IntegerField(default=0)
+    orders_in_progress = models.IntegerField(default=0)
+    orders_delivered = models.IntegerField(default=0)
+    orders_completed = models.IntegerField(default=0)
+    orders_cancelled = models.IntegerField(default=0)
+    orders_disputed = models.IntegerField(default=0)
+
+    # Deliveries by the day they were made
+    deliveries = models.IntegerField(default=0)
+    late_deliveries = models.IntegerField(default=0)
+    delivery_seconds = models.BigIntegerField(default=0, help_text="Total time from order to delivery")
+    lateness_seconds = models.BigIntegerField(default=0, help_text="Total delivery time past the due date (negative when early)")
+
+    # Completed payments by the day they completed
+    paid_orders = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    commission = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    views = models.IntegerField(default=0)
+    favorites_added = models.IntegerField(default=0)
+    favorites_removed = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def average_delivery_hours(self):
+        if not self.deliveries:
+            return None
+        return round(self.delivery_seconds / self.deliveries / 3600, 1)
+
+    @property
+    def conversion_rate(self):
+        """Orders placed per gig view"""
+        if not self.views:
+            return None
+        return round(self.orders_placed / self.views, 4)
+
+
+class SellerDailyStats(DailyStats):
+    freelancer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_stats')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['freelancer', 'day'], name='seller_daily_stats_day'),
+        ]
+
+    def __str__(self):
+        return f"Seller {self.freelancer_id} on {self.day}"
+
+
+class GigDailyStats(DailyStats):
+    gig = models.ForeignKey('gigs.Gig', on_delete=models.CASCADE, related_name='daily_stats')
+    # Copied from the gig so a seller's per-gig breakdown reads one index range
+    freelancer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['gig', 'day'], name='gig_daily_stats_day'),
+        ]
+        indexes = [
+            models.Index(fields=['freelancer', 'day'], name='gig_daily_stats_seller'),
+        ]
+
+    def __str__(self):
+        return f"Gig {self.gig_id} on {self.day}"
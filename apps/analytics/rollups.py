@@ -0,0 +1,320 @@
+"""Daily seller and gig rollups behind the seller dashboard.
+
+Each order, completed payment and favorite contributes counters to the
+row of the day it was placed, delivered or paid, for its gig and for its
+seller. Signals diff every save against the row's previous state, so a
+status change moves an order from one status column to another with a
+single UPDATE per table, written with F() expressions so concurrent
+writers never lose counts. Gig views are added when the view buffer
+flushes. Dashboards read one row per day instead of scanning GigOrder;
+`manage.py rebuild_seller_rollups` recomputes everything from the source
+tables.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import GigDailyStats, SellerDailyStats
+
+ORDER_STATUSES = ('pending', 'in_progress', 'delivered', 'completed', 'cancelled', 'disputed')
+DELIVERED_STATUSES = ('delivered', 'completed')
+
+# Recomputed by rebuild(); views and favorite removals have no history in the source tables and are kept
+REBUILT_FIELDS = [
+    'orders_placed', *[f'orders_{status}' for status in ORDER_STATUSES],
+    'deliveries', 'late_deliveries', 'delivery_seconds', 'lateness_seconds',
+    'paid_orders', 'revenue', 'commission', 'favorites_added',
+]
+COUNTER_FIELDS = REBUILT_FIELDS + ['views', 'favorites_removed']
+
+
+def _day(moment):
+    return timezone.localdate(moment) if moment else timezone.localdate()
+
+
+def _add(contribution, key, **deltas):
+    row = contribution.setdefault(key, {})
+    for field, value in deltas.items():
+        row[field] = row.get(field, 0) + value
+
+
+def gig_owner(gig_id):
+    from apps.gigs.models import Gig
+    return Gig.objects.filter(pk=gig_id).values_list('freelancer_id', flat=True).first()
+
+
+# A contribution maps (day, gig id or None, freelancer id) to {counter: amount}
+
+def order_contribution(order, freelancer_id):
+    if order is None or order.created_at is None or freelancer_id is None:
+        return {}
+    contribution = {}
+    placed = {'orders_placed': 1}
+    if order.status in ORDER_STATUSES:
+        placed[f'orders_{order.status}'] = 1
+    _add(contribution, (_day(order.created_at), order.gig_id, freelancer_id), **placed)
+
+    if order.status in DELIVERED_STATUSES and order.actual_delivery_date:
+        lateness = int((order.actual_delivery_date - order.delivery_date).total_seconds())
+        _add(
+            contribution, (_day(order.actual_delivery_date), order.gig_id, freelancer_id),
+            deliveries=1,
+            late_deliveries=int(lateness > 0),
+            delivery_seconds=int((order.actual_delivery_date - order.created_at).total_seconds()),
+            lateness_seconds=lateness,
+        )
+    return contribution
+
+
+def transaction_contribution(payment):
+    if payment is None or payment.status != 'completed':
+        return {}
+    day = _day(payment.completed_at or payment.created_at)
+
+    if payment.transaction_type == 'commission':
+        # Stored as a negative amount on the seller
+        return {(day, None, payment.user_id): {'commission': -payment.amount}}
+    if payment.transaction_type != 'payment':
+        return {}
+
+    if payment.gig_order_id:
+        from apps.gigs.models import GigOrder
+        owner = GigOrder.objects.filter(pk=payment.gig_order_id).values_list('gig_id', 'gig__freelancer_id').first()
+        if owner is None:
+            return {}
+        gig_id, freelancer_id = owner
+    elif payment.project_id:
+        from apps.projects.models import Project
+        gig_id = None
+        freelancer_id = Project.objects.filter(pk=payment.project_id).values_list(
+            'assigned_freelancer_id', flat=True
+        ).first()
+    else:
+        # Wallet top-ups are not sales
+        return {}
+
+    if freelancer_id is None:
+        return {}
+    return {(day, gig_id, freelancer_id): {'paid_orders': 1, 'revenue': payment.amount}}
+
+
+def difference(previous, current):
+    """Contribution that turns `previous` into `current`, without zero counters"""
+    net = {}
+    for key, deltas in current.items():
+        _add(net, key, **deltas)
+    for key, deltas in previous.items():
+        _add(net, key, **{field: -value for field, value in deltas.items()})
+    net = {key: {field: value for field, value in deltas.items() if value} for key, deltas in net.items()}
+    return {key: deltas for key, deltas in net.items() if deltas}
+
+
+def _bump(model, key, deltas, defaults=None):
+    changes = {field: F(field) + value for field, value in deltas.items()}
+    if not model.objects.filter(**key).update(**changes):
+        model.objects.get_or_create(**key, defaults=defaults or {})
+        model.objects.filter(**key).update(**changes)
+
+
+def apply(contribution):
+    """Add a contribution to the gig and seller rows with single-row UPDATEs"""
+    sellers = {}
+    for (day, gig_id, freelancer_id), deltas in contribution.items():
+        if not deltas:
+            continue
+        if gig_id:
+            _bump(GigDailyStats, {'gig_id': gig_id, 'day': day}, deltas, {'freelancer_id': freelancer_id})
+        _add(sellers, (day, freelancer_id), **deltas)
+    for (day, freelancer_id), deltas in sellers.items():
+        _bump(SellerDailyStats, {'freelancer_id': freelancer_id, 'day': day}, deltas)
+
+
+def record_transactions(payments):
+    """Count transactions that were bulk-created and so sent no signals"""
+    contribution = {}
+    for payment in payments:
+        for key, deltas in transaction_contribution(payment).items():
+            _add(contribution, key, **deltas)
+    apply(contribution)
+
+
+def favorite_added(favorite):
+    freelancer_id = gig_owner(favorite.gig_id)
+    if freelancer_id is not None:
+        apply({(_day(favorite.created_at), favorite.gig_id, freelancer_id): {'favorites_added': 1}})
+
+
+def favorite_removed(favorite):
+    freelancer_id = gig_owner(favorite.gig_id)
+    if freelancer_id is not None:
+        apply({(timezone.localdate(), favorite.gig_id, freelancer_id): {'favorites_removed': 1}})
+
+
+def _add_counts(model, key_field, day, counts, field, defaults, batch_size):
+    """field += count for many rows of one day: create missing rows, then one UPDATE per batch"""
+    items = list(counts.items())
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        model.objects.bulk_create(
+            [model(day=day, **{key_field: key}, **defaults(key)) for key, _ in batch], ignore_conflicts=True
+        )
+        increment = Case(
+            *[When(**{key_field: key}, then=Value(count)) for key, count in batch],
+            default=Value(0), output_field=IntegerField(),
+        )
+        model.objects.filter(day=day, **{f'{key_field}__in': [key for key, _ in batch]}).update(
+            **{field: F(field) + increment}
+        )
+
+
+def add_views(counts, batch_size=500):
+    """Listener for the gig view buffer: add flushed {gig id: views} to today's rows"""
+    from apps.gigs.models import Gig
+
+    day = timezone.localdate()
+    owners = dict(Gig.objects.filter(pk__in=list(counts)).values_list('pk', 'freelancer_id'))
+    gig_counts = {gig_id: count for gig_id, count in counts.items() if gig_id in owners}
+    seller_counts = defaultdict(int)
+    for gig_id, count in gig_counts.items():
+        seller_counts[owners[gig_id]] += count
+
+    _add_counts(GigDailyStats, 'gig_id', day, gig_counts, 'views', lambda gig_id: {'freelancer_id': owners[gig_id]}, batch_size)
+    _add_counts(SellerDailyStats, 'freelancer_id', day, seller_counts, 'views', lambda freelancer_id: {}, batch_size)
+
+
+def with_rates(totals):
+    """Add averages and rates to a dict of summed counters"""
+    deliveries = totals.get('deliveries') or 0
+    views = totals.get('views') or 0
+    totals['average_delivery_hours'] = round(totals['delivery_seconds'] / deliveries / 3600, 1) if deliveries else None
+    totals['average_lateness_hours'] = round(totals['lateness_seconds'] / deliveries / 3600, 1) if deliveries else None
+    totals['on_time_rate'] = round(1 - totals['late_deliveries'] / deliveries, 4) if deliveries else None
+    totals['conversion_rate'] = round(totals['orders_placed'] / views, 4) if views else None
+    totals['net_revenue'] = totals['revenue'] - totals['commission']
+    return totals
+
+
+def daily_series(freelancer_id, start, end):
+    """One SellerDailyStats per day from `start` to `end`, unsaved zero rows for quiet days"""
+    rows = {row.day: row for row in SellerDailyStats.objects.filter(freelancer_id=freelancer_id, day__range=(start, end))}
+    days = (end - start).days + 1
+    return [
+        rows.get(day) or SellerDailyStats(freelancer_id=freelancer_id, day=day)
+        for day in (start + timedelta(days=n) for n in range(days))
+    ]
+
+
+def series_totals(rows):
+    return with_rates({field: sum(getattr(row, field) for row in rows) for field in COUNTER_FIELDS})
+
+
+def gig_totals(freelancer_id, start, end):
+    """Counters per gig over a range, with rates, most revenue first"""
+    rows = GigDailyStats.objects.filter(freelancer_id=freelancer_id, day__range=(start, end)).values(
+        'gig_id', 'gig__title'
+    ).annotate(**{f'total_{field}': Sum(field) for field in COUNTER_FIELDS}).order_by('-total_revenue', 'gig_id')
+    gigs = []
+    for row in rows:
+        totals = {field: row[f'total_{field}'] for field in COUNTER_FIELDS}
+        totals.update(gig_id=row['gig_id'], title=row['gig__title'])
+        gigs.append(with_rates(totals))
+    return gigs
+
+
+def order_totals(freelancer_id):
+    """Lifetime orders placed per gig, {gig id: count}"""
+    return dict(
+        GigDailyStats.objects.filter(freelancer_id=freelancer_id).values('gig_id').annotate(
+            total=Sum('orders_placed')
+        ).order_by().values_list('gig_id', 'total')
+    )
+
+
+def _collect(rows, gig_key, freelancer_key, fields, gigs, sellers):
+    for row in rows:
+        if row[freelancer_key] is None:
+            continue
+        values = {field: row[field] or 0 for field in fields}
+        if gig_key:
+            _add(gigs, (row[gig_key], row[freelancer_key], row['day']), **values)
+        _add(sellers, (row[freelancer_key], row['day']), **values)
+
+
+def rebuild(batch_size=1000):
+    """Recompute the rollups from orders, transactions and favorites; returns (seller rows, gig rows)"""
+    from apps.gigs.models import GigFavorite, GigOrder
+    from apps.payments.models import Transaction
+
+    gigs = {}
+    sellers = {}
+
+    orders = GigOrder.objects.annotate(day=TruncDate('created_at')).values('gig', 'gig__freelancer', 'day')
+    placed = {'orders_placed': Count('id')}
+    for status in ORDER_STATUSES:
+        placed[f'orders_{status}'] = Count('id', filter=Q(status=status))
+    _collect(orders.annotate(**placed).order_by(), 'gig', 'gig__freelancer', list(placed), gigs, sellers)
+
+    delivered = GigOrder.objects.filter(status__in=DELIVERED_STATUSES, actual_delivery_date__isnull=False).annotate(
+        day=TruncDate('actual_delivery_date')
+    ).values('gig', 'gig__freelancer', 'day').annotate(
+        deliveries=Count('id'),
+        late_deliveries=Count('id', filter=Q(actual_delivery_date__gt=F('delivery_date'))),
+        delivery_time=Sum(F('actual_delivery_date') - F('created_at')),
+        lateness_time=Sum(F('actual_delivery_date') - F('delivery_date')),
+    ).order_by()
+    for row in delivered:
+        row['delivery_seconds'] = int(row['delivery_time'].total_seconds()) if row['delivery_time'] else 0
+        row['lateness_seconds'] = int(row['lateness_time'].total_seconds()) if row['lateness_time'] else 0
+        _collect(
+            [row], 'gig', 'gig__freelancer',
+            ['deliveries', 'late_deliveries', 'delivery_seconds', 'lateness_seconds'], gigs, sellers,
+        )
+
+    completed = Transaction.objects.filter(status='completed').annotate(
+        day=TruncDate(Coalesce('completed_at', 'created_at'))
+    )
+    paid = {'paid_orders': Count('id'), 'revenue': Sum('amount')}
+    _collect(
+        completed.filter(transaction_type='payment', gig_order__isnull=False)
+        .values('gig_order__gig', 'gig_order__gig__freelancer', 'day').annotate(**paid).order_by(),
+        'gig_order__gig', 'gig_order__gig__freelancer', list(paid), gigs, sellers,
+    )
+    _collect(
+        completed.filter(transaction_type='payment', gig_order__isnull=True, project__isnull=False)
+        .values('project__assigned_freelancer', 'day').annotate(**paid).order_by(),
+        None, 'project__assigned_freelancer', list(paid), gigs, sellers,
+    )
+    _collect(
+        completed.filter(transaction_type='commission')
+        .values('user', 'day').annotate(commission=-Sum('amount')).order_by(),
+        None, 'user', ['commission'], gigs, sellers,
+    )
+
+    _collect(
+        GigFavorite.objects.annotate(day=TruncDate('created_at')).values('gig', 'gig__freelancer', 'day')
+        .annotate(favorites_added=Count('id')).order_by(),
+        'gig', 'gig__freelancer', ['favorites_added'], gigs, sellers,
+    )
+
+    with transaction.atomic():
+        zero = {field: 0 for field in REBUILT_FIELDS}
+        SellerDailyStats.objects.update(**zero)
+        GigDailyStats.objects.update(**zero)
+        SellerDailyStats.objects.bulk_create(
+            [SellerDailyStats(freelancer_id=freelancer_id, day=day, **values) for (freelancer_id, day), values in sellers.items()],
+            batch_size=batch_size,
+            update_conflicts=True, unique_fields=['freelancer', 'day'], update_fields=REBUILT_FIELDS,
+        )
+        GigDailyStats.objects.bulk_create(
+            [
+                GigDailyStats(gig_id=gig_id, freelancer_id=freelancer_id, day=day, **values)
+                for (gig_id, freelancer_id, day), values in gigs.items()
+            ],
+            batch_size=batch_size,
+            update_conflicts=True, unique_fields=['gig', 'day'], update_fields=REBUILT_FIELDS + ['freelancer'],
+        )
+    return len(sellers), len(gigs)
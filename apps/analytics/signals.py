@@ -0,0 +1,63 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from apps.gigs.models import GigFavorite, GigOrder
+from apps.payments.models import Transaction
+from . import rollups
+
+
+def _order_state(order):
+    if order is None:
+        return {}
+    return rollups.order_contribution(order, rollups.gig_owner(order.gig_id))
+
+
+@receiver(pre_save, sender=GigOrder)
+def remember_order_contribution(sender, instance, raw=False, **kwargs):
+    previous = None
+    if instance.pk and not raw:
+        previous = GigOrder.objects.filter(pk=instance.pk).first()
+    instance._previous_rollup = _order_state(previous)
+
+
+@receiver(post_save, sender=GigOrder)
+def update_order_rollups(sender, instance, raw=False, **kwargs):
+    if not raw:
+        rollups.apply(rollups.difference(getattr(instance, '_previous_rollup', {}), _order_state(instance)))
+
+
+@receiver(post_delete, sender=GigOrder)
+def remove_order_from_rollups(sender, instance, **kwargs):
+    rollups.apply(rollups.difference(_order_state(instance), {}))
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_transaction_contribution(sender, instance, raw=False, **kwargs):
+    previous = None
+    if instance.pk and not raw:
+        previous = Transaction.objects.filter(pk=instance.pk).first()
+    instance._previous_rollup = rollups.transaction_contribution(previous)
+
+
+@receiver(post_save, sender=Transaction)
+def update_transaction_rollups(sender, instance, raw=False, **kwargs):
+    if not raw:
+        rollups.apply(rollups.difference(
+            getattr(instance, '_previous_rollup', {}), rollups.transaction_contribution(instance)
+        ))
+
+
+@receiver(post_delete, sender=Transaction)
+def remove_transaction_from_rollups(sender, instance, **kwargs):
+    rollups.apply(rollups.difference(rollups.transaction_contribution(instance), {}))
+
+
+@receiver(post_save, sender=GigFavorite)
+def count_favorite(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        rollups.favorite_added(instance)
+
+
+@receiver(post_delete, sender=GigFavorite)
+def count_unfavorite(sender, instance, **kwargs):
+    rollups.favorite_removed(instance)
@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = 'analytics'
+
+urlpatterns = [
+    path('seller/', views.seller_dashboard, name='seller_dashboard'),
+    path('seller/stats/', views.seller_stats, name='seller_stats'),
+]
@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.utils import timezone
+
+from .rollups import COUNTER_FIELDS, daily_series, gig_totals, series_totals
+
+
+def _date_range(request):
+    try:
+        days = int(request.GET.get('days', settings.ANALYTICS_DEFAULT_DAYS))
+    except ValueError:
+        days = settings.ANALYTICS_DEFAULT_DAYS
+    days = min(max(days, 1), settings.ANALYTICS_MAX_DAYS)
+    end = timezone.localdate()
+    return end - timedelta(days=days - 1), end
+
+
+@login_required
+def seller_dashboard(request):
+    """Orders, earnings, delivery and traffic for the signed-in seller, from the daily rollups"""
+    start, end = _date_range(request)
+    series = daily_series(request.user.pk, start, end)
+    return render(request, 'analytics/seller_dashboard.html', {
+        'start': start,
+        'end': end,
+        'series': series,
+        'totals': series_totals(series),
+        'gigs': gig_totals(request.user.pk, start, end),
+    })
+
+
+@login_required
+def seller_stats(request):
+    """Chart data for the seller dashboard"""
+    start, end = _date_range(request)
+    series = daily_series(request.user.pk, start, end)
+    return JsonResponse({
+        'start': start,
+        'end': end,
+        'days': [
+            {'day': row.day, **{field: getattr(row, field) for field in COUNTER_FIELDS}}
+            for row in series
+        ],
+        'totals': series_totals(series),
+        'gigs': gig_totals(request.user.pk, start, end),
+    })
@@ -0,0 +1,219 @@
+"""End-to-end benchmarks for the hot endpoints.
+
+Each registered scenario picks one request (path and POST data) for a
+signed-in fixture user. `run` drives the scenarios through the full
+middleware stack with Django's test client from several threads, and
+records latency percentiles, throughput and SQL statements per request.
+Provider calls go to the local stub in apps.payments.stub. Meant for a
+database filled by `manage.py generate_load_data`; see
+`manage.py run_benchmarks`.
+"""
+import random
+import statistics
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from .profiling import RequestProfile
+
+User = get_user_model()
+
+Scenario = namedtuple('Scenario', ['name', 'build', 'login', 'expected_status'])
+
+scenarios = {}
+
+SEARCH_TERMS = ('logo', 'website design', 'seo', 'video edit', 'translation', 'wordpress', 'mobile app')
+GIG_SORTS = ('newest', 'price_low', 'price_high', 'rating', 'popular')
+
+
+def scenario(name, login=True, expected_status=(200,)):
+    """Register a function (fixture, user, rng) -> (path, POST data or None)"""
+    def decorator(func):
+        scenarios[name] = Scenario(name, func, login, expected_status)
+        return func
+    return decorator
+
+
+class Fixture:
+    """Ids sampled once from a generated dataset, shared by all workers"""
+
+    def __init__(self, prefix='load', users=50, seed=0):
+        from apps.gigs.models import Gig, GigCategory, GigOrder
+        from apps.messaging.models import Conversation
+
+        rng = random.Random(seed)
+        buyers = list(
+            GigOrder.objects.filter(buyer__username__startswith=f'{prefix}_', conversations__isnull=False)
+            .order_by('buyer_id').values_list('buyer_id', flat=True).distinct()[:users * 20]
+        )
+        if not buyers:
+            raise ValueError(f"No generated users prefixed '{prefix}_' with orders; run generate_load_data first.")
+        self.users = list(User.objects.filter(pk__in=rng.sample(buyers, min(users, len(buyers)))))
+
+        user_ids = [user.pk for user in self.users]
+        self.conversations = {}
+        for conversation_id, user_id in Conversation.participants.through.objects.filter(
+            user_id__in=user_ids
+        ).values_list('conversation_id', 'user_id'):
+            self.conversations.setdefault(user_id, []).append(conversation_id)
+        self.orders = {}
+        for order_id, buyer_id in GigOrder.objects.filter(buyer_id__in=user_ids).values_list('pk', 'buyer_id'):
+            self.orders.setdefault(buyer_id, []).append(order_id)
+
+        self.gigs = list(Gig.objects.filter(is_active=True).order_by('pk').values_list('pk', flat=True)[:5000])
+        self.categories = list(GigCategory.objects.values_list('pk', flat=True))
+
+
+@scenario('gig list', login=False)
+def gig_list(fixture, user, rng):
+    params = {'sort': rng.choice(GIG_SORTS)}
+    if rng.random() < 0.5:
+        params['search'] = rng.choice(SEARCH_TERMS)
+        if rng.random() < 0.5:
+            params['sort'] = 'relevance'
+    if rng.random() < 0.4:
+        params['category'] = rng.choice(fixture.categories)
+    if rng.random() < 0.3:
+        params['price_max'] = rng.choice((5000, 20000, 50000))
+    query = '&'.join(f'{key}={value}' for key, value in params.items())
+    return f"{reverse('gigs:gig_list')}?{query}", None
+
+
+@scenario('gig detail', login=False)
+def gig_detail(fixture, user, rng):
+    return reverse('gigs:gig_detail', args=[rng.choice(fixture.gigs)]), None
+
+
+@scenario('project list')
+def project_list(fixture, user, rng):
+    return reverse('projects:project_list'), None
+
+
+@scenario('inbox')
+def inbox(fixture, user, rng):
+    return reverse('messaging:inbox'), None
+
+
+@scenario('conversation detail')
+def conversation_detail(fixture, user, rng):
+    return reverse('messaging:conversation_detail', args=[rng.choice(fixture.conversations[user.pk])]), None
+
+
+@scenario('wallet dashboard')
+def wallet_dashboard(fixture, user, rng):
+    return reverse('payments:wallet_dashboard'), None
+
+
+@scenario('order gig', expected_status=(302,))
+def order_gig(fixture, user, rng):
+    return reverse('gigs:order_gig', args=[rng.choice(fixture.gigs)]), {
+        'package': 'basic',
+        'requirements': 'Benchmark order',
+    }
+
+
+@scenario('initiate payment', expected_status=(302,))
+def initiate_payment(fixture, user, rng):
+    return reverse('payments:initiate_payment', args=[rng.choice(fixture.orders[user.pk]), 'gig']), {}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _worker(fixture, chosen, requests, seed, results, lock):
+    rng = random.Random(seed)
+    user = rng.choice(fixture.users)
+    anonymous = Client()
+    signed_in = Client()
+    signed_in.force_login(user)
+    local = {name: {'latency': [], 'sql': [], 'errors': 0} for name in chosen}
+    try:
+        for n in range(requests):
+            name = chosen[n % len(chosen)]
+            current = scenarios[name]
+            client = signed_in if current.login else anonymous
+            path, data = current.build(fixture, user, rng)
+
+            profile = RequestProfile()
+            start = time.perf_counter()
+            with connection.execute_wrapper(profile):
+                if data is None:
+                    response = client.get(path)
+                else:
+                    response = client.post(path, data)
+            elapsed = (time.perf_counter() - start) * 1000
+
+            stats = local[name]
+            stats['latency'].append(elapsed)
+            stats['sql'].append(profile.sql_count)
+            if response.status_code not in current.expected_status:
+                stats['errors'] += 1
+    finally:
+        # Each worker thread opened its own connection
+        connection.close()
+    with lock:
+        for name, stats in local.items():
+            merged = results[name]
+            merged['latency'].extend(stats['latency'])
+            merged['sql'].extend(stats['sql'])
+            merged['errors'] += stats['errors']
+
+
+def run(fixture, names=None, concurrency=8, requests=200, seed=0):
+    """Run each scenario `requests` times per worker; returns {scenario: summary}"""
+    chosen = list(names or scenarios)
+    results = {name: {'latency': [], 'sql': [], 'errors': 0} for name in chosen}
+    lock = threading.Lock()
+
+    summaries = {}
+    for name in chosen:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [
+                pool.submit(_worker, fixture, [name], requests, seed * 1000 + worker, results, lock)
+                for worker in range(concurrency)
+            ]
+            for future in futures:
+                future.result()
+        wall = time.perf_counter() - started
+
+        latency = sorted(results[name]['latency'])
+        sql = results[name]['sql']
+        summaries[name] = {
+            'requests': len(latency),
+            'errors': results[name]['errors'],
+            'throughput_rps': round(len(latency) / wall, 1) if wall else None,
+            'p50_ms': round(percentile(latency, 0.50), 2),
+            'p95_ms': round(percentile(latency, 0.95), 2),
+            'p99_ms': round(percentile(latency, 0.99), 2),
+            'sql_mean': round(statistics.mean(sql), 2),
+            'sql_max': max(sql),
+        }
+    return summaries
+
+
+def compare(current, baseline, latency_tolerance=0.2, sql_tolerance=0.5):
+    """Regressions of `current` against `baseline` as (scenario, metric, before, after) tuples"""
+    regressions = []
+    for name, stats in current.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if before.get(metric) and stats[metric] > before[metric] * (1 + latency_tolerance):
+                regressions.append((name, metric, before[metric], stats[metric]))
+        if 'sql_mean' in before and stats['sql_mean'] > before['sql_mean'] + sql_tolerance:
+            regressions.append((name, 'sql_mean', before['sql_mean'], stats['sql_mean']))
+        if before.get('throughput_rps') and stats['throughput_rps'] < before['throughput_rps'] / (1 + latency_tolerance):
+            regressions.append((name, 'throughput_rps', before['throughput_rps'], stats['throughput_rps']))
+    return regressions
@@ -0,0 +1,166 @@
+"""Response and reference-data caching for the public catalogue.
+
+Cache keys carry a per-namespace version number. Changing a gig, project,
+review or category bumps the version of the namespaces it affects (see
+signals), so stale pages are never read again and simply expire.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+# Namespaces whose pages are cached
+GIGS = 'gigs'
+PROJECTS = 'projects'
+REVIEWS = 'reviews'
+
+STATS_KEY = 'cache-stats:{namespace}:{outcome}'
+
+
+def version(namespace):
+    return cache.get_or_set(f'cache-version:{namespace}', 1, timeout=None)
+
+
+def invalidate(*namespaces):
+    """Bump the version of each namespace; existing entries become unreachable"""
+    for namespace in namespaces:
+        key = f'cache-version:{namespace}'
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 2, timeout=None)
+
+
+def page_key(namespace, request):
+    params = sorted((key, value) for key in request.GET for value in request.GET.getlist(key))
+    digest = hashlib.sha1(repr((request.path, params)).encode()).hexdigest()
+    return f'page:{namespace}:v{version(namespace)}:{digest}'
+
+
+def record(namespace, outcome):
+    key = STATS_KEY.format(namespace=namespace, outcome=outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def stats(namespaces=(GIGS, PROJECTS, REVIEWS, 'reference')):
+    """Hit/miss counters and hit ratio per namespace"""
+    keys = {
+        (namespace, outcome): STATS_KEY.format(namespace=namespace, outcome=outcome)
+        for namespace in namespaces for outcome in ('hit', 'miss')
+    }
+    values = cache.get_many(keys.values())
+    result = {}
+    for namespace in namespaces:
+        hits = values.get(keys[namespace, 'hit'], 0)
+        misses = values.get(keys[namespace, 'miss'], 0)
+        result[namespace] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / (hits + misses) if hits + misses else None,
+            'version': version(namespace),
+        }
+    return result
+
+
+def _cacheable(request):
+    return request.method in ('GET', 'HEAD') and not request.user.is_authenticated
+
+
+# request.META keys that csrf.get_token() sets or changes: a new secret, or
+# the existing cookie flagged for renewal (CSRF_COOKIE_USED before Django 4.1)
+CSRF_META_KEYS = ('CSRF_COOKIE', 'CSRF_COOKIE_NEEDS_UPDATE', 'CSRF_COOKIE_USED')
+
+
+def _csrf_state(request):
+    return tuple(request.META.get(key) for key in CSRF_META_KEYS)
+
+
+def cache_anonymous_page(namespace, timeout=None, on_request=None):
+    """Cache the rendered page for anonymous visitors, keyed on path, query string and namespace version.
+
+    `on_request` is called for every request, cached or not (e.g. to count views).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if on_request is not None:
+                on_request(request, *args, **kwargs)
+            if not _cacheable(request):
+                return view(request, *args, **kwargs)
+
+            key = page_key(namespace, request)
+            cached = cache.get(key)
+            if cached is not None:
+                record(namespace, 'hit')
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            record(namespace, 'miss')
+            csrf_before = _csrf_state(request)
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response = response.render()
+            # Any get_token() call (e.g. {% csrf_token %}) leaves a trace here, whether or
+            # not the visitor already had a cookie; the page then holds their masked token.
+            # A cookie flagged for renewal before the view means a per-visitor Set-Cookie.
+            csrf_used = _csrf_state(request) != csrf_before or request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+
+            # Pages with a CSRF token, cookies or flash messages are per-visitor
+            if (
+                response.status_code == 200
+                and not response.cookies
+                and not csrf_used
+                and not getattr(getattr(request, '_messages', None), 'used', False)
+            ):
+                cache.set(
+                    key,
+                    (response.content, response['Content-Type']),
+                    timeout if timeout is not None else settings.CATALOGUE_CACHE_TIMEOUT,
+                )
+            return response
+        return wrapped
+    return decorator
+
+
+class CachedPageMixin:
+    """Class-based view version of cache_anonymous_page"""
+    cache_namespace = None
+    cache_timeout = None
+    on_request = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        return cache_anonymous_page(cls.cache_namespace, cls.cache_timeout, cls.on_request)(view)
+
+
+def reference_data(name, loader):
+    """Long-lived cached list (categories, skills); invalidated by signals on change"""
+    key = f'reference:{name}'
+    data = cache.get(key)
+    if data is None:
+        record('reference', 'miss')
+        data = list(loader())
+        cache.set(key, data, settings.REFERENCE_DATA_CACHE_TIMEOUT)
+    else:
+        record('reference', 'hit')
+    return data
+
+
+def forget_reference_data(*names):
+    cache.delete_many([f'reference:{name}' for name in names])
+
+
+def gig_categories():
+    from apps.gigs.models import GigCategory
+    return reference_data('gig_categories', GigCategory.objects.all)
+
+
+def skills():
+    from apps.accounts.models import Skill
+    return reference_data('skills', Skill.objects.all)
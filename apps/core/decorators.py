@@ -0,0 +1,18 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+
+
+def async_login_required(view):
+    """login_required for async views (Django 4.2's decorator only wraps sync views).
+
+    Loading the user touches the session and the database, so it runs in a
+    thread once; afterwards `request.user` is a plain attribute read.
+    """
+    @wraps(view)
+    async def wrapped(request, *args, **kwargs):
+        if not await sync_to_async(lambda: request.user.is_authenticated)():
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapped
@@ -0,0 +1,56 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+
+from apps.core.pagination import CursorPaginator, encode_cursor
+from apps.gigs.models import Gig
+
+
+class Command(BaseCommand):
+    help = 'Compare OFFSET and cursor pagination latency on a shallow and a deep page of the gig list'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page', type=int, default=5000, help='Deep page number to compare against page 1')
+        parser.add_argument('--per-page', type=int, default=12)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--sort', default='-created_at', help='Ordering field, e.g. basic_price or -rating')
+
+    def handle(self, *args, **options):
+        queryset = Gig.objects.filter(is_active=True).order_by(options['sort'])
+        per_page = options['per_page']
+        page = options['page']
+
+        paginator = CursorPaginator(queryset, per_page)
+        # Cursor that points at the row just before the deep page (setup, not timed)
+        edge = queryset.order_by(*paginator.ordering)[(page - 1) * per_page - 1:(page - 1) * per_page].first()
+        if edge is None:
+            total = queryset.count()
+            self.stdout.write(self.style.ERROR(
+                f'Only {total} active gigs: page {page} does not exist. Generate more data first.'
+            ))
+            return
+        deep_cursor = encode_cursor(paginator._values(edge), 'next')
+
+        def offset_page(number):
+            return list(Paginator(queryset, per_page).page(number).object_list)
+
+        results = [
+            ('offset', 1, self.measure(lambda: offset_page(1), options['repeat'])),
+            ('offset', page, self.measure(lambda: offset_page(page), options['repeat'])),
+            ('cursor', 1, self.measure(lambda: paginator.page(None).object_list, options['repeat'])),
+            ('cursor', page, self.measure(lambda: paginator.page(deep_cursor).object_list, options['repeat'])),
+        ]
+
+        self.stdout.write(f"Ordering: {', '.join(paginator.ordering)}, {per_page} per page")
+        for kind, number, (median, worst) in results:
+            self.stdout.write(f'{kind:<7} page {number:<6} median={median:8.2f}ms  max={worst:8.2f}ms')
+
+    def measure(self, fetch, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fetch()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), max(timings)
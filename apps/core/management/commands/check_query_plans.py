@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.query_plans import hot_queries, check_plan
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the registered hot querysets and fail if any of them needs a full table scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not only failing ones')
+
+    def handle(self, *args, **options):
+        failures = []
+        for name, build in hot_queries.items():
+            plan, full_scans = check_plan(build())
+            if full_scans:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"FULL SCAN  {name}: {', '.join(sorted(set(full_scans)))}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'ok         {name}'))
+            if full_scans or options['verbose_plans']:
+                self.stdout.write('    ' + plan.replace('\n', '\n    '))
+
+        if failures:
+            raise CommandError(f'{len(failures)} hot queries fall back to a full scan')
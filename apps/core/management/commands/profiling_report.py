@@ -0,0 +1,78 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.core.models import ProfileSnapshot
+from apps.core.profiling import LATENCY_BUCKETS_MS, QUERY_COUNT_BUCKETS
+
+TOTALS = ['requests', 'sql_queries', 'sql_time_ms', 'template_time_ms', 'total_time_ms', 'duplicate_queries']
+
+
+def percentile(histogram, bounds, fraction):
+    """Upper bound of the bucket containing the given fraction of requests"""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    seen = 0
+    for bound in [str(bound) for bound in bounds] + ['inf']:
+        seen += histogram.get(bound, 0)
+        if seen >= total * fraction:
+            return bound
+    return 'inf'
+
+
+class Command(BaseCommand):
+    help = 'Summarise sampled request profiles per endpoint (SQL count/time, duplicates, latency histogram)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=24, help='Only snapshots from the last N hours')
+        parser.add_argument('--endpoint', help='Only endpoints containing this text')
+        parser.add_argument('--sort', default='total_time_ms', choices=TOTALS)
+        parser.add_argument('--duplicates', type=int, default=3, help='Repeated statements to show per endpoint')
+        parser.add_argument('--prune-days', type=int, help='Delete snapshots older than N days first')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        if options['prune_days'] is not None:
+            deleted, _ = ProfileSnapshot.objects.filter(ended_at__lt=now - timedelta(days=options['prune_days'])).delete()
+            self.stdout.write(f'Pruned {deleted} snapshots')
+
+        snapshots = ProfileSnapshot.objects.filter(ended_at__gte=now - timedelta(hours=options['hours']))
+        if options['endpoint']:
+            snapshots = snapshots.filter(endpoint__icontains=options['endpoint'])
+
+        endpoints = {}
+        for endpoint, data in snapshots.values_list('endpoint', 'data').iterator():
+            merged = endpoints.setdefault(endpoint, {
+                **dict.fromkeys(TOTALS, 0),
+                'latency_ms': Counter(), 'sql_count': Counter(), 'duplicates': Counter(), 'samples': {},
+            })
+            for key in TOTALS:
+                merged[key] += data.get(key, 0)
+            for key in ('latency_ms', 'sql_count', 'duplicates'):
+                merged[key].update(data.get(key, {}))
+            merged['samples'].update(data.get('samples', {}))
+
+        if not endpoints:
+            self.stdout.write('No profiles recorded. Is PROFILING_SAMPLE_RATE above 0?')
+            return
+
+        for endpoint, stats in sorted(endpoints.items(), key=lambda item: -item[1][options['sort']]):
+            requests = stats['requests']
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{endpoint}  ({requests} sampled requests)'))
+            self.stdout.write(
+                f"  avg: {stats['total_time_ms'] / requests:.1f}ms total, "
+                f"{stats['sql_queries'] / requests:.1f} queries in {stats['sql_time_ms'] / requests:.1f}ms, "
+                f"templates {stats['template_time_ms'] / requests:.1f}ms, "
+                f"{stats['duplicate_queries'] / requests:.1f} duplicate queries"
+            )
+            self.stdout.write(
+                f"  latency p50<={percentile(stats['latency_ms'], LATENCY_BUCKETS_MS, 0.5)}ms "
+                f"p95<={percentile(stats['latency_ms'], LATENCY_BUCKETS_MS, 0.95)}ms "
+                f"p99<={percentile(stats['latency_ms'], LATENCY_BUCKETS_MS, 0.99)}ms; "
+                f"queries p95<={percentile(stats['sql_count'], QUERY_COUNT_BUCKETS, 0.95)}"
+            )
+            for key, count in stats['duplicates'].most_common(options['duplicates']):
+                self.stdout.write(f"  x{count / requests:.1f}/request  {stats['samples'].get(key, key)[:160]}")
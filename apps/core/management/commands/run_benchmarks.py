@@ -0,0 +1,78 @@
+import json
+import platform
+from copy import deepcopy
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.core import benchmarks
+from apps.payments import clients
+from apps.payments.stub import StubProviderServer
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the hot endpoints on a generated dataset; write a JSON baseline or compare against one'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', dest='scenarios', choices=sorted(benchmarks.scenarios))
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent client threads')
+        parser.add_argument('--requests', type=int, default=100, help='Requests per thread and scenario')
+        parser.add_argument('--users', type=int, default=50, help='Generated users to sign in as')
+        parser.add_argument('--prefix', default='load', help='Prefix passed to generate_load_data')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--provider-delay', type=float, default=0.05, help='Seconds the stub provider waits per call')
+        parser.add_argument('--output', help='Write results to this JSON file')
+        parser.add_argument('--baseline', help='Compare against this JSON file')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed latency increase (0.2 = 20%%)')
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        try:
+            fixture = benchmarks.Fixture(options['prefix'], options['users'], options['seed'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        with StubProviderServer(delay=options['provider_delay']) as stub:
+            providers = deepcopy(settings.PAYMENT_PROVIDERS)
+            for config in providers.values():
+                config['BASE_URL'] = stub.url
+            with override_settings(PAYMENT_PROVIDERS=providers, ALLOWED_HOSTS=['testserver']):
+                # Clients built before the override would still point at the real APIs
+                clients.reset_clients()
+                results = benchmarks.run(
+                    fixture, options['scenarios'], options['concurrency'], options['requests'], options['seed']
+                )
+            clients.reset_clients()
+
+        self.stdout.write(f"{'scenario':<22}{'reqs':>7}{'err':>5}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'sql':>7}")
+        for name, stats in results.items():
+            self.stdout.write(
+                f"{name:<22}{stats['requests']:>7}{stats['errors']:>5}{stats['throughput_rps']:>9}"
+                f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}{stats['sql_mean']:>7}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({
+                    'created_at': timezone.now().isoformat(),
+                    'database': connection.vendor,
+                    'python': platform.python_version(),
+                    'concurrency': options['concurrency'],
+                    'requests': options['requests'],
+                    'scenarios': results,
+                }, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)['scenarios']
+            regressions = benchmarks.compare(results, baseline, options['tolerance'])
+            for name, metric, before, after in regressions:
+                self.stdout.write(self.style.ERROR(f'REGRESSION {name}: {metric} {before} -> {after}'))
+            if not regressions:
+                self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+            elif options['fail_on_regression']:
+                raise CommandError(f'{len(regressions)} regression(s) against {options["baseline"]}')
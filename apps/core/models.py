@@ -0,0 +1,19 @@
+from django.db import models
+
+
+class ProfileSnapshot(models.Model):
+    """Request profile statistics for one endpoint, flushed by one process over one interval"""
+    endpoint = models.CharField(max_length=200)
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField(db_index=True)
+    requests = models.PositiveIntegerField()
+    data = models.JSONField()
+
+    class Meta:
+        ordering = ['-ended_at']
+        indexes = [
+            models.Index(fields=['endpoint', '-ended_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.endpoint} ({self.requests} requests until {self.ended_at})"
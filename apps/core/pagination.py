@@ -0,0 +1,210 @@
+"""Keyset (cursor) pagination.
+
+Pages are fetched with `WHERE (sort keys) > (last row's keys) ... LIMIT n`
+instead of COUNT(*) + OFFSET, so page 5000 costs the same as page 1. The
+cursor is an opaque token holding the sort-key values of the edge row.
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured, ValidationError
+from django.db import connection
+from django.db.models import Q
+
+APPROXIMATE_COUNT_LIMIT = 1000
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values, direction):
+    raw = json.dumps({'d': direction, 'v': [_encode_value(value) for value in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (direction, raw values) from a cursor, or None if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if data['d'] not in ('next', 'prev') or not isinstance(data['v'], list):
+            return None
+        return data['d'], data['v']
+    except (ValueError, KeyError, TypeError, UnicodeDecodeError):
+        return None
+
+
+def approximate_count(queryset, limit=APPROXIMATE_COUNT_LIMIT):
+    """Cheap row count: the planner's estimate on PostgreSQL, a capped count elsewhere.
+
+    Returns (count, exact).
+    """
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows']), False
+
+    count = queryset.order_by()[:limit + 1].count()
+    return min(count, limit), count <= limit
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor, previous_cursor, count=None, count_is_exact=True):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+        self.count_is_exact = count_is_exact
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Paginate a queryset by its ordering; the primary key is added as a tiebreaker.
+
+    Ordering fields must be non-null columns or annotations on the queryset.
+    """
+
+    def __init__(self, queryset, per_page, ordering=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = self.get_ordering(queryset, ordering)
+
+    @staticmethod
+    def get_ordering(queryset, ordering=None):
+        ordering = list(ordering or queryset.query.order_by or queryset.model._meta.ordering or ['-pk'])
+        for field in ordering:
+            if not isinstance(field, str) or '__' in field or field.startswith('?'):
+                raise ImproperlyConfigured(f'Cannot paginate by cursor on ordering {field!r}')
+        names = {field.lstrip('-') for field in ordering}
+        if not names & {'pk', 'id', queryset.model._meta.pk.name}:
+            ordering.append('-pk' if ordering[0].startswith('-') else 'pk')
+        return ordering
+
+    def _field(self, name):
+        if name == 'pk':
+            return self.queryset.model._meta.pk
+        try:
+            return self.queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return self.queryset.query.annotations[name].output_field
+
+    def _values(self, obj):
+        return [getattr(obj, field.lstrip('-')) for field in self.ordering]
+
+    def _parse(self, raw_values):
+        if len(raw_values) != len(self.ordering):
+            return None
+        try:
+            return [self._field(field.lstrip('-')).to_python(value) for field, value in zip(self.ordering, raw_values)]
+        except (ValidationError, KeyError):
+            return None
+
+    def _after(self, values, reverse=False):
+        """Rows strictly after `values` in the pagination order (before it if reverse)"""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            condition |= equal & Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def page_queryset(self, values=None, backwards=False):
+        """The query for one page plus a look-ahead row, after (or before) the cursor `values`"""
+        queryset = self.queryset
+        if values:
+            queryset = queryset.filter(self._after(values, reverse=backwards))
+
+        ordering = self.ordering
+        if backwards:
+            ordering = [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+        return queryset.order_by(*ordering)[:self.per_page + 1]
+
+    def page(self, cursor=None, with_count=False):
+        decoded = decode_cursor(cursor) if cursor else None
+        values = self._parse(decoded[1]) if decoded else None
+        backwards = bool(values) and decoded[0] == 'prev'
+
+        rows = list(self.page_queryset(values, backwards))
+
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or backwards:
+                next_cursor = encode_cursor(self._values(rows[-1]), 'next')
+            if (has_more and backwards) or (values and not backwards):
+                previous_cursor = encode_cursor(self._values(rows[0]), 'prev')
+
+        count, exact = (None, True)
+        if with_count:
+            count, exact = approximate_count(self.queryset)
+        return CursorPage(rows, next_cursor, previous_cursor, count, exact)
+
+
+def paginate_by_cursor(request, queryset, per_page, param='cursor', ordering=None, with_count=False):
+    """Cursor page for a function view; `next_url` / `previous_url` keep the other query parameters"""
+    page = CursorPaginator(queryset, per_page, ordering).page(request.GET.get(param), with_count=with_count)
+    page.next_url = cursor_url(request, param, page.next_cursor)
+    page.previous_url = cursor_url(request, param, page.previous_cursor)
+    return page
+
+
+def cursor_url(request, param, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params[param] = cursor
+    params.pop('page', None)
+    return f'?{params.urlencode()}'
+
+
+class CursorPaginationMixin:
+    """Drop-in replacement for ListView pagination using cursors.
+
+    The page follows the queryset's own order_by; pass `?cursor=` tokens
+    from `page_obj.next_cursor` / `page_obj.previous_cursor`. Set
+    `paginate_count = True` to get an approximate total in `page_obj.count`.
+    """
+    cursor_param = 'cursor'
+    cursor_ordering = None
+    paginate_count = False
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = CursorPaginator(queryset, page_size, self.cursor_ordering)
+        page = paginator.page(self.request.GET.get(self.cursor_param), with_count=self.paginate_count)
+        page.next_url = self.cursor_url(page.next_cursor)
+        page.previous_url = self.cursor_url(page.previous_cursor)
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def cursor_url(self, cursor):
+        return cursor_url(self.request, self.cursor_param, cursor)
@@ -0,0 +1,291 @@
+"""Per-endpoint SQL and latency profiling.
+
+ProfilingMiddleware samples a fraction of requests (PROFILING_SAMPLE_RATE).
+For each sampled request it counts and times every SQL statement through
+an execute wrapper on each connection, spots statements repeated with different
+parameters (the N+1 signature), and times template rendering. Results
+are merged per URL name into histograms in memory and flushed as
+ProfileSnapshot rows by a background thread. Dump them with
+`manage.py profiling_report`.
+"""
+import atexit
+import contextvars
+import hashlib
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_current = contextvars.ContextVar('request_profile', default=None)
+
+_IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_NUMBER = re.compile(r'\b\d+\b')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_SPACE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """SQL with literals and IN lists collapsed, so repeated statements compare equal"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.sha1(normalize_sql(sql).encode()).hexdigest()[:16]
+
+
+def bucket(value, bounds):
+    """Upper bound of the histogram bucket holding `value` ('inf' past the last bound)"""
+    for bound in bounds:
+        if value <= bound:
+            return str(bound)
+    return 'inf'
+
+
+class RequestProfile:
+    """What one request did; filled in by the SQL wrapper and the template hook"""
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.statements = Counter()
+        self.samples = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.sql_count += 1
+            key = fingerprint(sql)
+            self.statements[key] += 1
+            self.samples.setdefault(key, normalize_sql(sql)[:500])
+
+    def duplicates(self):
+        """{fingerprint: executions} for statements run more than once"""
+        return {key: count for key, count in self.statements.items() if count > 1}
+
+
+def _profile_sql(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile(execute, sql, params, many, context)
+
+
+def _wrap_connection(sender, connection, **kwargs):
+    if _profile_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_profile_sql)
+
+
+def _instrument_connections():
+    """Send SQL from every connection to the current request's profile.
+
+    The profile is found through a context variable, which sync_to_async
+    copies into its thread, so queries from async views are counted too.
+    """
+    connection_created.connect(_wrap_connection, dispatch_uid='request-profiling')
+    for connection in connections.all(initialized_only=True):
+        _wrap_connection(None, connection)
+
+
+def _instrument_templates():
+    """Time Django template rendering for the profile of the current request"""
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, 'profiled', False):
+        return
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        profile = _current.get()
+        if profile is None:
+            return original(self, context, request)
+        start = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            profile.template_time += time.perf_counter() - start
+
+    render.profiled = True
+    Template.render = render
+
+
+class ProfileStore:
+    """Per-process rollup of request profiles, flushed periodically to ProfileSnapshot"""
+
+    def __init__(self, flush_interval=None):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._started_at = timezone.now()
+        self._pid = None
+        self._flusher = None
+
+    def get_flush_interval(self):
+        if self.flush_interval is not None:
+            return self.flush_interval
+        return getattr(settings, 'PROFILING_FLUSH_INTERVAL', 60)
+
+    def add(self, endpoint, profile, total_time):
+        duplicates = profile.duplicates()
+        with self._lock:
+            self._check_fork()
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = {
+                    'requests': 0,
+                    'sql_queries': 0,
+                    'sql_time_ms': 0.0,
+                    'template_time_ms': 0.0,
+                    'total_time_ms': 0.0,
+                    'duplicate_queries': 0,
+                    'latency_ms': Counter(),
+                    'sql_count': Counter(),
+                    'duplicates': Counter(),
+                    'samples': {},
+                }
+            stats['requests'] += 1
+            stats['sql_queries'] += profile.sql_count
+            stats['sql_time_ms'] += profile.sql_time * 1000
+            stats['template_time_ms'] += profile.template_time * 1000
+            stats['total_time_ms'] += total_time * 1000
+            stats['duplicate_queries'] += sum(count - 1 for count in duplicates.values())
+            stats['latency_ms'][bucket(total_time * 1000, LATENCY_BUCKETS_MS)] += 1
+            stats['sql_count'][bucket(profile.sql_count, QUERY_COUNT_BUCKETS)] += 1
+            for key, count in duplicates.items():
+                # Executions beyond the first, summed over requests
+                stats['duplicates'][key] += count - 1
+                stats['samples'].setdefault(key, profile.samples[key])
+
+        self._start_flusher()
+
+    def flush(self):
+        """Write one snapshot row per endpoint seen since the last flush"""
+        from .models import ProfileSnapshot
+
+        with self._lock:
+            self._check_fork()
+            endpoints, self._endpoints = self._endpoints, {}
+            started_at, self._started_at = self._started_at, timezone.now()
+
+        if not endpoints:
+            return 0
+
+        ended_at = timezone.now()
+        rows = []
+        for endpoint, stats in endpoints.items():
+            data = {key: (dict(value) if isinstance(value, Counter) else value) for key, value in stats.items()}
+            rows.append(ProfileSnapshot(
+                endpoint=endpoint[:200],
+                started_at=started_at,
+                ended_at=ended_at,
+                requests=stats['requests'],
+                data=data,
+            ))
+        try:
+            ProfileSnapshot.objects.bulk_create(rows)
+        except DatabaseError:
+            logger.exception('Failed to flush request profiles')
+            return 0
+        return len(rows)
+
+    def _check_fork(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            if self._pid is not None:
+                self._endpoints = {}
+            self._pid = pid
+            self._flusher = None
+
+    def _start_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._run_flusher, name='profile-flusher', daemon=True)
+            self._flusher.start()
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.get_flush_interval())
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+profile_store = ProfileStore()
+atexit.register(profile_store.flush)
+
+
+class ProfilingMiddleware:
+    """Profile a sample of requests; disabled entirely when PROFILING_SAMPLE_RATE is 0"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+        if not self.sample_rate:
+            raise MiddlewareNotUsed
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        _instrument_connections()
+        _instrument_templates()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, profile, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, profile, time.perf_counter() - start)
+        return response
+
+    def record(self, request, profile, total_time):
+        match = getattr(request, 'resolver_match', None)
+        endpoint = match.view_name if match else 'unresolved'
+        profile_store.add(f'{request.method} {endpoint}', profile, total_time)
@@ -0,0 +1,175 @@
+"""EXPLAIN-based checks that the hot querysets are served by an index.
+
+Each registered function builds one hot queryset with the code that runs it
+in production: list pages go through the view's own get_queryset() and the
+cursor paginator, background queries through the functions the commands
+call. `check_plan` runs EXPLAIN on it and reports any table read by a full
+scan.
+"""
+import re
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections, transaction
+from django.test import RequestFactory
+
+from .pagination import CursorPaginator
+
+hot_queries = {}
+
+# Full-table reads as printed by each backend's EXPLAIN
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (?!CONSTANT ROW|.*\bUSING\b)(?:TABLE )?(\w+)'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'mysql': re.compile(r"'?type'?\W+ALL\b"),
+}
+
+
+def register(name):
+    """Register a function returning a queryset to be checked by check_query_plans"""
+    def decorator(func):
+        hot_queries[name] = func
+        return func
+    return decorator
+
+
+def explain(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        # Small tables are cheaper to scan; ask whether an index path exists at all
+        with transaction.atomic(using=queryset.db):
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+    return queryset.explain()
+
+
+def check_plan(queryset):
+    """Return (plan, full_scans) for a queryset"""
+    if queryset.query.is_empty():
+        # e.g. a search without hits; the database is never asked
+        return 'Empty result, no query is run', []
+    plan = explain(queryset)
+    pattern = FULL_SCAN_PATTERNS.get(connections[queryset.db].vendor)
+    full_scans = pattern.findall(plan) if pattern else []
+    return plan, full_scans
+
+
+def list_view_queryset(view_class, **params):
+    """Queryset a list view builds for a GET with `params`"""
+    request = RequestFactory().get('/', params)
+    request.user = AnonymousUser()
+    view = view_class()
+    view.setup(request)
+    return view, view.get_queryset()
+
+
+def list_view_page(view_class, **params):
+    """First page query of a cursor-paginated list view for a GET with `params`"""
+    view, queryset = list_view_queryset(view_class, **params)
+    return CursorPaginator(queryset, view.paginate_by, view.cursor_ordering).page_queryset()
+
+
+def prefetch_queryset(queryset, lookup, **filters):
+    """Query a `Prefetch(lookup, ...)` of `queryset` runs, restricted by `filters` as prefetching does"""
+    from django.db.models import Prefetch
+
+    for prefetch in queryset._prefetch_related_lookups:
+        if isinstance(prefetch, Prefetch) and prefetch.prefetch_to == lookup:
+            return prefetch.queryset.filter(**filters)
+    raise LookupError(f'{queryset.model.__name__} queryset has no Prefetch({lookup!r})')
+
+
+def search_term(model):
+    """A word that the search index has for `model`, so the search checks get hits"""
+    title = model._default_manager.values_list('title', flat=True).order_by('pk').first()
+    return title.split()[0] if title else 'design'
+
+
+@register('gig list: category + price')
+def gig_list_by_category():
+    from apps.gigs.views import GigListView
+    return list_view_page(GigListView, category=1, price_max=50000, sort='price_low')
+
+
+@register('gig list: newest')
+def gig_list_newest():
+    from apps.gigs.views import GigListView
+    return list_view_page(GigListView)
+
+
+@register('gig list: top rated')
+def gig_list_top_rated():
+    from apps.gigs.views import GigListView
+    return list_view_page(GigListView, sort='rating')
+
+
+@register('gig list: search by relevance')
+def gig_list_search():
+    from apps.gigs.models import Gig
+    from apps.gigs.views import GigListView
+    return list_view_page(GigListView, search=search_term(Gig))
+
+
+@register('gig list: card images')
+def gig_list_images():
+    from apps.gigs.views import GigListView
+    _, queryset = list_view_queryset(GigListView)
+    return prefetch_queryset(queryset, 'images', gig__in=[1, 2, 3])
+
+
+@register('project list: skills + type + level')
+def project_list_filtered():
+    from apps.projects.views import ProjectListView
+    return list_view_page(
+        ProjectListView, skills=['1', '2'], project_type='fixed', experience_level='intermediate'
+    )
+
+
+@register('project list: newest')
+def project_list_newest():
+    from apps.projects.views import ProjectListView
+    return list_view_page(ProjectListView)
+
+
+@register('project list: search by relevance')
+def project_list_search():
+    from apps.projects.models import Project
+    from apps.projects.views import ProjectListView
+    return list_view_page(ProjectListView, search=search_term(Project))
+
+
+@register('transactions: per user')
+def transactions_for_user():
+    from apps.payments.models import Transaction
+    return Transaction.objects.filter(user_id=1).order_by('-created_at', '-id')[:21]
+
+
+@register('messages: unread after read cursor')
+def unread_messages():
+    from apps.messaging.models import Message
+    return Message.objects.filter(conversation_id=1, id__gt=1).exclude(sender_id=1)
+
+
+@register('messages: history page')
+def message_history():
+    from apps.messaging.models import Message
+    return Message.objects.filter(conversation_id=1).order_by('-created_at', '-id')[:51]
+
+
+@register('orders: bought')
+def orders_bought():
+    from apps.gigs.models import GigOrder
+    return GigOrder.objects.filter(buyer_id=1).order_by('-created_at')
+
+
+@register('orders: per gig')
+def orders_for_gig():
+    from apps.gigs.models import GigOrder
+    return GigOrder.objects.filter(gig_id=1).order_by('-created_at')
+
+
+@register('escrow: due for release')
+def escrow_due():
+    from apps.payments.escrow import due_escrows
+    # The chunk release_due_escrows claims; the row lock does not change the plan
+    return due_escrows()[:500]
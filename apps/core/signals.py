@@ -0,0 +1,41 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from apps.accounts.models import Skill
+from apps.gigs.models import Gig, GigCategory, GigImage
+from apps.projects.models import Project
+from apps.reviews.models import Review, ReviewResponse
+
+from .cache import GIGS, PROJECTS, REVIEWS, invalidate, forget_reference_data
+
+
+@receiver([post_save, post_delete], sender=Gig)
+@receiver([post_save, post_delete], sender=GigImage)
+@receiver(m2m_changed, sender=Gig.skills.through)
+def invalidate_gig_pages(sender, **kwargs):
+    invalidate(GIGS)
+
+
+@receiver([post_save, post_delete], sender=Project)
+@receiver(m2m_changed, sender=Project.skills_required.through)
+def invalidate_project_pages(sender, **kwargs):
+    invalidate(PROJECTS)
+
+
+@receiver([post_save, post_delete], sender=Review)
+@receiver([post_save, post_delete], sender=ReviewResponse)
+def invalidate_review_pages(sender, **kwargs):
+    # Gig pages show the latest reviews, their responses and the rating
+    invalidate(REVIEWS, GIGS)
+
+
+@receiver([post_save, post_delete], sender=GigCategory)
+def invalidate_categories(sender, **kwargs):
+    forget_reference_data('gig_categories')
+    invalidate(GIGS)
+
+
+@receiver([post_save, post_delete], sender=Skill)
+def invalidate_skills(sender, **kwargs):
+    forget_reference_data('skills')
+    invalidate(GIGS, PROJECTS)
@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+from apps.jobs import views as job_views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('cache/', views.cache_stats, name='cache_stats'),
+    path('jobs/', job_views.job_stats, name='job_stats'),
+]
@@ -0,0 +1,10 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from . import cache
+
+
+@staff_member_required
+def cache_stats(request):
+    """Cache hit/miss counters for monitoring"""
+    return JsonResponse(cache.stats())
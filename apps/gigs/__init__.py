@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.core.validators import MinValueValidator, MaxValueValidator
 from apps.accounts.models import Skill
 
@@ -62,20 +64,72 @@ class Gig(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Catalogue queries only ever look at active gigs
+            models.Index(fields=['category', 'basic_price'], condition=models.Q(is_active=True), name='gig_active_category_price'),
+            models.Index(fields=['basic_price', 'id'], condition=models.Q(is_active=True), name='gig_active_price'),
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(is_active=True), name='gig_active_recent'),
+            models.Index(fields=['-rating', '-orders_completed', '-id'], condition=models.Q(is_active=True), name='gig_active_rating'),
+        ]
     
     def __str__(self):
         return self.title
     
     def get_starting_price(self):
         return self.basic_price
+    
+    def main_image(self):
+        """Main image (else the first one), read from prefetched images when available"""
+        images = list(self.images.all())
+        return next((image for image in images if image.is_main), images[0] if images else None)
 
 class GigImage(models.Model):
     gig = models.ForeignKey(Gig, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='gig_images/')
     is_main = models.BooleanField(default=False)
     
+    # Filled in by apps/gigs/images.py after upload
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    renditions = models.JSONField(default=dict, blank=True, help_text="Storage paths by format, then width")
+    placeholder = models.CharField(max_length=64, blank=True, help_text="BlurHash shown while the image loads")
+    dominant_color = models.CharField(max_length=7, blank=True)
+    rendered_from = models.CharField(max_length=255, blank=True, help_text="File the renditions were made from")
+    processed_at = models.DateTimeField(null=True, blank=True)
+    
     def __str__(self):
         return f"{self.gig.title} - Image"
+    
+    @property
+    def is_processed(self):
+        return bool(self.renditions) and self.rendered_from == self.image.name
+    
+    def url_for(self, width, format='webp'):
+        """URL of the smallest rendition at least `width` wide (the largest if none is), else of the original"""
+        sizes = self.renditions.get(format) if self.is_processed else None
+        if not sizes:
+            return self.image.url
+        widths = sorted(int(size) for size in sizes)
+        chosen = next((size for size in widths if size >= width), widths[-1])
+        return default_storage.url(sizes[str(chosen)])
+    
+    def srcset(self, format='webp'):
+        """`srcset` attribute value for one rendition format"""
+        sizes = self.renditions.get(format) if self.is_processed else None
+        if not sizes:
+            return ''
+        return ', '.join(
+            f'{default_storage.url(sizes[size])} {size}w' for size in sorted(sizes, key=int)
+        )
+    
+    @property
+    def card_url(self):
+        """Small JPEG for list cards (JPEG so it works without a <picture> fallback)"""
+        return self.url_for(settings.GIG_IMAGE_CARD_WIDTH, 'jpeg')
+    
+    @property
+    def card_srcset(self):
+        return self.srcset('webp')
 
 class GigOrder(models.Model):
     STATUS_CHOICES = (
@@ -109,6 +163,12 @@ class GigOrder(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['buyer', '-created_at'], name='gigorder_buyer_recent'),
+            models.Index(fields=['gig', '-created_at'], name='gigorder_gig_recent'),
+        ]
+    
     def __str__(self):
         return f"Order #{self.id} - {self.gig.title}"
     
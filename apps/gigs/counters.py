@@ -0,0 +1,136 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.db.models import F, Case, When, Value
+
+from .models import Gig
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounterBuffer:
+    """Collects view increments in memory and writes them back in batches.
+
+    Every process keeps its own buffer and adds its deltas with F()
+    expressions, so counts stay correct however many workers run; the
+    worst case on a crash is losing at most one flush interval of views.
+    """
+
+    def __init__(self, model, field, flush_interval=None, max_pending=None, batch_size=500):
+        self.model = model
+        self.field = field
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._pid = None
+        self._flusher = None
+        # Called with {pk: count} after each successful write, e.g. to keep daily rollups
+        self.listeners = []
+
+    def get_flush_interval(self):
+        if self.flush_interval is not None:
+            return self.flush_interval
+        return getattr(settings, 'GIG_VIEW_FLUSH_INTERVAL', 30)
+
+    def get_max_pending(self):
+        if self.max_pending is not None:
+            return self.max_pending
+        return getattr(settings, 'GIG_VIEW_MAX_PENDING', 1000)
+
+    def record(self, pk, count=1):
+        """Count `count` views for object `pk`"""
+        with self._lock:
+            self._check_fork()
+            self._pending[pk] += count
+            full = len(self._pending) >= self.get_max_pending()
+
+        self._start_flusher()
+        if full:
+            self.flush()
+
+    def pending(self, pk):
+        """Views recorded for `pk` that have not been written yet"""
+        with self._lock:
+            return self._pending.get(pk, 0)
+
+    def flush(self):
+        """Write all buffered increments; returns the number of objects updated"""
+        with self._lock:
+            self._check_fork()
+            pending, self._pending = self._pending, Counter()
+
+        if not pending:
+            return 0
+
+        try:
+            self.write(pending)
+        except DatabaseError:
+            # Put the counts back so the next flush retries them
+            with self._lock:
+                self._pending.update(pending)
+            logger.exception('Failed to flush %s view counts', self.model.__name__)
+            return 0
+
+        for listener in self.listeners:
+            # The counts are already written, so a failing listener must not put them back
+            try:
+                listener(pending)
+            except DatabaseError:
+                logger.exception('View count listener %r failed', listener)
+        return len(pending)
+
+    def write(self, counts):
+        """One UPDATE per batch: field = field + CASE pk WHEN ... END"""
+        items = list(counts.items())
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            increment = Case(
+                *[When(pk=pk, then=Value(count)) for pk, count in batch],
+                default=Value(0)
+            )
+            self.model.objects.filter(pk__in=[pk for pk, count in batch]).update(
+                **{self.field: F(self.field) + increment}
+            )
+
+    def _check_fork(self):
+        # A forked worker inherits the parent's buffer; those views belong
+        # to the parent, so start clean instead of counting them twice.
+        pid = os.getpid()
+        if self._pid != pid:
+            if self._pid is not None:
+                self._pending = Counter()
+            self._pid = pid
+            self._flusher = None
+
+    def _start_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(
+                target=self._run_flusher,
+                name=f'{self.model.__name__.lower()}-{self.field}-flusher',
+                daemon=True
+            )
+            self._flusher.start()
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.get_flush_interval())
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+gig_view_counter = ViewCounterBuffer(Gig, 'views')
+atexit.register(gig_view_counter.flush)
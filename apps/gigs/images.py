@@ -0,0 +1,219 @@
+"""Responsive renditions for gig images.
+
+Every uploaded GigImage is re-encoded with Pillow as WebP and JPEG at the
+widths in GIG_IMAGE_WIDTHS (never upscaled). EXIF orientation is applied
+and all metadata (EXIF, GPS, ICC, comments) is left behind. A BlurHash
+string and the dominant colour are kept as placeholders, so cards can
+paint something before the image arrives. The original upload is kept
+to re-render from, but pages serve the renditions.
+
+Encoding is CPU-bound, so `render` runs in a process pool: a job queued
+on upload (see tasks.py) hands it to the pool of the job worker, and
+`manage.py process_gig_images` backfills existing images across all
+cores. Worker processes only read and write files; the database is
+updated by the parent with bulk_update.
+"""
+import logging
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+RENDITION_DIR = 'gig_images/renditions'
+FORMATS = {
+    'webp': ('WEBP', 'webp', {'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'optimize': True, 'progressive': True}),
+}
+PROCESSED_FIELDS = ['width', 'height', 'renditions', 'placeholder', 'dominant_color', 'rendered_from', 'processed_at']
+
+BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+
+def _base83(value, length):
+    return ''.join(BASE83[(value // 83 ** (length - n)) % 83] for n in range(1, length + 1))
+
+
+def _to_linear(values):
+    values = values / 255
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4)
+
+
+def _to_srgb(value):
+    value = min(max(value, 0), 1)
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def blurhash(image, components_x=4, components_y=3):
+    """BlurHash (https://blurha.sh) of a small RGB image"""
+    pixels = _to_linear(np.asarray(image, dtype=np.float64))
+    height, width = pixels.shape[:2]
+    xs = np.arange(width)
+    ys = np.arange(height)
+
+    factors = []
+    for j in range(components_y):
+        for i in range(components_x):
+            basis = np.outer(np.cos(math.pi * j * ys / height), np.cos(math.pi * i * xs / width))
+            scale = (1 if i == j == 0 else 2) / (width * height)
+            factors.append(scale * np.einsum('yx,yxc->c', basis, pixels))
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((components_x - 1) + (components_y - 1) * 9, 1)
+    if ac:
+        quantised_max = int(max(0, min(82, math.floor(max(float(np.abs(ac).max()) * 166 - 0.5, 0)))))
+        maximum = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        maximum = 1
+        result += _base83(0, 1)
+
+    result += _base83((_to_srgb(dc[0]) << 16) + (_to_srgb(dc[1]) << 8) + _to_srgb(dc[2]), 4)
+    for factor in ac:
+        def quantise(value):
+            signed = math.copysign(abs(value / maximum) ** 0.5, value)
+            return int(max(0, min(18, math.floor(signed * 9 + 9.5))))
+        result += _base83(quantise(factor[0]) * 19 * 19 + quantise(factor[1]) * 19 + quantise(factor[2]), 2)
+    return result
+
+
+def dominant_color(image, colors=8):
+    """Hex colour of the largest cluster in a small RGB image"""
+    paletted = image.quantize(colors=colors)
+    count, index = max(paletted.getcolors())
+    red, green, blue = paletted.getpalette()[index * 3:index * 3 + 3]
+    return f'#{red:02x}{green:02x}{blue:02x}'
+
+
+def _flatten(image):
+    """RGB copy without alpha (composited on white) and without metadata"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    # convert() builds a new image, so info (EXIF, ICC profile, comments) is not carried over
+    return image.convert('RGB')
+
+
+def render(name, image_id, widths, formats, quality):
+    """Write the renditions of one stored image; runs in a worker process.
+
+    Returns the values of PROCESSED_FIELDS except processed_at.
+    """
+    with default_storage.open(name) as source:
+        with Image.open(source) as original:
+            image = _flatten(ImageOps.exif_transpose(original))
+    width, height = image.size
+
+    renditions = {}
+    for format_name in formats:
+        pil_format, extension, options = FORMATS[format_name]
+        for target in sorted({min(target, width) for target in widths}):
+            resized = image if target == width else image.resize(
+                (target, max(1, round(height * target / width))), Image.LANCZOS
+            )
+            buffer = BytesIO()
+            resized.save(buffer, format=pil_format, quality=quality, **options)
+            path = f'{RENDITION_DIR}/{image_id}/{target}.{extension}'
+            # Renditions are rebuilt in place when the image is reprocessed
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            renditions.setdefault(format_name, {})[str(target)] = default_storage.save(path, ContentFile(buffer.getvalue()))
+
+    small = image.copy()
+    small.thumbnail((32, 32))
+    return {
+        'width': width,
+        'height': height,
+        'renditions': renditions,
+        'placeholder': blurhash(small),
+        'dominant_color': dominant_color(small),
+        'rendered_from': name,
+    }
+
+
+def _setup_worker():
+    import django
+    django.setup()
+
+
+def process_pool(workers=None):
+    """Process pool for render(); spawned, since job workers are multi-threaded and must not fork"""
+    return ProcessPoolExecutor(
+        max_workers=workers or settings.GIG_IMAGE_WORKERS or os.cpu_count(),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_setup_worker,
+    )
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def shared_pool():
+    """Per-process pool kept for the life of a job worker"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = process_pool()
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def pending_images():
+    """Images without renditions of their current file"""
+    from .models import GigImage
+    return GigImage.objects.exclude(image='').exclude(rendered_from=F('image'))
+
+
+def process_images(image_ids, executor=None):
+    """Render images in `executor` (default: the shared pool) and save the results; returns (processed, failed)"""
+    from apps.core.cache import GIGS, invalidate
+    from .models import GigImage
+
+    executor = executor or shared_pool()
+    widths = settings.GIG_IMAGE_WIDTHS
+    formats = settings.GIG_IMAGE_FORMATS
+    quality = settings.GIG_IMAGE_QUALITY
+
+    images = list(GigImage.objects.filter(pk__in=image_ids).exclude(image='').only('pk', 'image'))
+    futures = {
+        executor.submit(render, image.image.name, image.pk, widths, formats, quality): image
+        for image in images
+    }
+    processed = []
+    failed = 0
+    for future in as_completed(futures):
+        image = futures[future]
+        try:
+            values = future.result()
+        except Exception:
+            logger.exception('Could not render gig image %s (%s)', image.pk, image.image.name)
+            failed += 1
+            continue
+        for field, value in values.items():
+            setattr(image, field, value)
+        image.processed_at = timezone.now()
+        processed.append(image)
+
+    if processed:
+        GigImage.objects.bulk_update(processed, PROCESSED_FIELDS)
+        # bulk_update sends no signals; cached pages still point at the originals
+        invalidate(GIGS)
+    return len(processed), failed
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.gigs.images import pending_images, process_images, process_pool
+from apps.gigs.models import GigImage
+
+
+class Command(BaseCommand):
+    help = 'Render responsive renditions and placeholders for gig images that do not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Render processes (default: setting, else all cores)')
+        parser.add_argument('--batch-size', type=int, default=200, help='Images saved per bulk update')
+        parser.add_argument('--all', action='store_true', help='Re-render every image, not just pending ones')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many images')
+
+    def handle(self, *args, **options):
+        images = GigImage.objects.exclude(image='') if options['all'] else pending_images()
+        ids = list(images.order_by('pk').values_list('pk', flat=True)[:options['limit']])
+        batch_size = options['batch_size']
+
+        processed = failed = 0
+        started = time.perf_counter()
+        with process_pool(options['workers']) as pool:
+            for start in range(0, len(ids), batch_size):
+                done, errors = process_images(ids[start:start + batch_size], pool)
+                processed += done
+                failed += errors
+                self.stdout.write(f'{start + len(ids[start:start + batch_size])}/{len(ids)} images')
+        seconds = time.perf_counter() - started
+
+        self.stdout.write(
+            f'{processed} images rendered, {failed} failed in {seconds:.2f}s '
+            f'({processed / seconds if seconds else 0:.1f} images/sec)'
+        )
+        self.stdout.write(self.style.SUCCESS('Done.'))
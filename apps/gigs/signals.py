@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import GigImage
+from .tasks import process_gig_image
+
+
+@receiver(post_save, sender=GigImage)
+def queue_image_processing(sender, instance, raw=False, **kwargs):
+    # Only new or replaced files; saving the renditions themselves does not re-queue
+    if raw or not instance.image or instance.rendered_from == instance.image.name:
+        return
+    process_gig_image.enqueue(instance.pk)
@@ -0,0 +1,38 @@
+from django.core.mail import send_mail
+
+from apps.jobs.queue import task
+
+from .images import process_images
+from .models import GigOrder
+
+
+@task(queue='notifications')
+def notify_order_placed(order_id):
+    order = GigOrder.objects.select_related('gig__freelancer', 'buyer').get(pk=order_id)
+    if order.gig.freelancer.email:
+        send_mail(
+            f'New order #{order.pk}',
+            f'{order.buyer.username} ordered "{order.gig.title}" ({order.get_package_display()} package).',
+            None,
+            [order.gig.freelancer.email],
+        )
+
+
+@task(queue='notifications')
+def notify_order_delivered(order_id):
+    order = GigOrder.objects.select_related('gig__freelancer', 'buyer').get(pk=order_id)
+    if order.buyer.email:
+        send_mail(
+            f'Order #{order.pk} delivered',
+            f'{order.gig.freelancer.username} delivered your order "{order.gig.title}". Please review the delivery.',
+            None,
+            [order.buyer.email],
+        )
+
+
+@task(queue='images', max_attempts=3)
+def process_gig_image(image_id):
+    # Encoding runs in this worker's process pool, not on the job thread
+    processed, failed = process_images([image_id])
+    if failed:
+        raise RuntimeError(f'Could not render gig image {image_id}')
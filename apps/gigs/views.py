@@ -2,38 +2,59 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db.models import Q, Avg, Count
+from django.db import transaction
+from django.db.models import Avg, Prefetch
 from django.views.generic import ListView, DetailView, CreateView, UpdateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from django.utils import timezone
 from datetime import timedelta
-from .models import Gig, GigCategory, GigOrder, GigDelivery, GigFavorite
+from .models import Gig, GigImage, GigOrder, GigDelivery, GigFavorite
 from .forms import GigForm, GigOrderForm, GigDeliveryForm
+from .counters import gig_view_counter
+from .tasks import notify_order_placed, notify_order_delivered
+from apps.search.documents import search_queryset, search_ids
+from apps.search.facets import gig_facets, gig_selection, band_filter, GIG_PRICE_BANDS, DELIVERY_BANDS
+from apps.core.pagination import CursorPaginationMixin, paginate_by_cursor
+from apps.analytics.rollups import order_totals
+from apps.core.cache import CachedPageMixin, GIGS, gig_categories
 
-class GigListView(ListView):
+class GigListView(CachedPageMixin, CursorPaginationMixin, ListView):
     model = Gig
+    cache_namespace = GIGS
     template_name = 'gigs/gig_list.html'
     context_object_name = 'gigs'
     paginate_by = 12
     
     def get_queryset(self):
-        queryset = Gig.objects.filter(is_active=True).select_related('freelancer', 'category').prefetch_related('images')
-        
-        # Search functionality
-        search = self.request.GET.get('search')
-        if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) | 
-                Q(description__icontains=search) |
-                Q(skills__name__icontains=search)
-            ).distinct()
+        queryset = Gig.objects.filter(is_active=True).select_related('freelancer', 'category').prefetch_related(
+            # Cards only need the rendition data, not the original upload
+            Prefetch('images', queryset=GigImage.objects.only(
+                'id', 'gig_id', 'image', 'is_main', 'width', 'height', 'renditions',
+                'placeholder', 'dominant_color', 'rendered_from',
+            ))
+        )
         
         # Filter by category
         category = self.request.GET.get('category')
         if category:
             queryset = queryset.filter(category_id=category)
         
+        # Filter by skills (any of)
+        skills = self.request.GET.getlist('skills')
+        if skills:
+            queryset = queryset.filter(
+                pk__in=Gig.skills.through.objects.filter(skill_id__in=skills).values('gig_id')
+            )
+        
+        # Facet bands picked from the sidebar
+        price_bands = self.request.GET.getlist('price')
+        if price_bands:
+            queryset = queryset.filter(band_filter('basic_price', GIG_PRICE_BANDS, price_bands))
+        delivery_bands = self.request.GET.getlist('delivery')
+        if delivery_bands:
+            queryset = queryset.filter(band_filter('basic_delivery_time', DELIVERY_BANDS, delivery_bands))
+        
         # Filter by price range
         price_min = self.request.GET.get('price_min')
         price_max = self.request.GET.get('price_max')
@@ -47,14 +68,25 @@ class GigListView(ListView):
         if delivery_time:
             queryset = queryset.filter(basic_delivery_time__lte=delivery_time)
         
+        # Search functionality, after the filters so the result cap counts filtered hits
+        search = self.request.GET.get('search')
+        self.search_hits = None
+        if search:
+            queryset = search_queryset(queryset, search)
+            # Facet counts apply the selection themselves, so they take the unfiltered hits
+            self.search_hits = search_ids(Gig, search)
+        
         # Sorting
-        sort_by = self.request.GET.get('sort', 'newest')
-        if sort_by == 'price_low':
+        sort_by = self.request.GET.get('sort', 'relevance' if search else 'newest')
+        if sort_by == 'relevance' and search:
+            queryset = queryset.order_by('search_rank')
+        elif sort_by == 'price_low':
             queryset = queryset.order_by('basic_price')
         elif sort_by == 'price_high':
             queryset = queryset.order_by('-basic_price')
         elif sort_by == 'rating':
-            queryset = queryset.order_by('-rating')
+            # Gig.rating is kept in step with the review aggregates
+            queryset = queryset.order_by('-rating', '-orders_completed')
         elif sort_by == 'popular':
             queryset = queryset.order_by('-orders_completed')
         else:  # newest
@@ -64,22 +96,28 @@ class GigListView(ListView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['categories'] = GigCategory.objects.all()
+        context['categories'] = gig_categories()
         context['search_query'] = self.request.GET.get('search', '')
+        # Result counts for every filter value, from the in-memory facet bitmaps
+        context['facets'] = gig_facets.counts(gig_selection(self.request.GET), self.search_hits)
+        context['price_bands'] = GIG_PRICE_BANDS
+        context['delivery_bands'] = DELIVERY_BANDS
         return context
 
-class GigDetailView(DetailView):
+class GigDetailView(CachedPageMixin, DetailView):
     model = Gig
     template_name = 'gigs/gig_detail.html'
     context_object_name = 'gig'
+    cache_namespace = GIGS
+    
+    @staticmethod
+    def on_request(request, pk):
+        # Increment view count (buffered, written back in batches), also for cached pages
+        gig_view_counter.record(pk)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        gig = self.get_object()
-        
-        # Increment view count
-        gig.views += 1
-        gig.save(update_fields=['views'])
+        gig = self.object
         
         # Check if user has favorited this gig
         if self.request.user.is_authenticated:
@@ -88,8 +126,13 @@ class GigDetailView(DetailView):
             ).exists()
         
         # Get reviews for this gig
-        from apps.reviews.models import Review
-        context['reviews'] = Review.objects.filter(gig=gig).select_related('reviewer').order_by('-created_at')[:5]
+        from apps.reviews.models import Review, GigRating
+        context['reviews'] = Review.objects.filter(
+            gig_order__gig=gig, is_public=True
+        ).select_related('reviewer').order_by('-created_at')[:5]
+        rating = GigRating.objects.filter(gig=gig).first() or GigRating(gig=gig)
+        context['rating_stats'] = rating.as_stats()
+        context['rating_distribution'] = rating.distribution
         
         return context
 
@@ -105,9 +148,11 @@ class GigCreateView(LoginRequiredMixin, CreateView):
 
 @login_required
 def my_gigs(request):
-    gigs = Gig.objects.filter(freelancer=request.user).annotate(
-        total_orders=Count('orders')
-    ).order_by('-created_at')
+    gigs = list(Gig.objects.filter(freelancer=request.user).order_by('-created_at'))
+    # Lifetime order counts from the daily rollups rather than counting every order
+    totals = order_totals(request.user.pk)
+    for gig in gigs:
+        gig.total_orders = totals.get(gig.pk, 0)
     
     return render(request, 'gigs/my_gigs.html', {'gigs': gigs})
 
@@ -146,7 +191,9 @@ def order_gig(request, gig_id):
                 order.extra_price = gig.extra_fast_price or 0
                 order.delivery_date = timezone.now() + timedelta(days=1)
             
-            order.save()
+            with transaction.atomic():
+                order.save()
+                notify_order_placed.enqueue(order.pk)
             messages.success(request, 'Your order has been placed successfully!')
             return redirect('gigs:order_detail', order_id=order.id)
     else:
@@ -173,10 +220,16 @@ def toggle_favorite(request, gig_id):
 @login_required
 def my_orders(request):
     # Orders placed by user
-    bought_orders = GigOrder.objects.filter(buyer=request.user).select_related('gig').order_by('-created_at')
+    bought_orders = paginate_by_cursor(
+        request, GigOrder.objects.filter(buyer=request.user).select_related('gig').order_by('-created_at'),
+        20, param='bought',
+    )
     
-    # Orders for user's gigs
-    received_orders = GigOrder.objects.filter(gig__freelancer=request.user).select_related('gig', 'buyer').order_by('-created_at')
+    # Orders for user's gigs, each list paged by its own cursor
+    received_orders = paginate_by_cursor(
+        request, GigOrder.objects.filter(gig__freelancer=request.user).select_related('gig', 'buyer').order_by('-created_at'),
+        20, param='received',
+    )
     
     context = {
         'bought_orders': bought_orders,
@@ -206,13 +259,15 @@ def deliver_order(request, order_id):
     if request.method == 'POST':
         form = GigDeliveryForm(request.POST, request.FILES)
         if form.is_valid():
-            delivery = form.save(commit=False)
-            delivery.order = order
-            delivery.save()
-            
-            order.status = 'delivered'
-            order.actual_delivery_date = timezone.now()
-            order.save()
+            with transaction.atomic():
+                delivery = form.save(commit=False)
+                delivery.order = order
+                delivery.save()
+                
+                order.status = 'delivered'
+                order.actual_delivery_date = timezone.now()
+                order.save()
+                notify_order_delivered.enqueue(order.pk)
             
             messages.success(request, 'Order delivered successfully!')
             return redirect('gigs:order_detail', order_id=order_id)
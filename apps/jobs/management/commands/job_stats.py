@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.jobs.models import Job
+from apps.jobs.queue import queue_stats
+
+
+class Command(BaseCommand):
+    help = 'Show per-queue depth, throughput and latency; optionally prune finished jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, default=60, help='Window for throughput and latency')
+        parser.add_argument('--failed', action='store_true', help='List recently failed jobs')
+        parser.add_argument('--prune-days', type=int, default=None, help='Delete done jobs older than this')
+
+    def handle(self, *args, **options):
+        if options['prune_days'] is not None:
+            cutoff = timezone.now() - timedelta(days=options['prune_days'])
+            deleted, _ = Job.objects.filter(status='done', finished_at__lt=cutoff).delete()
+            self.stdout.write(f'Deleted {deleted} finished jobs')
+
+        def ms(value):
+            return '-' if value is None else f'{value:.0f}'
+
+        self.stdout.write(
+            f"{'queue':<16}{'ready':>7}{'queued':>8}{'running':>9}{'done':>7}{'failed':>8}{'/min':>8}"
+            f"{'wait p50':>10}{'wait p95':>10}{'run p50':>9}{'run p95':>9}"
+        )
+        for queue, stats in sorted(queue_stats(options['minutes']).items()):
+            self.stdout.write(
+                f"{queue:<16}{stats['ready']:>7}{stats['queued']:>8}{stats['running']:>9}"
+                f"{stats.get('done', 0):>7}{stats.get('failed', 0):>8}{stats.get('per_minute', 0):>8}"
+                f"{ms(stats.get('wait_p50_ms')):>10}{ms(stats.get('wait_p95_ms')):>10}"
+                f"{ms(stats.get('run_p50_ms')):>9}{ms(stats.get('run_p95_ms')):>9}"
+            )
+
+        if options['failed']:
+            for job in Job.objects.filter(status='failed').order_by('-finished_at')[:20]:
+                self.stdout.write(f'#{job.pk} {job.name} after {job.attempts} attempts: {job.last_error}')
@@ -0,0 +1,102 @@
+import multiprocessing
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from apps.jobs.queue import dequeue, heartbeat, requeue_stale, run_job, worker_name
+
+
+def work(queues, threads, poll_interval, burst):
+    """One worker process: `threads` loops claiming and running jobs until stopped"""
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    signal.signal(signal.SIGINT, lambda *args: stop.set())
+    names = set()
+
+    def loop():
+        name = worker_name()
+        names.add(name)
+        try:
+            while not stop.is_set():
+                close_old_connections()
+                jobs = dequeue(queues, name)
+                if not jobs:
+                    if burst:
+                        return
+                    stop.wait(poll_interval)
+                    continue
+                for job in jobs:
+                    run_job(job)
+        finally:
+            connections.close_all()
+
+    workers = [threading.Thread(target=loop, name=f'jobs-{n}') for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    # Joining with a timeout keeps the main thread responsive to signals
+    last_requeue = last_heartbeat = time.monotonic()
+    while any(worker.is_alive() for worker in workers):
+        for worker in workers:
+            worker.join(timeout=0.5)
+        # Long jobs stay ours as long as this process is alive
+        if time.monotonic() - last_heartbeat >= settings.JOB_HEARTBEAT_INTERVAL:
+            last_heartbeat = time.monotonic()
+            heartbeat(list(names))
+            close_old_connections()
+        # Jobs of a crashed worker stay 'running'; put them back once their heartbeat times out
+        if not burst and time.monotonic() - last_requeue >= 60:
+            last_requeue = time.monotonic()
+            requeue_stale()
+            close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the database queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queues', default='default,payments,notifications,images',
+                            help='Comma-separated queues to take jobs from')
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent jobs per process')
+        parser.add_argument('--poll-interval', type=float, default=None, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is ready')
+
+    def handle(self, *args, **options):
+        queues = [queue.strip() for queue in options['queues'].split(',') if queue.strip()]
+        poll_interval = options['poll_interval'] or settings.JOB_POLL_INTERVAL
+        job_args = (queues, options['threads'], poll_interval, options['burst'])
+
+        requeued, failed = requeue_stale()
+        if requeued or failed:
+            self.stdout.write(
+                f'Requeued {requeued} jobs left running by a dead worker, failed {failed} out of attempts'
+            )
+
+        self.stdout.write(
+            f"Running jobs from {', '.join(queues)} with {options['processes']} process(es) "
+            f"x {options['threads']} thread(s)"
+        )
+        if options['processes'] == 1:
+            work(*job_args)
+            return
+
+        # Children must not inherit the parent's database connections
+        connections.close_all()
+        processes = [multiprocessing.Process(target=work, args=job_args) for _ in range(options['processes'])]
+        for process in processes:
+            process.start()
+
+        def forward(signum, frame):
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+
+        signal.signal(signal.SIGTERM, forward)
+        signal.signal(signal.SIGINT, forward)
+        while any(process.is_alive() for process in processes):
+            for process in processes:
+                process.join(timeout=0.5)
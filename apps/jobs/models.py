@@ -0,0 +1,42 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """A unit of background work, stored until a worker has run it"""
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    queue = models.CharField(max_length=50, default='default')
+    name = models.CharField(max_length=200, help_text="Registered task name")
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(default=0, help_text="Higher runs first")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last time the running worker reported in")
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Dequeue: the next ready job of a queue, by priority
+            models.Index(
+                fields=['queue', '-priority', 'run_at', 'id'],
+                condition=models.Q(status='queued'), name='job_ready'
+            ),
+            models.Index(fields=['status', 'heartbeat_at'], name='job_status_heartbeat'),
+            models.Index(fields=['queue', 'status', 'finished_at'], name='job_queue_finished'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,197 @@
+"""Database-backed job queue.
+
+Jobs are rows in the Job table, so enqueueing inside a request's
+transaction means the job exists exactly when the request's changes do,
+and nothing is lost if a worker dies. Workers claim ready jobs with
+SELECT ... FOR UPDATE SKIP LOCKED, so any number of them can share a
+queue. Failed jobs are retried with exponential backoff until
+`max_attempts`, then kept as 'failed' for inspection. Worker processes
+refresh `heartbeat_at` on the jobs they are running, so only jobs whose
+worker went silent are taken back.
+"""
+import logging
+import os
+import random
+import socket
+import statistics
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+tasks = {}
+
+
+class Task:
+    """A function registered with @task; call .enqueue(*args, **kwargs) to run it in a worker"""
+
+    def __init__(self, func, name, queue, priority, max_attempts):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, *args, **kwargs):
+        return enqueue(self.name, args, kwargs, queue=self.queue, priority=self.priority, max_attempts=self.max_attempts)
+
+
+def task(name=None, queue='default', priority=0, max_attempts=5):
+    """Register a function as a job; arguments must be JSON-serialisable"""
+    def decorator(func):
+        registered = Task(func, name or f'{func.__module__}.{func.__name__}', queue, priority, max_attempts)
+        tasks[registered.name] = registered
+        return registered
+    return decorator
+
+
+def enqueue(name, args=(), kwargs=None, queue='default', priority=0, max_attempts=5, delay=None):
+    """Store a job; inside a transaction it only becomes visible to workers on commit"""
+    return Job.objects.create(
+        name=name,
+        args=list(args),
+        kwargs=kwargs or {},
+        queue=queue,
+        priority=priority,
+        max_attempts=max_attempts,
+        run_at=timezone.now() + (delay or timedelta()),
+    )
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+
+
+def dequeue(queues, worker, limit=1):
+    """Claim up to `limit` ready jobs for `worker`, highest priority first"""
+    now = timezone.now()
+    with transaction.atomic():
+        candidates = Job.objects.filter(status='queued', queue__in=queues, run_at__lte=now)
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        ids = list(candidates.order_by('-priority', 'run_at', 'id').values_list('pk', flat=True)[:limit])
+        if not ids:
+            return []
+        # The status condition keeps two workers from claiming the same job where SKIP LOCKED is unavailable
+        Job.objects.filter(pk__in=ids, status='queued').update(
+            status='running', locked_by=worker, started_at=now, heartbeat_at=now, attempts=F('attempts') + 1
+        )
+    return list(Job.objects.filter(pk__in=ids, status='running', locked_by=worker, started_at=now))
+
+
+def backoff(attempts):
+    """Seconds to wait before retry number `attempts`, with jitter"""
+    delay = min(settings.JOB_RETRY_BACKOFF * 2 ** (attempts - 1), settings.JOB_RETRY_BACKOFF_MAX)
+    return random.uniform(delay / 2, delay)
+
+
+def run_job(job):
+    """Run a claimed job and record the outcome; returns the new status"""
+    registered = tasks.get(job.name)
+    try:
+        if registered is None:
+            raise LookupError(f'No task registered as {job.name!r}')
+        registered.func(*job.args, **job.kwargs)
+    except Exception as exc:
+        logger.exception('Job %s (%s) failed on attempt %d', job.pk, job.name, job.attempts)
+        job.last_error = f'{type(exc).__name__}: {exc}'
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.finished_at = timezone.now()
+        else:
+            job.status = 'queued'
+            job.run_at = timezone.now() + timedelta(seconds=backoff(job.attempts))
+    else:
+        job.status = 'done'
+        job.finished_at = timezone.now()
+        job.last_error = ''
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+        status=job.status, run_at=job.run_at, finished_at=job.finished_at, last_error=job.last_error, locked_by=''
+    )
+    return job.status
+
+
+def heartbeat(workers):
+    """Mark the jobs the given workers are running as alive; returns how many"""
+    return Job.objects.filter(status='running', locked_by__in=workers).update(heartbeat_at=timezone.now())
+
+
+def requeue_stale(timeout=None):
+    """Put back jobs whose worker stopped reporting in mid-run; returns (requeued, failed).
+
+    A job that has used up its attempts (e.g. one that keeps killing its
+    worker) is marked 'failed' instead of being run again.
+    """
+    timeout = timeout or settings.JOB_TIMEOUT
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=timeout)
+    stale = Job.objects.filter(status='running').filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+    with transaction.atomic():
+        failed = stale.filter(attempts__gte=F('max_attempts')).update(
+            status='failed', locked_by='', last_error='Worker timed out', finished_at=now
+        )
+        requeued = stale.update(status='queued', locked_by='', last_error='Worker timed out', run_at=now)
+    return requeued, failed
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def queue_stats(minutes=60, sample=5000):
+    """Per-queue depth, throughput and latency over the last `minutes`.
+
+    Wait is from run_at to start (time spent queued), run is from start to
+    finish. Percentiles come from the most recent `sample` finished jobs.
+    """
+    now = timezone.now()
+    since = now - timedelta(minutes=minutes)
+    stats = {}
+
+    depth = Job.objects.filter(status__in=('queued', 'running')).values('queue').annotate(
+        queued=Count('pk', filter=Q(status='queued')),
+        ready=Count('pk', filter=Q(status='queued', run_at__lte=now)),
+        running=Count('pk', filter=Q(status='running')),
+    )
+    for row in depth:
+        stats[row['queue']] = {key: row[key] for key in ('queued', 'ready', 'running')}
+
+    recent = Job.objects.filter(status__in=('done', 'failed'), finished_at__gte=since).order_by('-finished_at')
+    finished = {}
+    for queue, status, run_at, started_at, finished_at in recent.values_list(
+        'queue', 'status', 'run_at', 'started_at', 'finished_at'
+    )[:sample]:
+        rows = finished.setdefault(queue, {'done': 0, 'failed': 0, 'wait': [], 'run': []})
+        rows[status] += 1
+        if started_at:
+            rows['wait'].append(max((started_at - run_at).total_seconds(), 0) * 1000)
+            rows['run'].append((finished_at - started_at).total_seconds() * 1000)
+
+    for queue, rows in finished.items():
+        entry = stats.setdefault(queue, {'queued': 0, 'ready': 0, 'running': 0})
+        entry.update({
+            'done': rows['done'],
+            'failed': rows['failed'],
+            'per_minute': round((rows['done'] + rows['failed']) / minutes, 2),
+            'wait_p50_ms': _percentile(rows['wait'], 0.5),
+            'wait_p95_ms': _percentile(rows['wait'], 0.95),
+            'run_p50_ms': _percentile(rows['run'], 0.5),
+            'run_p95_ms': _percentile(rows['run'], 0.95),
+            'run_mean_ms': statistics.mean(rows['run']) if rows['run'] else None,
+        })
+    return stats
@@ -0,0 +1,149 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.jobs.models import Job
+from apps.jobs.queue import dequeue, enqueue, heartbeat, requeue_stale, run_job, task
+
+calls = []
+
+
+@task(name='tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='tests.explode')
+def explode():
+    raise ValueError('boom')
+
+
+class DequeueTests(TestCase):
+    def test_claims_ready_jobs_by_priority(self):
+        low = enqueue('tests.record', [1], priority=0)
+        high = enqueue('tests.record', [2], priority=5)
+        enqueue('tests.record', [3], delay=timedelta(hours=1))
+        enqueue('tests.record', [4], queue='other')
+
+        first = dequeue(['default'], 'worker-a')
+        claimed = first + dequeue(['default'], 'worker-a', limit=5)
+
+        self.assertEqual([job.pk for job in first], [high.pk])
+        self.assertEqual({job.pk for job in claimed}, {high.pk, low.pk})
+        for job in claimed:
+            self.assertEqual(job.status, 'running')
+            self.assertEqual(job.locked_by, 'worker-a')
+            self.assertEqual(job.attempts, 1)
+            self.assertIsNotNone(job.heartbeat_at)
+
+    def test_claimed_job_is_not_handed_out_twice(self):
+        enqueue('tests.record', [1])
+
+        self.assertEqual(len(dequeue(['default'], 'worker-a')), 1)
+        self.assertEqual(dequeue(['default'], 'worker-b'), [])
+
+
+@override_settings(JOB_RETRY_BACKOFF=10, JOB_RETRY_BACKOFF_MAX=60)
+class RunJobTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_success_marks_job_done(self):
+        enqueue('tests.record', ['hello'])
+        job, = dequeue(['default'], 'worker-a')
+
+        self.assertEqual(run_job(job), 'done')
+
+        job.refresh_from_db()
+        self.assertEqual(calls, ['hello'])
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.locked_by, '')
+        self.assertIsNotNone(job.finished_at)
+
+    def test_failure_is_retried_with_backoff(self):
+        enqueue('tests.explode', max_attempts=3)
+        job, = dequeue(['default'], 'worker-a')
+        before = timezone.now()
+
+        self.assertEqual(run_job(job), 'queued')
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+        self.assertEqual(job.locked_by, '')
+        self.assertIn('ValueError: boom', job.last_error)
+        # First retry waits between half and all of JOB_RETRY_BACKOFF
+        self.assertGreaterEqual(job.run_at, before + timedelta(seconds=5))
+        self.assertLessEqual(job.run_at, timezone.now() + timedelta(seconds=10))
+
+    def test_failure_on_last_attempt_marks_job_failed(self):
+        enqueue('tests.explode', max_attempts=1)
+        job, = dequeue(['default'], 'worker-a')
+
+        self.assertEqual(run_job(job), 'failed')
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIsNotNone(job.finished_at)
+
+    def test_unknown_task_fails_like_any_error(self):
+        enqueue('tests.missing', max_attempts=1)
+        job, = dequeue(['default'], 'worker-a')
+
+        self.assertEqual(run_job(job), 'failed')
+        job.refresh_from_db()
+        self.assertIn('LookupError', job.last_error)
+
+
+@override_settings(JOB_TIMEOUT=60)
+class RequeueStaleTests(TestCase):
+    def claim(self, worker, max_attempts=5):
+        enqueue('tests.record', [1], max_attempts=max_attempts)
+        job, = dequeue(['default'], worker)
+        return job
+
+    def make_silent(self, job, seconds=120):
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=seconds))
+
+    def test_requeues_jobs_without_a_recent_heartbeat(self):
+        stale = self.claim('worker-a')
+        fresh = self.claim('worker-b')
+        self.make_silent(stale)
+
+        self.assertEqual(requeue_stale(), (1, 0))
+
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(stale.status, 'queued')
+        self.assertEqual(stale.locked_by, '')
+        self.assertEqual(stale.last_error, 'Worker timed out')
+        self.assertEqual(fresh.status, 'running')
+
+    def test_heartbeat_keeps_long_running_jobs(self):
+        job = self.claim('worker-a')
+        self.make_silent(job)
+
+        self.assertEqual(heartbeat(['worker-a']), 1)
+        self.assertEqual(requeue_stale(), (0, 0))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'running')
+
+    def test_job_out_of_attempts_is_failed_instead_of_requeued(self):
+        job = self.claim('worker-a', max_attempts=1)
+        self.make_silent(job)
+
+        self.assertEqual(requeue_stale(), (0, 1))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIsNotNone(job.finished_at)
+
+    def test_requeued_job_counts_the_lost_attempt(self):
+        job = self.claim('worker-a')
+        self.make_silent(job)
+        requeue_stale()
+
+        job, = dequeue(['default'], 'worker-b')
+
+        self.assertEqual(job.attempts, 2)
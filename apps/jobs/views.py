@@ -0,0 +1,14 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from .queue import queue_stats
+
+
+@staff_member_required
+def job_stats(request):
+    """Per-queue depth, throughput and latency for monitoring"""
+    try:
+        minutes = max(1, int(request.GET.get('minutes', 60)))
+    except ValueError:
+        minutes = 60
+    return JsonResponse(queue_stats(minutes))
@@ -23,7 +23,8 @@ class Conversation(models.Model):
         return self.messages.last()
     
     def get_unread_count(self, user):
-        return self.messages.filter(is_read=False).exclude(sender=user).count()
+        last_read_id = self.summaries.filter(user=user).values_list('last_read_message_id', flat=True).first() or 0
+        return self.messages.filter(id__gt=last_read_id).exclude(sender=user).count()
 
 class Message(models.Model):
     conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
@@ -35,6 +36,10 @@ class Message(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['conversation', 'id']),
+            models.Index(fields=['conversation', '-created_at', '-id'], name='message_conv_recent'),
+        ]
     
     def __str__(self):
         return f"{self.sender.username}: {self.content[:50]}..."
@@ -45,4 +50,26 @@ class MessageRead(models.Model):
     read_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
-        unique_together = ('message', 'user')
\ No newline at end of file
+        unique_together = ('message', 'user')
+
+class ConversationSummary(models.Model):
+    """Per-participant inbox row, kept up to date when messages are sent or read"""
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='summaries')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversation_summaries')
+    last_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_preview = models.CharField(max_length=255, blank=True)
+    last_message_sender = models.CharField(max_length=150, blank=True)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    unread_count = models.PositiveIntegerField(default=0)
+    # Read cursor: every message in the conversation with a higher id is unread for this user
+    last_read_message_id = models.PositiveBigIntegerField(default=0)
+    participant_names = models.CharField(max_length=500, blank=True)
+    
+    class Meta:
+        unique_together = ('conversation', 'user')
+        indexes = [
+            models.Index(fields=['user', '-last_message_at']),
+        ]
+    
+    def __str__(self):
+        return f"Conversation: {self.participant_names}"
\ No newline at end of file
@@ -0,0 +1,90 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.db import transaction
+
+from .models import Conversation, Message
+from .realtime import group_name
+from .summaries import mark_read
+
+
+class ConversationConsumer(AsyncJsonWebsocketConsumer):
+    """Pushes new messages, typing indicators and read receipts for one conversation"""
+
+    async def connect(self):
+        self.user = self.scope.get('user')
+        self.conversation_id = int(self.scope['url_route']['kwargs']['conversation_id'])
+        self.group_name = group_name(self.conversation_id)
+
+        if self.user is None or not self.user.is_authenticated or not await self.is_participant():
+            await self.close()
+            return
+
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        action = content.get('type')
+
+        if action == 'message':
+            text = (content.get('content') or '').strip()
+            if not text:
+                await self.send_json({'type': 'error', 'error': 'Message content is required.'})
+                return
+            # Saving the message broadcasts it to the group (see signals)
+            await self.create_message(text)
+
+        elif action == 'typing':
+            await self.channel_layer.group_send(self.group_name, {
+                'type': 'message.typing',
+                'user_id': self.user.id,
+                'username': self.user.username,
+                'is_typing': bool(content.get('is_typing', True)),
+            })
+
+        elif action == 'read':
+            await self.mark_read()
+
+    async def message_new(self, event):
+        await self.send_json({'type': 'message', 'message': event['message']})
+
+    async def message_typing(self, event):
+        if event['user_id'] != self.user.id:
+            await self.send_json({
+                'type': 'typing',
+                'user_id': event['user_id'],
+                'username': event['username'],
+                'is_typing': event['is_typing'],
+            })
+
+    async def message_read(self, event):
+        await self.send_json({
+            'type': 'read',
+            'user_id': event['user_id'],
+            'username': event['username'],
+            'last_read_message_id': event['last_read_message_id'],
+        })
+
+    @database_sync_to_async
+    def is_participant(self):
+        return Conversation.objects.filter(pk=self.conversation_id, participants=self.user).exists()
+
+    @database_sync_to_async
+    def create_message(self, text):
+        with transaction.atomic():
+            message = Message.objects.create(
+                conversation_id=self.conversation_id,
+                sender=self.user,
+                content=text
+            )
+            # Update conversation timestamp
+            Conversation.objects.get(pk=self.conversation_id).save()
+        return message
+
+    @database_sync_to_async
+    def mark_read(self):
+        conversation = Conversation.objects.get(pk=self.conversation_id)
+        mark_read(conversation, self.user)
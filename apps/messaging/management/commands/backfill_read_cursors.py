@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.messaging.models import Conversation
+from apps.messaging.summaries import rebuild_summaries, backfill_read_cursors
+
+
+class Command(BaseCommand):
+    help = 'Create missing conversation summaries and set read cursors from is_read/MessageRead'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        conversations = rebuild_summaries(Conversation.objects.filter(summaries__isnull=True).distinct())
+        self.stdout.write(f'Created summaries for {conversations} conversations')
+
+        cursors = backfill_read_cursors(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {cursors} read cursors.'))
@@ -0,0 +1,97 @@
+import asyncio
+import statistics
+import time
+import uuid
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from apps.messaging.models import Conversation
+from apps.messaging.realtime import group_name
+from apps.messaging.routing import websocket_urlpatterns
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Measure message fan-out latency to many concurrent conversation sockets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sockets', type=int, default=1000)
+        parser.add_argument('--messages', type=int, default=20)
+        parser.add_argument('--timeout', type=float, default=10.0)
+
+    def handle(self, *args, **options):
+        suffix = uuid.uuid4().hex[:8]
+        users = [
+            User.objects.create_user(username=f'fanout_{suffix}_{i}', password=None)
+            for i in range(2)
+        ]
+        conversation = Conversation.objects.create(subject='Fan-out benchmark')
+        conversation.participants.add(*users)
+
+        try:
+            latencies, connect_time = async_to_sync(self.run)(conversation, users[1], options)
+        finally:
+            conversation.delete()
+            for user in users:
+                user.delete()
+
+        if not latencies:
+            self.stdout.write(self.style.ERROR('No messages were delivered.'))
+            return
+
+        latencies.sort()
+        quantiles = statistics.quantiles(latencies, n=100)
+        expected = options['sockets'] * options['messages']
+        self.stdout.write(f"Layer:      {type(get_channel_layer()).__name__}")
+        self.stdout.write(f"Sockets:    {options['sockets']} (connected in {connect_time:.2f}s)")
+        self.stdout.write(f"Delivered:  {len(latencies)}/{expected}")
+        self.stdout.write(
+            f"Latency ms: p50={quantiles[49]:.2f} p95={quantiles[94]:.2f} "
+            f"p99={quantiles[98]:.2f} max={latencies[-1]:.2f}"
+        )
+
+    async def run(self, conversation, user, options):
+        application = URLRouter(websocket_urlpatterns)
+        path = f'/ws/messaging/{conversation.id}/'
+
+        start = time.perf_counter()
+        communicators = []
+        for _ in range(options['sockets']):
+            communicator = WebsocketCommunicator(application, path)
+            # Skip the session/auth middleware: every socket is the same participant
+            communicator.scope['user'] = user
+            communicators.append(communicator)
+        results = await asyncio.gather(*[c.connect() for c in communicators])
+        connected = [c for c, (ok, _) in zip(communicators, results) if ok]
+        connect_time = time.perf_counter() - start
+
+        channel_layer = get_channel_layer()
+        latencies = []
+        try:
+            for i in range(options['messages']):
+                sent_at = time.perf_counter()
+                await channel_layer.group_send(group_name(conversation.id), {
+                    'type': 'message.new',
+                    'message': {'id': i, 'content': 'benchmark', 'sent_at': sent_at},
+                })
+                received = await asyncio.gather(
+                    *[self.receive(c, options['timeout']) for c in connected]
+                )
+                latencies.extend((at - sent_at) * 1000 for at in received if at is not None)
+        finally:
+            await asyncio.gather(*[c.disconnect() for c in connected])
+
+        return latencies, connect_time
+
+    async def receive(self, communicator, timeout):
+        try:
+            await communicator.receive_json_from(timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        return time.perf_counter()
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.messaging.models import Conversation
+from apps.messaging.summaries import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-participant conversation summaries used by the inbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('conversation_ids', nargs='*', type=int)
+
+    def handle(self, *args, **options):
+        conversations = Conversation.objects.all()
+        if options['conversation_ids']:
+            conversations = conversations.filter(pk__in=options['conversation_ids'])
+
+        count = rebuild_summaries(conversations)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt summaries for {count} conversations.'))
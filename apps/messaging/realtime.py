@@ -0,0 +1,85 @@
+import base64
+from datetime import datetime
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db.models import Q
+
+HISTORY_PAGE_SIZE = 50
+
+
+def group_name(conversation_id):
+    return f'conversation_{conversation_id}'
+
+
+def serialize_message(message):
+    return {
+        'id': message.id,
+        'content': message.content,
+        'sender': message.sender.username,
+        'sender_id': message.sender_id,
+        'attachment': message.attachment.url if message.attachment else None,
+        'created_at': message.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'timestamp': message.created_at.isoformat(),
+    }
+
+
+def broadcast(conversation_id, event):
+    """Send an event to every socket connected to a conversation"""
+    channel_layer = get_channel_layer()
+    if channel_layer is not None:
+        async_to_sync(channel_layer.group_send)(group_name(conversation_id), event)
+
+
+def broadcast_message(message):
+    broadcast(message.conversation_id, {
+        'type': 'message.new',
+        'message': serialize_message(message),
+    })
+
+
+def broadcast_read(conversation_id, user, last_read_message_id):
+    broadcast(conversation_id, {
+        'type': 'message.read',
+        'user_id': user.id,
+        'username': user.username,
+        'last_read_message_id': last_read_message_id,
+    })
+
+
+def encode_cursor(message):
+    raw = f'{message.created_at.isoformat()}|{message.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (created_at, id) from an opaque cursor, or None if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, message_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(message_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def message_page(conversation, before=None, limit=HISTORY_PAGE_SIZE):
+    """Keyset page of messages older than `before`, oldest first.
+
+    Returns (messages, cursor) where cursor points at the next older page,
+    or is None when the start of the conversation has been reached.
+    """
+    messages = conversation.messages.select_related('sender')
+    if before is not None:
+        created_at, message_id = before
+        messages = messages.filter(
+            Q(created_at__lt=created_at) |
+            Q(created_at=created_at, id__lt=message_id)
+        )
+
+    page = list(messages.order_by('-created_at', '-id')[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+    page.reverse()
+
+    cursor = encode_cursor(page[0]) if has_more else None
+    return page, cursor
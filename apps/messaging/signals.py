@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_save, m2m_changed
+from django.dispatch import receiver
+
+from .models import Conversation, Message
+from .realtime import broadcast_message
+from .summaries import record_message, sync_participants
+
+
+@receiver(post_save, sender=Message)
+def update_summaries_on_message(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_message(instance)
+        transaction.on_commit(lambda: broadcast_message(instance))
+
+
+@receiver(m2m_changed, sender=Conversation.participants.through)
+def update_summaries_on_participants(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if reverse:
+        # instance is a user; resync every conversation they were added to/removed from
+        for conversation in Conversation.objects.filter(pk__in=kwargs.get('pk_set') or []):
+            sync_participants(conversation)
+    else:
+        sync_participants(instance)
@@ -0,0 +1,165 @@
+from django.db import transaction
+from django.db.models import F, Q, Count, Exists, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Conversation, ConversationSummary, Message, MessageRead
+from .realtime import broadcast_read
+
+PREVIEW_LENGTH = 255
+
+
+def participant_names(conversation):
+    return ", ".join(user.username for user in conversation.participants.order_by('username'))
+
+
+def message_fields(message):
+    """Summary columns describing the latest message"""
+    if message is None:
+        return {
+            'last_message': None,
+            'last_message_preview': '',
+            'last_message_sender': '',
+            'last_message_at': None,
+        }
+    return {
+        'last_message': message,
+        'last_message_preview': message.content[:PREVIEW_LENGTH],
+        'last_message_sender': message.sender.username,
+        'last_message_at': message.created_at,
+    }
+
+
+def sync_participants(conversation):
+    """Create/remove summary rows to match the participants and refresh their names"""
+    with transaction.atomic():
+        participant_ids = set(conversation.participants.values_list('id', flat=True))
+        names = participant_names(conversation)
+
+        summaries = ConversationSummary.objects.filter(conversation=conversation)
+        summaries.exclude(user_id__in=participant_ids).delete()
+
+        existing = set(summaries.values_list('user_id', flat=True))
+        missing = participant_ids - existing
+        if missing:
+            last_message = conversation.messages.select_related('sender').order_by('-created_at', '-id').first()
+            fields = message_fields(last_message)
+            ConversationSummary.objects.bulk_create([
+                ConversationSummary(
+                    conversation=conversation,
+                    user_id=user_id,
+                    participant_names=names,
+                    unread_count=conversation.messages.exclude(sender_id=user_id).count(),
+                    **fields
+                )
+                for user_id in missing
+            ], ignore_conflicts=True)
+
+        summaries.update(participant_names=names)
+
+
+def record_message(message):
+    """Point every participant's summary at a new message and bump the others' unread counts"""
+    with transaction.atomic():
+        summaries = ConversationSummary.objects.filter(conversation_id=message.conversation_id)
+        # Sends can commit out of order; an older message never replaces a newer preview
+        summaries.filter(
+            Q(last_message_id__isnull=True) | Q(last_message_id__lt=message.id)
+        ).update(**message_fields(message))
+        summaries.exclude(user_id=message.sender_id).update(unread_count=F('unread_count') + 1)
+        # Senders have read their own message; the cursor only moves forward
+        summaries.filter(
+            user_id=message.sender_id, last_read_message_id__lt=message.id
+        ).update(last_read_message_id=message.id)
+
+
+def mark_read(conversation, user):
+    """Move a participant's read cursor to the latest message: a single UPDATE"""
+    summaries = ConversationSummary.objects.filter(conversation=conversation, user=user)
+    updated = summaries.filter(
+        last_message__isnull=False
+    ).exclude(
+        last_read_message_id=F('last_message_id')
+    ).update(last_read_message_id=F('last_message_id'), unread_count=0)
+
+    # Let the other participants' sockets show the read receipt
+    if updated:
+        last_read_id = summaries.values_list('last_read_message_id', flat=True).first()
+        transaction.on_commit(lambda: broadcast_read(conversation.id, user, last_read_id))
+    return updated
+
+
+def refresh_unread_counts(summaries):
+    """Recompute unread counts from the read cursors in one UPDATE"""
+    unread = Message.objects.filter(
+        conversation=OuterRef('conversation'),
+        id__gt=OuterRef('last_read_message_id')
+    ).exclude(
+        sender=OuterRef('user')
+    ).order_by().values('conversation').annotate(count=Count('id')).values('count')
+    return summaries.update(unread_count=Coalesce(Subquery(unread), Value(0)))
+
+
+def backfill_read_cursors(summaries=None, batch_size=1000):
+    """Derive read cursors from the legacy is_read flags and MessageRead rows.
+
+    A participant's cursor is placed just before the first message from
+    someone else that is neither flagged is_read nor has a MessageRead row
+    for them; with no such message it sits on the conversation's last one.
+    """
+    if summaries is None:
+        # Only rows whose cursor was never set, so re-running is harmless
+        summaries = ConversationSummary.objects.filter(last_read_message_id=0)
+
+    read_receipt = MessageRead.objects.filter(message=OuterRef('pk'), user=OuterRef(OuterRef('user')))
+    first_unread = Message.objects.filter(
+        conversation=OuterRef('conversation'), is_read=False
+    ).exclude(
+        sender=OuterRef('user')
+    ).filter(
+        ~Exists(read_receipt)
+    ).order_by('id').values('id')[:1]
+    last_message = Message.objects.filter(conversation=OuterRef('conversation')).order_by('-id').values('id')[:1]
+
+    rows = summaries.annotate(
+        first_unread_id=Subquery(first_unread),
+        last_id=Subquery(last_message),
+    ).only('id', 'last_read_message_id')
+
+    batch = []
+    updated = 0
+    for summary in list(rows):
+        if summary.first_unread_id is not None:
+            summary.last_read_message_id = summary.first_unread_id - 1
+        else:
+            summary.last_read_message_id = summary.last_id or 0
+        batch.append(summary)
+        if len(batch) >= batch_size:
+            updated += _save_cursors(batch)
+            batch = []
+    if batch:
+        updated += _save_cursors(batch)
+    return updated
+
+
+def _save_cursors(summaries):
+    with transaction.atomic():
+        count = ConversationSummary.objects.bulk_update(summaries, ['last_read_message_id'])
+        refresh_unread_counts(ConversationSummary.objects.filter(pk__in=[summary.pk for summary in summaries]))
+    return count
+
+
+def rebuild_summaries(conversations=None):
+    """Recompute summaries, keeping read cursors; returns the number of conversations processed"""
+    if conversations is None:
+        conversations = Conversation.objects.all()
+
+    processed = 0
+    for conversation in conversations.iterator(chunk_size=500):
+        with transaction.atomic():
+            sync_participants(conversation)
+            last_message = conversation.messages.select_related('sender').order_by('-created_at', '-id').first()
+            summaries = ConversationSummary.objects.filter(conversation=conversation)
+            summaries.update(**message_fields(last_message))
+            refresh_unread_counts(summaries)
+        processed += 1
+    return processed
@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase, override_settings
+
+from apps.messaging.models import Conversation, Message
+from apps.messaging.views import inbox
+
+User = get_user_model()
+
+# The inbox template reads every summary column a row shows
+INBOX_TEMPLATE = (
+    '{% for summary in summaries %}'
+    '{{ summary.conversation_id }} {{ summary.participant_names }} {{ summary.last_message_sender }} '
+    '{{ summary.last_message_preview }} {{ summary.last_message_at }} {{ summary.unread_count }}\n'
+    '{% endfor %}'
+)
+
+
+@override_settings(TEMPLATES=[{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'OPTIONS': {
+        'loaders': [('django.template.loaders.locmem.Loader', {'messaging/inbox.html': INBOX_TEMPLATE})],
+    },
+}])
+class InboxQueryCountTests(TestCase):
+    CONVERSATIONS = 500
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='inbox_owner', password=None)
+        others = [User.objects.create_user(username=f'inbox_peer_{i}', password=None) for i in range(5)]
+        for i in range(cls.CONVERSATIONS):
+            other = others[i % len(others)]
+            conversation = Conversation.objects.create(subject=f'Conversation {i}')
+            conversation.participants.add(cls.user, other)
+            Message.objects.create(conversation=conversation, sender=other, content=f'Hello {i}')
+            if i % 2:
+                Message.objects.create(conversation=conversation, sender=cls.user, content=f'Reply {i}')
+
+    def get_inbox(self):
+        request = RequestFactory().get('/messages/')
+        request.user = self.user
+        return inbox(request)
+
+    def test_inbox_is_one_query_at_500_conversations(self):
+        with self.assertNumQueries(1):
+            response = self.get_inbox()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.decode().count('\n'), self.CONVERSATIONS)
+
+    def test_inbox_rows_come_from_summaries(self):
+        rows = self.get_inbox().content.decode().splitlines()
+        latest = Conversation.objects.order_by('-id')[:2]
+        # Most recent message first, previews and senders read from the summary row
+        self.assertTrue(rows[0].startswith(f'{latest[0].pk} '))
+        self.assertIn('inbox_owner Reply 499', rows[0])
+        self.assertTrue(rows[1].startswith(f'{latest[1].pk} '))
+        self.assertIn('Hello 498', rows[1])
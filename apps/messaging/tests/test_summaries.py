@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from apps.messaging.models import Conversation, ConversationSummary, Message
+from apps.messaging.summaries import record_message
+
+User = get_user_model()
+
+
+class RecordMessageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sender = User.objects.create_user(username='summary_sender', password=None)
+        cls.reader = User.objects.create_user(username='summary_reader', password=None)
+        cls.conversation = Conversation.objects.create(subject='Ordering')
+        cls.conversation.participants.add(cls.sender, cls.reader)
+
+    def test_older_message_recorded_late_does_not_move_summaries_back(self):
+        older = Message.objects.create(conversation=self.conversation, sender=self.sender, content='First')
+        newer = Message.objects.create(conversation=self.conversation, sender=self.sender, content='Second')
+
+        # The older send's transaction commits last
+        record_message(older)
+
+        for summary in ConversationSummary.objects.filter(conversation=self.conversation):
+            self.assertEqual(summary.last_message_id, newer.pk)
+            self.assertEqual(summary.last_message_preview, 'Second')
+        sender_summary = ConversationSummary.objects.get(conversation=self.conversation, user=self.sender)
+        self.assertEqual(sender_summary.last_read_message_id, newer.pk)
@@ -10,4 +10,5 @@ urlpatterns = [
     path('project/<int:project_id>/', views.project_conversation, name='project_conversation'),
     path('gig/<int:order_id>/', views.gig_conversation, name='gig_conversation'),
     path('send/<int:conversation_id>/', views.send_message_ajax, name='send_message_ajax'),
+    path('history/<int:conversation_id>/', views.message_history, name='message_history'),
 ]
\ No newline at end of file
@@ -3,19 +3,22 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
-from django.db.models import Q, Max
-from .models import Conversation, Message
+from django.db import transaction
+from django.db.models import Q, F
+from .models import Conversation, Message, ConversationSummary
 from .forms import MessageForm
+from .summaries import mark_read
+from .realtime import message_page, decode_cursor, serialize_message, HISTORY_PAGE_SIZE
 
 @login_required
 def inbox(request):
-    conversations = Conversation.objects.filter(
-        participants=request.user
-    ).annotate(
-        last_message_time=Max('messages__created_at')
-    ).order_by('-last_message_time')
+    # One row per conversation with the last message, unread count and
+    # participant names already denormalized
+    summaries = ConversationSummary.objects.filter(
+        user=request.user
+    ).order_by(F('last_message_at').desc(nulls_last=True), '-conversation_id')
     
-    return render(request, 'messaging/inbox.html', {'conversations': conversations})
+    return render(request, 'messaging/inbox.html', {'summaries': summaries})
 
 @login_required
 def conversation_detail(request, conversation_id):
@@ -26,10 +29,7 @@ def conversation_detail(request, conversation_id):
     )
     
     # Mark messages as read
-    unread_messages = conversation.messages.filter(is_read=False).exclude(sender=request.user)
-    for message in unread_messages:
-        message.is_read = True
-        message.save()
+    mark_read(conversation, request.user)
     
     if request.method == 'POST':
         form = MessageForm(request.POST, request.FILES)
@@ -37,20 +37,24 @@ def conversation_detail(request, conversation_id):
             message = form.save(commit=False)
             message.conversation = conversation
             message.sender = request.user
-            message.save()
             
-            # Update conversation timestamp
-            conversation.save()
+            with transaction.atomic():
+                message.save()
+                
+                # Update conversation timestamp
+                conversation.save()
             
             return redirect('messaging:conversation_detail', conversation_id=conversation_id)
     else:
         form = MessageForm()
     
-    messages_list = conversation.messages.select_related('sender').order_by('created_at')
+    # Latest page only; older messages are loaded through message_history
+    messages_list, history_cursor = message_page(conversation)
     
     context = {
         'conversation': conversation,
         'messages': messages_list,
+        'history_cursor': history_cursor,
         'form': form,
     }
     return render(request, 'messaging/conversation_detail.html', context)
@@ -143,14 +147,15 @@ def send_message_ajax(request, conversation_id):
     if not content:
         return JsonResponse({'success': False, 'error': 'Message content is required.'})
     
-    message = Message.objects.create(
-        conversation=conversation,
-        sender=request.user,
-        content=content
-    )
-    
-    # Update conversation timestamp
-    conversation.save()
+    with transaction.atomic():
+        message = Message.objects.create(
+            conversation=conversation,
+            sender=request.user,
+            content=content
+        )
+        
+        # Update conversation timestamp
+        conversation.save()
     
     return JsonResponse({
         'success': True,
@@ -160,4 +165,33 @@ def send_message_ajax(request, conversation_id):
             'sender': message.sender.username,
             'created_at': message.created_at.strftime('%Y-%m-%d %H:%M:%S')
         }
+    })
+
+@login_required
+def message_history(request, conversation_id):
+    """Keyset-paginated message history, newest page first"""
+    conversation = get_object_or_404(
+        Conversation, 
+        id=conversation_id, 
+        participants=request.user
+    )
+    
+    before = None
+    cursor = request.GET.get('before')
+    if cursor:
+        before = decode_cursor(cursor)
+        if before is None:
+            return JsonResponse({'success': False, 'error': 'Invalid cursor.'}, status=400)
+    
+    try:
+        limit = min(max(int(request.GET.get('limit', HISTORY_PAGE_SIZE)), 1), 200)
+    except ValueError:
+        limit = HISTORY_PAGE_SIZE
+    
+    messages_list, next_cursor = message_page(conversation, before=before, limit=limit)
+    
+    return JsonResponse({
+        'success': True,
+        'messages': [serialize_message(message) for message in messages_list],
+        'next_cursor': next_cursor,
     })
\ No newline at end of file
@@ -1,7 +1,8 @@
 # The file /work-nigeria/work-nigeria/apps/payments/__init__.py is intentionally left blank.
 
 from django.contrib.auth import get_user_model
-from decimal import Decimal
+from django.db import transaction as db_transaction
+import uuid
 
 User = get_user_model()
 
@@ -60,6 +61,9 @@ class Transaction(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='transaction_user_recent'),
+        ]
     
     def __str__(self):
         return f"{self.reference} - {self.user.username} - ₦{self.amount}"
@@ -76,45 +80,88 @@ class Wallet(models.Model):
     def __str__(self):
         return f"{self.user.username} - ₦{self.balance}"
     
+    # Balances only change through the ledger (see apps/payments/ledger.py)
+    BALANCE_FIELDS = ['balance', 'pending_balance', 'total_earned', 'total_withdrawn', 'updated_at']
+    
     def add_funds(self, amount, description=""):
         """Add funds to available balance"""
-        self.balance += Decimal(str(amount))
-        self.total_earned += Decimal(str(amount))
-        self.save()
+        from .ledger import add_funds
         
-        # Create transaction record
-        Transaction.objects.create(
-            reference=f"ADD_{self.user.id}_{int(timezone.now().timestamp())}",
-            user=self.user,
-            transaction_type='payment',
-            amount=amount,
-            status='completed',
-            description=description
-        )
-    
-    def add_pending_funds(self, amount):
+        with db_transaction.atomic():
+            # Create transaction record
+            record = Transaction.objects.create(
+                reference=f"ADD_{self.user.id}_{uuid.uuid4().hex[:12]}",
+                user=self.user,
+                transaction_type='payment',
+                amount=amount,
+                status='completed',
+                description=description
+            )
+            add_funds(self, amount, description, record)
+        self.refresh_from_db(fields=self.BALANCE_FIELDS)
+    
+    def add_pending_funds(self, amount, transaction_obj=None):
         """Add funds to pending balance (escrow)"""
-        self.pending_balance += Decimal(str(amount))
-        self.save()
+        from .ledger import add_pending_funds
+        
+        add_pending_funds(self, amount, 'Escrow funded', transaction_obj)
+        self.refresh_from_db(fields=self.BALANCE_FIELDS)
     
-    def release_pending_funds(self, amount):
+    def release_pending_funds(self, amount, transaction_obj=None):
         """Move funds from pending to available balance"""
-        if self.pending_balance >= amount:
-            self.pending_balance -= Decimal(str(amount))
-            self.balance += Decimal(str(amount))
-            self.total_earned += Decimal(str(amount))
-            self.save()
-            return True
-        return False
+        from .ledger import release_pending_funds, InsufficientFunds
+        
+        try:
+            release_pending_funds(self, amount, 'Escrow released', transaction_obj)
+        except InsufficientFunds:
+            return False
+        finally:
+            self.refresh_from_db(fields=self.BALANCE_FIELDS)
+        return True
     
-    def withdraw_funds(self, amount):
+    def withdraw_funds(self, amount, transaction_obj=None):
         """Withdraw funds from available balance"""
-        if self.balance >= amount:
-            self.balance -= Decimal(str(amount))
-            self.total_withdrawn += Decimal(str(amount))
-            self.save()
-            return True
-        return False
+        from .ledger import withdraw_funds, InsufficientFunds
+        
+        try:
+            withdraw_funds(self, amount, 'Withdrawal', transaction_obj)
+        except InsufficientFunds:
+            return False
+        finally:
+            self.refresh_from_db(fields=self.BALANCE_FIELDS)
+        return True
+
+class LedgerEntry(models.Model):
+    """One side of a balanced journal posting; never updated or deleted"""
+    ENTRY_TYPES = (
+        ('debit', 'Debit'),
+        ('credit', 'Credit'),
+    )
+    
+    ACCOUNT_CHOICES = (
+        ('available', 'Wallet available balance'),
+        ('pending', 'Wallet pending balance'),
+        ('clearing', 'Platform clearing'),
+        ('payouts', 'Platform payouts'),
+    )
+    
+    journal = models.UUIDField(db_index=True)
+    wallet = models.ForeignKey(Wallet, on_delete=models.PROTECT, null=True, blank=True, related_name='ledger_entries')
+    account = models.CharField(max_length=20, choices=ACCOUNT_CHOICES)
+    entry_type = models.CharField(max_length=6, choices=ENTRY_TYPES)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    transaction = models.ForeignKey(Transaction, on_delete=models.SET_NULL, null=True, blank=True, related_name='ledger_entries')
+    description = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['wallet', 'account']),
+        ]
+    
+    def __str__(self):
+        return f"{self.entry_type} {self.account} ₦{self.amount}"
 
 class WithdrawalRequest(models.Model):
     STATUS_CHOICES = (
@@ -144,6 +191,10 @@ class WithdrawalRequest(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='withdrawal_user_created'),
+            models.Index(fields=['status', 'method', 'created_at'], name='withdrawal_status_method'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - ₦{self.amount} ({self.status})"
@@ -171,6 +222,12 @@ class EscrowPayment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     released_at = models.DateTimeField(null=True, blank=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['auto_release_date'], condition=models.Q(status='held'), name='escrow_held_release_date'),
+            models.Index(fields=['payee', 'created_at', 'id'], name='escrow_payee_created'),
+        ]
+    
     def __str__(self):
         return f"Escrow: ₦{self.amount} ({self.status})"
     
@@ -180,24 +237,64 @@ class EscrowPayment(models.Model):
             # Calculate amount after commission
             freelancer_amount = self.amount - self.commission
             
-            # Add to freelancer's wallet
-            wallet, created = Wallet.objects.get_or_create(user=self.payee)
-            wallet.release_pending_funds(freelancer_amount)
-            
-            # Update status
-            self.status = 'released'
-            self.released_at = timezone.now()
-            self.save()
-            
-            # Create commission transaction
-            Transaction.objects.create(
-                reference=f"COMM_{self.id}_{int(timezone.now().timestamp())}",
-                user=self.payee,
-                transaction_type='commission',
-                amount=-self.commission,
-                status='completed',
-                description=f"Platform commission for escrow payment #{self.id}"
-            )
+            with db_transaction.atomic():
+                # Claim the escrow first so concurrent releases cannot pay out twice
+                released_at = timezone.now()
+                claimed = EscrowPayment.objects.filter(pk=self.pk, status='held').update(
+                    status='released', released_at=released_at
+                )
+                if not claimed:
+                    return False
+                
+                # Add to freelancer's wallet
+                wallet, created = Wallet.objects.get_or_create(user=self.payee)
+                if not wallet.release_pending_funds(freelancer_amount, self.transaction):
+                    db_transaction.set_rollback(True)
+                    return False
+                
+                # Update status
+                self.status = 'released'
+                self.released_at = released_at
+                
+                # Create commission transaction
+                Transaction.objects.create(
+                    reference=f"COMM_{self.id}_{int(timezone.now().timestamp())}",
+                    user=self.payee,
+                    transaction_type='commission',
+                    amount=-self.commission,
+                    status='completed',
+                    description=f"Platform commission for escrow payment #{self.id}"
+                )
             
             return True
-        return False
\ No newline at end of file
+        return False
+
+class WebhookEvent(models.Model):
+    """A signed provider notification, stored before it is processed"""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('ignored', 'Ignored'),
+        ('failed', 'Failed'),
+    )
+    
+    provider = models.CharField(max_length=20, choices=PaymentMethod.PROVIDER_CHOICES)
+    event_id = models.CharField(max_length=200, help_text="Provider's unique id for this notification")
+    event_type = models.CharField(max_length=100)
+    reference = models.CharField(max_length=100, blank=True, db_index=True)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        unique_together = ('provider', 'event_id')
+        ordering = ['-received_at']
+        indexes = [
+            models.Index(fields=['status', 'received_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.provider} {self.event_type} ({self.reference})"
\ No newline at end of file
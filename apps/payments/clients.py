@@ -0,0 +1,396 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from collections import defaultdict, deque
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+
+class ProviderError(Exception):
+    """A payment provider call failed after all retries"""
+
+    def __init__(self, provider, message, status_code=None):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.status_code = status_code
+
+
+class CircuitOpenError(ProviderError):
+    """The provider is failing and calls are being short-circuited"""
+
+
+class CircuitBreaker:
+    """Stops calling a provider after repeated failures, then lets a probe through"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probing:
+                return False
+            # Half-open: let a single call through to test the provider
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class ProviderMetrics:
+    """In-process call counters and recent latencies per provider endpoint"""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._calls = defaultdict(lambda: defaultdict(int))
+        self._latencies = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, provider, method, endpoint, outcome, latency_ms, attempt, status_code=None):
+        key = (provider, method, endpoint)
+        with self._lock:
+            self._calls[key][outcome] += 1
+            self._latencies[key].append(latency_ms)
+
+        logger.info(
+            'provider_call provider=%s method=%s endpoint=%s outcome=%s status=%s attempt=%d latency_ms=%.1f',
+            provider, method, endpoint, outcome, status_code, attempt, latency_ms,
+            extra={
+                'provider': provider,
+                'method': method,
+                'endpoint': endpoint,
+                'outcome': outcome,
+                'status_code': status_code,
+                'attempt': attempt,
+                'latency_ms': latency_ms,
+            }
+        )
+
+    def snapshot(self):
+        """Counts and p50/p95/max latency (ms) for every endpoint seen so far"""
+        with self._lock:
+            result = {}
+            for key, calls in self._calls.items():
+                latencies = sorted(self._latencies[key])
+                result['%s %s %s' % key] = {
+                    'calls': dict(calls),
+                    'p50_ms': latencies[len(latencies) // 2] if latencies else None,
+                    'p95_ms': latencies[int(len(latencies) * 0.95) - 1] if latencies else None,
+                    'max_ms': latencies[-1] if latencies else None,
+                }
+            return result
+
+
+provider_metrics = ProviderMetrics()
+
+
+class ProviderClient:
+    """Keep-alive HTTP session for one payment provider.
+
+    Every call is bounded by connect/read timeouts. Idempotent calls are
+    retried with jittered exponential backoff; POSTs are only retried when
+    the connection could not be opened, so a request is never sent twice.
+    """
+
+    def __init__(self, name, base_url, secret_key, timeout=(3.05, 15), retries=2,
+                 backoff=0.5, pool_size=10, breaker=None):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Authorization': f'Bearer {secret_key}',
+            'Content-Type': 'application/json',
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def request(self, method, path, idempotent=None, **kwargs):
+        """Send a request and return the decoded JSON body"""
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        kwargs.setdefault('timeout', self.timeout)
+        url = f'{self.base_url}{path}'
+        endpoint = path.split('?')[0]
+
+        if not self.breaker.allow():
+            provider_metrics.record(self.name, method, endpoint, 'short_circuit', 0, 0)
+            raise CircuitOpenError(self.name, 'circuit open')
+
+        attempt = 0
+        while True:
+            attempt += 1
+            start = time.perf_counter()
+            status_code = None
+            try:
+                response = self.session.request(method, url, **kwargs)
+                status_code = response.status_code
+                if status_code >= 500 or status_code == 429:
+                    raise ProviderError(self.name, f'HTTP {status_code}', status_code)
+                data = response.json()
+            except (ProviderError, requests.RequestException, ValueError) as exc:
+                latency_ms = (time.perf_counter() - start) * 1000
+                provider_metrics.record(self.name, method, endpoint, 'error', latency_ms, attempt, status_code)
+
+                if isinstance(exc, ProviderError):
+                    error = exc
+                    retryable = idempotent
+                elif isinstance(exc, ValueError):
+                    error = ProviderError(self.name, 'invalid JSON response', status_code)
+                    retryable = False
+                else:
+                    error = ProviderError(self.name, str(exc), status_code)
+                    # Nothing reached the provider if the connection never opened
+                    retryable = idempotent or isinstance(exc, requests.ConnectTimeout)
+
+                if not retryable or attempt > self.retries:
+                    self.breaker.record_failure()
+                    if error is exc:
+                        raise
+                    raise error from exc
+
+                delay = self.backoff * (2 ** (attempt - 1))
+                time.sleep(random.uniform(delay / 2, delay * 1.5))
+                continue
+
+            latency_ms = (time.perf_counter() - start) * 1000
+            provider_metrics.record(self.name, method, endpoint, 'ok', latency_ms, attempt, status_code)
+            self.breaker.record_success()
+            return data
+
+
+class AsyncProviderClient:
+    """httpx.AsyncClient counterpart of ProviderClient for async views.
+
+    Same timeout, retry, circuit breaker and metrics rules; waiting on the
+    provider yields the event loop instead of holding a worker thread.
+    """
+
+    def __init__(self, name, base_url, secret_key, timeout=(3.05, 15), retries=2,
+                 backoff=0.5, pool_size=100, breaker=None):
+        self.name = name
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        connect_timeout, read_timeout = timeout
+
+        self.client = httpx.AsyncClient(
+            base_url=base_url.rstrip('/'),
+            headers={
+                'Authorization': f'Bearer {secret_key}',
+                'Content-Type': 'application/json',
+            },
+            # Waiting for a free pooled connection counts against the read timeout
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout, pool=read_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def get(self, path, **kwargs):
+        return await self.request('GET', path, **kwargs)
+
+    async def post(self, path, **kwargs):
+        return await self.request('POST', path, **kwargs)
+
+    async def request(self, method, path, idempotent=None, **kwargs):
+        """Send a request and return the decoded JSON body"""
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        endpoint = path.split('?')[0]
+
+        if not self.breaker.allow():
+            provider_metrics.record(self.name, method, endpoint, 'short_circuit', 0, 0)
+            raise CircuitOpenError(self.name, 'circuit open')
+
+        attempt = 0
+        while True:
+            attempt += 1
+            start = time.perf_counter()
+            status_code = None
+            try:
+                response = await self.client.request(method, path, **kwargs)
+                status_code = response.status_code
+                if status_code >= 500 or status_code == 429:
+                    raise ProviderError(self.name, f'HTTP {status_code}', status_code)
+                data = response.json()
+            except (ProviderError, httpx.HTTPError, ValueError) as exc:
+                latency_ms = (time.perf_counter() - start) * 1000
+                provider_metrics.record(self.name, method, endpoint, 'error', latency_ms, attempt, status_code)
+
+                if isinstance(exc, ProviderError):
+                    error = exc
+                    retryable = idempotent
+                elif isinstance(exc, ValueError):
+                    error = ProviderError(self.name, 'invalid JSON response', status_code)
+                    retryable = False
+                else:
+                    error = ProviderError(self.name, str(exc) or type(exc).__name__, status_code)
+                    # Nothing was sent if no connection could be opened or taken from the pool
+                    retryable = idempotent or isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+                if not retryable or attempt > self.retries:
+                    self.breaker.record_failure()
+                    if error is exc:
+                        raise
+                    raise error from exc
+
+                delay = self.backoff * (2 ** (attempt - 1))
+                await asyncio.sleep(random.uniform(delay / 2, delay * 1.5))
+                continue
+
+            latency_ms = (time.perf_counter() - start) * 1000
+            provider_metrics.record(self.name, method, endpoint, 'ok', latency_ms, attempt, status_code)
+            self.breaker.record_success()
+            return data
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_clients = {}
+_breakers = {}
+# httpx pools belong to the event loop that created them, so async clients are kept per loop
+_async_clients = weakref.WeakKeyDictionary()
+_async_closers = set()
+_clients_pid = None
+_clients_lock = threading.Lock()
+
+
+def _check_pid():
+    global _clients, _breakers, _async_clients, _async_closers, _clients_pid
+    # Sockets must not be shared with a forked worker
+    if _clients_pid != os.getpid():
+        _clients = {}
+        _breakers = {}
+        _async_clients = weakref.WeakKeyDictionary()
+        _async_closers = set()
+        _clients_pid = os.getpid()
+
+
+def _breaker(name):
+    # One breaker per provider, shared by the sync and async clients
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(
+            failure_threshold=settings.PAYMENT_PROVIDER_BREAKER_THRESHOLD,
+            reset_timeout=settings.PAYMENT_PROVIDER_BREAKER_RESET,
+        )
+    return _breakers[name]
+
+
+def reset_clients():
+    """Drop cached clients so the next call reads PAYMENT_PROVIDERS again"""
+    with _clients_lock:
+        _clients.clear()
+        _breakers.clear()
+        _async_clients.clear()
+
+
+def get_client(name):
+    """Shared per-process client for a provider configured in PAYMENT_PROVIDERS"""
+    with _clients_lock:
+        _check_pid()
+        if name not in _clients:
+            config = settings.PAYMENT_PROVIDERS[name]
+            _clients[name] = ProviderClient(
+                name,
+                base_url=config['BASE_URL'],
+                secret_key=config['SECRET_KEY'],
+                timeout=(settings.PAYMENT_PROVIDER_CONNECT_TIMEOUT, settings.PAYMENT_PROVIDER_READ_TIMEOUT),
+                retries=settings.PAYMENT_PROVIDER_RETRIES,
+                pool_size=settings.PAYMENT_PROVIDER_POOL_SIZE,
+                breaker=_breaker(name),
+            )
+        return _clients[name]
+
+
+async def _close_with_loop(loop, loop_clients):
+    """Wait until the event loop shuts down, then close its clients.
+
+    Short-lived loops (async views under WSGI or the test client run through
+    async_to_sync, asyncio.run) cancel their pending tasks before closing,
+    which lands here; under ASGI the loop and its pools live with the worker.
+    """
+    try:
+        await loop.create_future()
+    finally:
+        with _clients_lock:
+            if _async_clients.get(loop) is loop_clients:
+                del _async_clients[loop]
+            _async_closers.discard(asyncio.current_task())
+        for client in list(loop_clients.values()):
+            try:
+                await client.aclose()
+            except Exception:
+                logger.warning('Could not close %s client', client.name, exc_info=True)
+
+
+def get_async_client(name):
+    """Shared client for a provider on the running event loop, closed when the loop shuts down"""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        _check_pid()
+        loop_clients = _async_clients.get(loop)
+        if loop_clients is None:
+            loop_clients = _async_clients[loop] = {}
+            # The loop only keeps a weak reference to tasks; the closer drops this one itself
+            _async_closers.add(loop.create_task(_close_with_loop(loop, loop_clients)))
+        if name not in loop_clients:
+            config = settings.PAYMENT_PROVIDERS[name]
+            loop_clients[name] = AsyncProviderClient(
+                name,
+                base_url=config['BASE_URL'],
+                secret_key=config['SECRET_KEY'],
+                timeout=(settings.PAYMENT_PROVIDER_CONNECT_TIMEOUT, settings.PAYMENT_PROVIDER_READ_TIMEOUT),
+                retries=settings.PAYMENT_PROVIDER_RETRIES,
+                pool_size=settings.PAYMENT_PROVIDER_ASYNC_POOL_SIZE,
+                breaker=_breaker(name),
+            )
+        return loop_clients[name]
@@ -0,0 +1,117 @@
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Case, When, Value, DecimalField
+from django.utils import timezone
+
+from apps.analytics.rollups import record_transactions
+
+from . import ledger
+from .models import EscrowPayment, LedgerEntry, Transaction, Wallet
+
+logger = logging.getLogger(__name__)
+
+
+def due_escrows(now=None):
+    """Funded escrows whose auto-release date has passed, oldest first (served by the status/auto_release_date index)"""
+    return EscrowPayment.objects.filter(
+        status='held',
+        auto_release_date__lte=now or timezone.now(),
+        transaction__status='completed',
+    ).order_by('auto_release_date', 'pk')
+
+
+def release_due_escrows(now=None, chunk_size=500, limit=None):
+    """Release due escrows chunk by chunk; returns the number released.
+
+    Each chunk is claimed with SELECT ... FOR UPDATE SKIP LOCKED and released
+    in its own transaction, so several workers can run side by side and a
+    crash only loses the chunk in flight, which is picked up on the next run.
+    """
+    now = now or timezone.now()
+    released = 0
+    skipped = set()
+    while limit is None or released < limit:
+        size = chunk_size if limit is None else min(chunk_size, limit - released)
+        with transaction.atomic():
+            escrows = list(
+                due_escrows(now)
+                .exclude(pk__in=skipped)
+                .select_for_update(skip_locked=True, of=('self',))[:size]
+            )
+            if not escrows:
+                break
+            done = release_escrows(escrows, now)
+        released += len(done)
+        skipped.update(escrow.pk for escrow in escrows if escrow not in done)
+    return released
+
+
+def release_escrows(escrows, now):
+    """Release locked escrows with a handful of bulk statements; returns those released.
+
+    Must run inside a transaction.
+    """
+    payee_ids = {escrow.payee_id for escrow in escrows}
+    Wallet.objects.bulk_create([Wallet(user_id=user_id) for user_id in payee_ids], ignore_conflicts=True)
+    # Lock the wallets in a fixed order so parallel workers cannot deadlock
+    wallets = {
+        wallet.user_id: wallet
+        for wallet in Wallet.objects.select_for_update().filter(user_id__in=payee_ids).order_by('pk')
+    }
+
+    amounts = defaultdict(int)
+    releasable = []
+    for escrow in escrows:
+        wallet = wallets[escrow.payee_id]
+        amount = escrow.amount - escrow.commission
+        if wallet.pending_balance - amounts[wallet.pk] < amount:
+            logger.warning('Escrow %s not released: wallet %s pending balance is short', escrow.pk, wallet.pk)
+            continue
+        amounts[wallet.pk] += amount
+        releasable.append(escrow)
+
+    if not releasable:
+        return []
+
+    def per_wallet():
+        return Case(
+            *[When(pk=wallet_id, then=Value(amount)) for wallet_id, amount in amounts.items()],
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        )
+
+    Wallet.objects.filter(pk__in=amounts).update(
+        pending_balance=F('pending_balance') - per_wallet(),
+        balance=F('balance') + per_wallet(),
+        total_earned=F('total_earned') + per_wallet(),
+        updated_at=now,
+    )
+
+    entries = []
+    commissions = []
+    for escrow in releasable:
+        wallet_id = wallets[escrow.payee_id].pk
+        journal = ledger.journal_entries(
+            wallet_id, escrow.amount - escrow.commission, ledger.PENDING, ledger.AVAILABLE, 'Escrow released'
+        )
+        for entry in journal:
+            entry.transaction_id = escrow.transaction_id
+        entries.extend(journal)
+        commissions.append(Transaction(
+            reference=f"COMM_{escrow.id}_{int(now.timestamp())}",
+            user_id=escrow.payee_id,
+            transaction_type='commission',
+            amount=-escrow.commission,
+            status='completed',
+            description=f"Platform commission for escrow payment #{escrow.id}",
+            completed_at=now,
+        ))
+    LedgerEntry.objects.bulk_create(entries)
+    Transaction.objects.bulk_create(commissions)
+    record_transactions(commissions)
+
+    EscrowPayment.objects.filter(pk__in=[escrow.pk for escrow in releasable]).update(
+        status='released', released_at=now
+    )
+    return releasable
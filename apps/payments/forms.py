@@ -6,7 +6,7 @@ class WithdrawalRequestForm(forms.ModelForm):
         model = WithdrawalRequest
         fields = ['amount', 'method', 'account_details']
         widgets = {
-            'account_details': forms.Textarea(attrs={'rows': 4, 'placeholder': 'Enter your account details (Account number, Bank name, etc.)'}),
+            'account_details': forms.Textarea(attrs={'rows': 4, 'placeholder': '{"account_number": "0123456789", "bank_code": "058", "account_name": "Ada Obi"}'}),
         }
     
     def __init__(self, *args, **kwargs):
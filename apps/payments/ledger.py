@@ -0,0 +1,184 @@
+"""Double-entry journal behind wallet balances.
+
+Every movement of money is posted as a balanced set of LedgerEntry rows
+(debits == credits) and the matching wallet columns are changed with a
+single conditional UPDATE using F() expressions, so concurrent postings
+never overwrite each other and a balance can never go negative.
+"""
+import uuid
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Q, Sum, DecimalField, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import LedgerEntry, Wallet
+
+# Wallet accounts (liabilities: a credit increases what we owe the user)
+AVAILABLE = 'available'
+PENDING = 'pending'
+# Platform accounts
+CLEARING = 'clearing'  # money collected from payment providers
+PAYOUTS = 'payouts'  # money sent out to users
+
+DEBIT = 'debit'
+CREDIT = 'credit'
+
+ZERO = Value(Decimal('0'), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+class InsufficientFunds(Exception):
+    """The wallet does not hold enough to cover the posting"""
+
+
+def _amount(value):
+    amount = Decimal(str(value))
+    if amount <= 0:
+        raise ValueError('Ledger amounts must be positive')
+    return amount
+
+
+def journal_entries(wallet_id, amount, debit, credit, description='', transaction_obj=None):
+    """Unsaved entries for one balanced journal: debit one account and credit another"""
+    journal = uuid.uuid4()
+    return [
+        LedgerEntry(
+            journal=journal,
+            wallet_id=wallet_id if debit in (AVAILABLE, PENDING) else None,
+            account=debit,
+            entry_type=DEBIT,
+            amount=amount,
+            transaction=transaction_obj,
+            description=description,
+        ),
+        LedgerEntry(
+            journal=journal,
+            wallet_id=wallet_id if credit in (AVAILABLE, PENDING) else None,
+            account=credit,
+            entry_type=CREDIT,
+            amount=amount,
+            transaction=transaction_obj,
+            description=description,
+        ),
+    ]
+
+
+def _post(wallet_id, amount, debit, credit, description='', transaction_obj=None):
+    entries = LedgerEntry.objects.bulk_create(
+        journal_entries(wallet_id, amount, debit, credit, description, transaction_obj)
+    )
+    return entries[0].journal
+
+
+def _update(wallet_id, condition=None, **changes):
+    """Apply F() changes to one wallet row, optionally only when `condition` holds"""
+    queryset = Wallet.objects.filter(pk=wallet_id)
+    if condition is not None:
+        queryset = queryset.filter(condition)
+    return queryset.update(updated_at=timezone.now(), **changes)
+
+
+def add_funds(wallet, amount, description='', transaction_obj=None):
+    """Credit the available balance with money collected by the platform"""
+    amount = _amount(amount)
+    with transaction.atomic():
+        _update(wallet.pk, balance=F('balance') + amount, total_earned=F('total_earned') + amount)
+        return _post(wallet.pk, amount, CLEARING, AVAILABLE, description, transaction_obj)
+
+
+def add_pending_funds(wallet, amount, description='', transaction_obj=None):
+    """Hold funds for the wallet in escrow"""
+    amount = _amount(amount)
+    with transaction.atomic():
+        _update(wallet.pk, pending_balance=F('pending_balance') + amount)
+        return _post(wallet.pk, amount, CLEARING, PENDING, description, transaction_obj)
+
+
+def release_pending_funds(wallet, amount, description='', transaction_obj=None):
+    """Move escrowed funds to the available balance"""
+    amount = _amount(amount)
+    with transaction.atomic():
+        updated = _update(
+            wallet.pk,
+            Q(pending_balance__gte=amount),
+            pending_balance=F('pending_balance') - amount,
+            balance=F('balance') + amount,
+            total_earned=F('total_earned') + amount,
+        )
+        if not updated:
+            raise InsufficientFunds(f'Wallet {wallet.pk} has less than {amount} pending')
+        return _post(wallet.pk, amount, PENDING, AVAILABLE, description, transaction_obj)
+
+
+def withdraw_funds(wallet, amount, description='', transaction_obj=None):
+    """Take funds out of the available balance"""
+    amount = _amount(amount)
+    with transaction.atomic():
+        updated = _update(
+            wallet.pk,
+            Q(balance__gte=amount),
+            balance=F('balance') - amount,
+            total_withdrawn=F('total_withdrawn') + amount,
+        )
+        if not updated:
+            raise InsufficientFunds(f'Wallet {wallet.pk} has less than {amount} available')
+        return _post(wallet.pk, amount, AVAILABLE, PAYOUTS, description, transaction_obj)
+
+
+def journal_balances(wallets=None):
+    """Balances recomputed from the journal, as {wallet_id: {field: amount}}"""
+    def total(account, entry_type):
+        return Coalesce(Sum('amount', filter=Q(account=account, entry_type=entry_type)), ZERO)
+
+    entries = LedgerEntry.objects.filter(wallet__isnull=False)
+    if wallets is not None:
+        entries = entries.filter(wallet__in=wallets)
+
+    # Failed payouts credit the wallet back from PAYOUTS; they undo a withdrawal rather than add earnings
+    returned_journals = LedgerEntry.objects.filter(account=PAYOUTS, entry_type=DEBIT).values('journal')
+    rows = entries.values('wallet_id').annotate(
+        available_in=total(AVAILABLE, CREDIT),
+        available_out=total(AVAILABLE, DEBIT),
+        pending_in=total(PENDING, CREDIT),
+        pending_out=total(PENDING, DEBIT),
+        returned=Coalesce(
+            Sum('amount', filter=Q(account=AVAILABLE, entry_type=CREDIT, journal__in=returned_journals)), ZERO
+        ),
+    )
+    return {
+        row['wallet_id']: {
+            'balance': row['available_in'] - row['available_out'],
+            'pending_balance': row['pending_in'] - row['pending_out'],
+            'total_earned': row['available_in'] - row['returned'],
+            'total_withdrawn': row['available_out'] - row['returned'],
+        }
+        for row in rows
+    }
+
+
+def open_balances(wallets):
+    """Journal the current balances of wallets that have no entries yet"""
+    opened = 0
+    for wallet in wallets.filter(ledger_entries__isnull=True):
+        with transaction.atomic():
+            if wallet.total_earned:
+                _post(wallet.pk, wallet.total_earned, CLEARING, AVAILABLE, 'Opening balance')
+            if wallet.total_withdrawn:
+                _post(wallet.pk, wallet.total_withdrawn, AVAILABLE, PAYOUTS, 'Opening balance')
+            if wallet.pending_balance:
+                _post(wallet.pk, wallet.pending_balance, CLEARING, PENDING, 'Opening balance')
+        opened += 1
+    return opened
+
+
+def unbalanced_journals():
+    """Journals whose debits and credits differ (should always be empty)"""
+    return (
+        LedgerEntry.objects.values('journal')
+        .annotate(
+            debits=Coalesce(Sum('amount', filter=Q(entry_type=DEBIT)), ZERO),
+            credits=Coalesce(Sum('amount', filter=Q(entry_type=CREDIT)), ZERO),
+        )
+        .exclude(debits=F('credits'))
+    )
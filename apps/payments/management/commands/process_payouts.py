@@ -0,0 +1,68 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.payments.payouts import BACKENDS, approve_pending, process_payouts, verify_processing
+from apps.payments.stub import stub_providers
+
+
+class Command(BaseCommand):
+    help = 'Pay out approved withdrawals in concurrent bulk transfers (safe to run in parallel and to re-run)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--method', action='append', dest='methods', choices=sorted(BACKENDS),
+                            help='Withdrawal method to pay out (repeatable; default all with a backend)')
+        parser.add_argument('--batch-size', type=int, default=None, help='Transfers per bulk request (default: setting)')
+        parser.add_argument('--concurrency', type=int, default=None, help='Bulk requests in flight (default: setting)')
+        parser.add_argument('--approve-pending', action='store_true', help='Approve pending withdrawals first')
+        parser.add_argument('--verify', action='store_true',
+                            help='First check payouts stuck in processing with the provider')
+        parser.add_argument('--verify-after', type=int, default=None,
+                            help='Minutes in processing before --verify checks a payout (default: setting)')
+        parser.add_argument('--stub', action='store_true',
+                            help='Send transfers to the local stub provider (DEBUG only)')
+        parser.add_argument('--provider-delay', type=float, default=0.2, help='Seconds the stub takes per call')
+        parser.add_argument('--transfer-failure-rate', type=float, default=0,
+                            help='Fraction of stub transfers that fail')
+
+    def handle(self, *args, **options):
+        if options['stub'] and not settings.DEBUG:
+            # The stub marks every approved withdrawal as paid without paying anyone
+            raise CommandError('--stub completes withdrawals without paying them; it only runs with DEBUG on')
+
+        with ExitStack() as stack:
+            stub = None
+            if options['stub']:
+                stub = stack.enter_context(stub_providers(
+                    delay=options['provider_delay'], transfer_failure_rate=options['transfer_failure_rate'],
+                ))
+
+            if options['approve_pending']:
+                approved = approve_pending(options['methods'])
+                self.stdout.write(f'Approved {approved} pending withdrawals')
+
+            if options['verify']:
+                verified = verify_processing(options['verify_after'])
+                self.stdout.write('Verified processing payouts: ' + (
+                    ', '.join(f'{count} {outcome}' for outcome, count in sorted(verified.items())) or 'none due'
+                ))
+
+            report = process_payouts(options['methods'], options['batch_size'], options['concurrency'])
+
+        def ms(value):
+            return '-' if value is None else f'{value:.0f}ms'
+
+        self.stdout.write(
+            f"{report['payouts']} payouts in {report['batches']} batches in {report['seconds']:.2f}s "
+            f"({report['payouts_per_second'] or 0:.0f} payouts/sec): "
+            f"{report['completed']} completed, {report['processing']} processing, "
+            f"{report['failed']} failed, {report['retry']} put back"
+        )
+        self.stdout.write(
+            f"Batch latency p50 {ms(report['batch_p50_ms'])}, p95 {ms(report['batch_p95_ms'])}, "
+            f"max {ms(report['batch_max_ms'])}"
+        )
+        if stub is not None:
+            self.stdout.write(f'Stub received {len(stub.transfers)} transfers, {stub.duplicate_transfers} duplicates')
+        self.stdout.write(self.style.SUCCESS('Done.'))
@@ -0,0 +1,44 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.payments.models import WebhookEvent
+from apps.payments.webhooks import record_event, process_event
+
+
+class Command(BaseCommand):
+    help = 'Process stored payment webhooks, or replay recorded provider payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--replay', action='store_true',
+                            help='Re-apply events that were already processed (safe: processing is idempotent)')
+        parser.add_argument('--reference', help='Only events for this transaction reference')
+        parser.add_argument('--file', help='JSON file with a recorded payload or a list of payloads')
+        parser.add_argument('--provider', choices=['paystack', 'flutterwave'],
+                            help='Provider the recorded payloads came from (required with --file)')
+
+    def handle(self, *args, **options):
+        if options['file']:
+            if not options['provider']:
+                raise CommandError('--provider is required with --file')
+            with open(options['file']) as fh:
+                payloads = json.load(fh)
+            if isinstance(payloads, dict):
+                payloads = [payloads]
+            event_ids = [record_event(options['provider'], payload)[0].pk for payload in payloads]
+            events = WebhookEvent.objects.filter(pk__in=event_ids)
+        else:
+            events = WebhookEvent.objects.all()
+            if not options['replay']:
+                events = events.filter(status__in=['pending', 'failed'])
+
+        if options['reference']:
+            events = events.filter(reference=options['reference'])
+
+        counts = {}
+        for event_id in events.order_by('received_at').values_list('pk', flat=True):
+            status = process_event(event_id, replay=options['replay'])
+            counts[status] = counts.get(status, 0) + 1
+
+        summary = ', '.join(f'{status}: {count}' for status, count in sorted(counts.items())) or 'nothing to do'
+        self.stdout.write(self.style.SUCCESS(f'Webhook events {summary}'))
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+
+from apps.payments.ledger import journal_balances, open_balances, unbalanced_journals
+from apps.payments.models import Wallet
+
+FIELDS = ['balance', 'pending_balance', 'total_earned', 'total_withdrawn']
+
+
+class Command(BaseCommand):
+    help = 'Recompute wallet balances from the ledger journal and report (or fix) any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Overwrite drifted wallets with the journal totals')
+        parser.add_argument('--open', action='store_true',
+                            help='First journal the current balances of wallets with no ledger entries')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['open']:
+            opened = open_balances(Wallet.objects.all())
+            self.stdout.write(f'Opened {opened} wallets in the ledger')
+
+        unbalanced = unbalanced_journals().count()
+        if unbalanced:
+            self.stdout.write(self.style.ERROR(f'{unbalanced} journals do not balance'))
+
+        drifted = []
+        unopened = []
+        wallet_ids = Wallet.objects.order_by('pk').values_list('pk', flat=True)
+        for start in range(0, wallet_ids.count(), options['batch_size']):
+            batch = list(wallet_ids[start:start + options['batch_size']])
+            expected = journal_balances(batch)
+            for wallet in Wallet.objects.filter(pk__in=batch).only('pk', *FIELDS):
+                totals = expected.get(wallet.pk)
+                if totals is None:
+                    # Balances from before the ledger have no entries; --fix would zero them
+                    if any(getattr(wallet, field) for field in FIELDS):
+                        unopened.append(wallet.pk)
+                    continue
+                if any(getattr(wallet, field) != totals[field] for field in FIELDS):
+                    for field in FIELDS:
+                        setattr(wallet, field, totals[field])
+                    drifted.append(wallet)
+
+        for wallet in drifted[:20]:
+            self.stdout.write(f'Wallet {wallet.pk} drifted')
+        if unopened:
+            self.stdout.write(self.style.WARNING(
+                f'{len(unopened)} wallets have balances but no ledger entries and were skipped (use --open): '
+                + ', '.join(str(pk) for pk in unopened[:20])
+            ))
+
+        if options['fix'] and drifted:
+            Wallet.objects.bulk_update(drifted, FIELDS, batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Fixed {len(drifted)} wallets'))
+        elif drifted:
+            self.stdout.write(self.style.WARNING(f'{len(drifted)} wallets differ from the journal (use --fix)'))
+        elif not unopened:
+            self.stdout.write(self.style.SUCCESS('All wallets match the journal'))
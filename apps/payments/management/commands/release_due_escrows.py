@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.payments.escrow import due_escrows, release_due_escrows
+
+
+class Command(BaseCommand):
+    help = 'Release escrow payments whose auto-release date has passed (safe to run in parallel and to re-run)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--limit', type=int, help='Stop after releasing this many escrows')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the escrows that are due')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            self.stdout.write(f'{due_escrows().count()} escrows are due for release')
+            return
+
+        start = time.perf_counter()
+        released = release_due_escrows(chunk_size=options['chunk_size'], limit=options['limit'])
+        elapsed = time.perf_counter() - start
+
+        rate = released / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Released {released} escrows in {elapsed:.2f}s ({rate:.0f} escrows/sec)'
+        ))
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+import uuid
+from copy import deepcopy
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.gigs.models import Gig, GigCategory, GigOrder
+from apps.payments import clients
+from apps.payments.stub import StubProviderServer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Fire many concurrent payment initiations at the async view against a slow stub provider'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Payment initiations kept in flight at once')
+        parser.add_argument('--provider-delay', type=float, default=2.0, help='Seconds the stub takes per call')
+        parser.add_argument('--pool-size', type=int, default=None, help='Async connection pool (default: setting)')
+        parser.add_argument('--sync-workers', type=int, default=8, help='Sync worker count to compare against')
+        parser.add_argument('--keep', action='store_true', help='Keep the test users, gig and transactions')
+
+    def handle(self, *args, **options):
+        suffix = uuid.uuid4().hex[:8]
+        seller = User.objects.create_user(username=f'async_pay_seller_{suffix}', password=None)
+        buyer = User.objects.create_user(username=f'async_pay_buyer_{suffix}', email=f'buyer_{suffix}@example.com', password=None)
+        category = GigCategory.objects.first() or GigCategory.objects.create(name=f'Stress {suffix}', description='')
+        gig = Gig.objects.create(
+            title='Async payment stress', description='-', freelancer=seller, category=category,
+            basic_price=5000, basic_description='-', basic_delivery_time=3,
+        )
+        order = GigOrder.objects.create(
+            gig=gig, buyer=buyer, price=5000, requirements='-', delivery_date=timezone.now() + timedelta(days=3),
+        )
+
+        try:
+            with StubProviderServer(delay=options['provider_delay']) as stub:
+                providers = deepcopy(settings.PAYMENT_PROVIDERS)
+                for config in providers.values():
+                    config['BASE_URL'] = stub.url
+                pool_size = options['pool_size'] or settings.PAYMENT_PROVIDER_ASYNC_POOL_SIZE
+                with override_settings(
+                    PAYMENT_PROVIDERS=providers, PAYMENT_PROVIDER_ASYNC_POOL_SIZE=pool_size, ALLOWED_HOSTS=['testserver'],
+                ):
+                    clients.reset_clients()
+                    statuses, elapsed, peak_threads = asyncio.run(self.fire(buyer, order, options['requests']))
+                clients.reset_clients()
+                peak_in_flight = stub.peak_in_flight
+        finally:
+            if not options['keep']:
+                order.transactions.all().delete()
+                buyer.delete()
+                seller.delete()
+
+        redirected = sum(1 for status, location in statuses if status == 302 and location.startswith(stub.url))
+        delay = options['provider_delay']
+        self.stdout.write(
+            f"{options['requests']} initiations in {elapsed:.2f}s with a {delay}s provider "
+            f"(pool {pool_size}, peak {peak_in_flight} provider calls in flight, peak {peak_threads} threads including the stub server)"
+        )
+        workers = options['sync_workers']
+        self.stdout.write(
+            f"{workers} sync workers blocked on the same provider would need at least "
+            f"{-(-options['requests'] // workers) * delay:.0f}s"
+        )
+        if redirected != options['requests']:
+            raise CommandError(f"Only {redirected} of {options['requests']} initiations reached the provider checkout")
+        self.stdout.write(self.style.SUCCESS('All initiations were redirected to the provider checkout.'))
+
+    async def fire(self, buyer, order, count):
+        client = AsyncClient()
+        await sync_to_async(client.force_login)(buyer)
+        url = reverse('payments:initiate_payment', args=[order.pk, 'gig'])
+
+        peak_threads = threading.active_count()
+        done = asyncio.Event()
+
+        async def watch_threads():
+            nonlocal peak_threads
+            while not done.is_set():
+                peak_threads = max(peak_threads, threading.active_count())
+                await asyncio.sleep(0.01)
+
+        watcher = asyncio.create_task(watch_threads())
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(client.get(url) for _ in range(count)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await watcher
+
+        statuses = [(response.status_code, response.get('Location', '')) for response in responses]
+        return statuses, elapsed, peak_threads
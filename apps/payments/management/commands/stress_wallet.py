@@ -0,0 +1,86 @@
+import random
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, OperationalError
+
+from apps.payments import ledger
+from apps.payments.models import LedgerEntry, Wallet
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Hammer one wallet from many threads and check the balance against the journal'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--operations', type=int, default=200, help='Operations per thread')
+        parser.add_argument('--keep', action='store_true', help='Keep the test user and wallet')
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(username=f'ledger_stress_{uuid.uuid4().hex[:8]}', password=None)
+        wallet = Wallet.objects.create(user=user)
+        counts = {'ok': 0, 'insufficient': 0, 'locked': 0}
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                for _ in range(options['operations']):
+                    amount = Decimal(random.randint(1, 500))
+                    operation = random.choice([
+                        ledger.add_pending_funds,
+                        ledger.release_pending_funds,
+                        ledger.withdraw_funds,
+                    ])
+                    try:
+                        operation(wallet, amount, 'Stress test')
+                        outcome = 'ok'
+                    except ledger.InsufficientFunds:
+                        outcome = 'insufficient'
+                    except OperationalError:
+                        # SQLite serialises writers; a busy database is not a ledger error
+                        outcome = 'locked'
+                    with lock:
+                        counts[outcome] += 1
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        wallet.refresh_from_db()
+        expected = ledger.journal_balances([wallet.pk]).get(wallet.pk, {})
+        self.stdout.write(
+            f"{sum(counts.values())} operations in {elapsed:.2f}s "
+            f"(ok={counts['ok']} insufficient={counts['insufficient']} locked={counts['locked']})"
+        )
+        self.stdout.write(f'Wallet:  balance={wallet.balance} pending={wallet.pending_balance}')
+        self.stdout.write(
+            f"Journal: balance={expected.get('balance', 0)} pending={expected.get('pending_balance', 0)}"
+        )
+
+        consistent = (
+            wallet.balance == expected.get('balance', 0)
+            and wallet.pending_balance == expected.get('pending_balance', 0)
+            and wallet.balance >= 0 and wallet.pending_balance >= 0
+            and not ledger.unbalanced_journals().exists()
+        )
+
+        if not options['keep']:
+            journals = list(wallet.ledger_entries.values_list('journal', flat=True))
+            LedgerEntry.objects.filter(journal__in=journals).delete()
+            user.delete()
+
+        if not consistent:
+            raise CommandError('Wallet and journal disagree')
+        self.stdout.write(self.style.SUCCESS('Wallet matches the journal'))
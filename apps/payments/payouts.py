@@ -0,0 +1,442 @@
+"""Withdrawal payouts through provider bulk transfers.
+
+request_withdrawal takes the money out of the wallet up front and staff
+approve the request. `process_payouts` claims approved withdrawals in
+batches per method with SELECT ... FOR UPDATE SKIP LOCKED, gives each one
+its 'withdrawal' Transaction and submits the batch as one bulk transfer.
+Batches are submitted from a fixed number of workers on one event loop,
+so at most PAYOUT_CONCURRENCY provider calls are in flight, and the
+outcomes are written back with a few bulk statements per batch. The
+Transaction reference is also the transfer reference, so a batch that is
+submitted again is not paid twice.
+
+Transfers the provider has accepted but not finished stay 'processing'
+until a transfer webhook or `verify_processing` settles them. Failed
+payouts are rejected and the money goes back to the wallet.
+"""
+import asyncio
+import logging
+import statistics
+import time
+import uuid
+from collections import Counter, defaultdict, namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
+
+from . import ledger
+from .clients import CircuitOpenError, ProviderError, get_async_client, get_client
+from .models import LedgerEntry, Transaction, Wallet, WithdrawalRequest
+
+logger = logging.getLogger(__name__)
+
+COMPLETED = 'completed'
+FAILED = 'failed'
+PROCESSING = 'processing'
+# Nothing reached the provider; the withdrawal goes back to 'approved'
+RETRY = 'retry'
+
+Result = namedtuple('Result', ['outcome', 'provider_reference', 'data', 'error'])
+
+
+class PaystackTransfers:
+    """Bank payouts with Paystack bulk transfers"""
+
+    provider = 'paystack'
+    max_batch = 100  # Paystack accepts up to 100 transfers per bulk request
+
+    FINAL_FAILURES = frozenset(['failed', 'reversed', 'abandoned', 'rejected'])
+
+    def _result(self, data):
+        status = data.get('status')
+        transfer_code = str(data.get('transfer_code') or '')
+        if status == 'success':
+            return Result(COMPLETED, transfer_code, data, '')
+        if status in self.FINAL_FAILURES:
+            return Result(FAILED, transfer_code, data, data.get('reason') or data.get('message') or f'Transfer {status}')
+        return Result(PROCESSING, transfer_code, data, '')
+
+    async def _recipients(self, client, withdrawals):
+        """Create missing transfer recipients; returns {withdrawal pk: Result} for those that could not be created"""
+        failed = {}
+        batch = []
+        for withdrawal in withdrawals:
+            details = withdrawal.account_details
+            batch.append({
+                'type': 'nuban',
+                'name': details.get('account_name') or f'Work Nigeria user {withdrawal.user_id}',
+                'account_number': str(details['account_number']),
+                'bank_code': str(details['bank_code']),
+                'currency': 'NGN',
+            })
+        response = await client.post('/transferrecipient/bulk', json={'batch': batch})
+        if not response.get('status'):
+            raise ProviderError(self.provider, response.get('message') or 'recipients rejected')
+
+        codes = {}
+        for item in (response.get('data') or {}).get('success') or []:
+            details = item.get('details') or {}
+            codes[(str(details.get('account_number')), str(details.get('bank_code')))] = item.get('recipient_code')
+        for withdrawal in withdrawals:
+            details = withdrawal.account_details
+            code = codes.get((str(details['account_number']), str(details['bank_code'])))
+            if code:
+                # Saved with the batch so later withdrawals to this account skip this call
+                withdrawal.account_details = {**details, 'recipient_code': code}
+            else:
+                failed[withdrawal.pk] = Result(FAILED, '', {}, 'Paystack could not verify the bank account')
+        return failed
+
+    async def submit(self, client, withdrawals):
+        """Pay out a batch; returns [(withdrawal, Result)]"""
+        results = {}
+        payable = []
+        for withdrawal in withdrawals:
+            details = withdrawal.account_details if isinstance(withdrawal.account_details, dict) else {}
+            if details.get('recipient_code') or (details.get('account_number') and details.get('bank_code')):
+                payable.append(withdrawal)
+            else:
+                results[withdrawal.pk] = Result(FAILED, '', {}, 'Missing account number or bank code')
+
+        new_recipients = [withdrawal for withdrawal in payable if not withdrawal.account_details.get('recipient_code')]
+        if new_recipients:
+            try:
+                results.update(await self._recipients(client, new_recipients))
+            except ProviderError as exc:
+                for withdrawal in new_recipients:
+                    results[withdrawal.pk] = Result(RETRY, '', {}, str(exc))
+        payable = [withdrawal for withdrawal in payable if withdrawal.pk not in results]
+
+        if payable:
+            transfers = [{
+                'amount': int(withdrawal.amount * 100),  # kobo
+                'recipient': withdrawal.account_details['recipient_code'],
+                'reference': withdrawal.transaction.reference,
+                'reason': f'Work Nigeria withdrawal #{withdrawal.pk}',
+            } for withdrawal in payable]
+            try:
+                response = await client.post('/transfer/bulk', json={
+                    'currency': 'NGN',
+                    'source': 'balance',
+                    'transfers': transfers,
+                })
+            except CircuitOpenError as exc:
+                response = None
+                for withdrawal in payable:
+                    results[withdrawal.pk] = Result(RETRY, '', {}, str(exc))
+            except ProviderError as exc:
+                # The request may have reached Paystack; verify_processing finds out later
+                response = None
+                for withdrawal in payable:
+                    results[withdrawal.pk] = Result(PROCESSING, '', {}, str(exc))
+
+            if response is not None and not response.get('status'):
+                # Rejected as a whole (for example an insufficient platform balance): nothing was paid
+                for withdrawal in payable:
+                    results[withdrawal.pk] = Result(RETRY, '', {}, response.get('message') or 'Bulk transfer rejected')
+            elif response is not None:
+                items = {item.get('reference'): item for item in response.get('data') or []}
+                for withdrawal in payable:
+                    item = items.get(withdrawal.transaction.reference)
+                    results[withdrawal.pk] = self._result(item) if item else Result(PROCESSING, '', {}, '')
+
+        return [(withdrawal, results[withdrawal.pk]) for withdrawal in withdrawals]
+
+    def verify(self, client, withdrawal):
+        """Current Result of a submitted transfer, or None if Paystack cannot be reached"""
+        try:
+            response = client.get(f'/transfer/verify/{withdrawal.transaction.reference}')
+        except ProviderError as exc:
+            logger.warning('Could not verify payout %s: %s', withdrawal.pk, exc)
+            return None
+        if not response.get('status'):
+            return Result(RETRY, '', {}, response.get('message') or 'Transfer not found')
+        return self._result(response.get('data') or {})
+
+
+# Withdrawal method -> payout backend; methods without one are left for manual payout
+BACKENDS = {
+    'bank_transfer': PaystackTransfers(),
+}
+
+
+def approve_pending(methods=None):
+    """Approve every pending withdrawal (for setups without a manual review step)"""
+    pending = WithdrawalRequest.objects.filter(status='pending')
+    if methods:
+        pending = pending.filter(method__in=methods)
+    return pending.update(status='approved', updated_at=timezone.now())
+
+
+def claim_batch(method, size, exclude=()):
+    """Lock up to `size` approved withdrawals, mark them processing and give each its Transaction"""
+    now = timezone.now()
+    with transaction.atomic():
+        withdrawals = list(
+            WithdrawalRequest.objects.filter(status='approved', method=method)
+            .exclude(pk__in=exclude)
+            .select_related('transaction')
+            .select_for_update(skip_locked=True, of=('self',))
+            .order_by('created_at', 'pk')[:size]
+        )
+        if not withdrawals:
+            return []
+
+        new = [withdrawal for withdrawal in withdrawals if withdrawal.transaction_id is None]
+        created = Transaction.objects.bulk_create([
+            Transaction(
+                reference=f'WDR_{withdrawal.pk}_{uuid.uuid4().hex[:8]}',
+                user_id=withdrawal.user_id,
+                transaction_type='withdrawal',
+                amount=withdrawal.amount,
+                status='processing',
+                description=f'Withdrawal #{withdrawal.pk} ({withdrawal.get_method_display()})',
+            )
+            for withdrawal in new
+        ])
+        for withdrawal, record in zip(new, created):
+            withdrawal.transaction = record
+        # Withdrawals put back after an earlier attempt keep their transaction and reference
+        Transaction.objects.filter(
+            pk__in=[withdrawal.transaction_id for withdrawal in withdrawals if withdrawal not in new]
+        ).update(status='processing', updated_at=now)
+
+        for withdrawal in withdrawals:
+            withdrawal.status = 'processing'
+            withdrawal.updated_at = now
+        WithdrawalRequest.objects.bulk_update(withdrawals, ['status', 'transaction', 'updated_at'])
+    return withdrawals
+
+
+def _return_to_wallets(withdrawals, now):
+    """Credit failed payouts back to their wallets; must run inside a transaction"""
+    # Lock the wallets in a fixed order so parallel workers cannot deadlock
+    wallet_ids = dict(
+        Wallet.objects.select_for_update().filter(user_id__in={withdrawal.user_id for withdrawal in withdrawals})
+        .order_by('pk').values_list('user_id', 'pk')
+    )
+    amounts = defaultdict(Decimal)
+    entries = []
+    for withdrawal in withdrawals:
+        wallet_id = wallet_ids[withdrawal.user_id]
+        amounts[wallet_id] += withdrawal.amount
+        journal = ledger.journal_entries(
+            wallet_id, withdrawal.amount, ledger.PAYOUTS, ledger.AVAILABLE, 'Withdrawal returned'
+        )
+        for entry in journal:
+            entry.transaction_id = withdrawal.transaction_id
+        entries.extend(journal)
+
+    def per_wallet():
+        return Case(
+            *[When(pk=wallet_id, then=Value(amount)) for wallet_id, amount in amounts.items()],
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        )
+
+    Wallet.objects.filter(pk__in=amounts).update(
+        balance=F('balance') + per_wallet(),
+        total_withdrawn=F('total_withdrawn') - per_wallet(),
+        updated_at=now,
+    )
+    LedgerEntry.objects.bulk_create(entries)
+
+
+def record_results(results):
+    """Write [(withdrawal, Result)] back with bulk updates; returns a Counter of outcomes.
+
+    Only withdrawals still 'processing' are touched, so a webhook that
+    settled a transfer first is never overwritten.
+    """
+    now = timezone.now()
+    counts = Counter()
+    with transaction.atomic():
+        open_ids = set(
+            WithdrawalRequest.objects.select_for_update()
+            .filter(pk__in=[withdrawal.pk for withdrawal, _ in results], status='processing')
+            .values_list('pk', flat=True)
+        )
+        withdrawals, payments, returned = [], [], []
+        for withdrawal, result in results:
+            if withdrawal.pk not in open_ids:
+                continue
+            counts[result.outcome] += 1
+            payment = withdrawal.transaction
+            if result.provider_reference:
+                payment.provider_reference = result.provider_reference
+            if result.data:
+                payment.provider_response = result.data
+            if result.error:
+                logger.warning('Payout %s (%s): %s', withdrawal.pk, result.outcome, result.error)
+
+            if result.outcome == COMPLETED:
+                withdrawal.status = 'completed'
+                withdrawal.processed_at = now
+                payment.status = 'completed'
+                payment.completed_at = now
+            elif result.outcome == FAILED:
+                withdrawal.status = 'rejected'
+                withdrawal.processed_at = now
+                withdrawal.admin_notes = '\n'.join(filter(None, [withdrawal.admin_notes, f'Payout failed: {result.error}']))
+                payment.status = 'failed'
+                returned.append(withdrawal)
+            elif result.outcome == RETRY:
+                withdrawal.status = 'approved'
+                payment.status = 'pending'
+            withdrawal.updated_at = now
+            payment.updated_at = now
+            withdrawals.append(withdrawal)
+            payments.append(payment)
+
+        WithdrawalRequest.objects.bulk_update(
+            withdrawals, ['status', 'processed_at', 'admin_notes', 'account_details', 'updated_at']
+        )
+        Transaction.objects.bulk_update(
+            payments, ['status', 'provider_reference', 'provider_response', 'completed_at', 'updated_at']
+        )
+        if returned:
+            _return_to_wallets(returned, now)
+    return counts
+
+
+def _payout(reference, lock=False):
+    withdrawals = WithdrawalRequest.objects.select_related('transaction')
+    if lock:
+        withdrawals = withdrawals.select_for_update()
+    withdrawal = withdrawals.filter(transaction__reference=reference).first()
+    if withdrawal is None:
+        # Raised so the webhook event is kept as failed for replay rather than dropped
+        logger.error('Transfer webhook for unknown payout %s', reference)
+        raise LookupError(f'No payout with reference {reference}')
+    return withdrawal
+
+
+def settle_transfer(reference, succeeded, data):
+    """Apply a transfer webhook; returns False if the payout is already settled"""
+    withdrawal = _payout(reference)
+    if withdrawal.status != 'processing':
+        return False
+    if succeeded:
+        result = Result(COMPLETED, str(data.get('transfer_code') or ''), data, '')
+    else:
+        result = Result(FAILED, str(data.get('transfer_code') or ''), data, data.get('reason') or 'Transfer failed')
+    return bool(record_results([(withdrawal, result)]))
+
+
+def reverse_transfer(reference, data):
+    """Apply a transfer reversal; returns False if the payout was already returned.
+
+    Banks reverse transfers after Paystack has reported them successful, so
+    a completed payout is rejected again and the money returned to the wallet.
+    """
+    reason = data.get('reason') or 'Transfer reversed'
+    with transaction.atomic():
+        withdrawal = _payout(reference, lock=True)
+        if withdrawal.status == 'processing':
+            return bool(record_results([(withdrawal, Result(FAILED, str(data.get('transfer_code') or ''), data, reason))]))
+        if withdrawal.status != 'completed':
+            return False
+
+        now = timezone.now()
+        logger.warning('Payout %s reversed after completing: %s', withdrawal.pk, reason)
+        withdrawal.status = 'rejected'
+        withdrawal.processed_at = now
+        withdrawal.admin_notes = '\n'.join(filter(None, [withdrawal.admin_notes, f'Payout reversed: {reason}']))
+        withdrawal.save(update_fields=['status', 'processed_at', 'admin_notes', 'updated_at'])
+        payment = withdrawal.transaction
+        payment.status = 'failed'
+        payment.provider_response = data
+        payment.save(update_fields=['status', 'provider_response', 'updated_at'])
+        _return_to_wallets([withdrawal], now)
+    return True
+
+
+def verify_processing(older_than=None):
+    """Ask the provider about payouts stuck in 'processing'; returns a Counter of outcomes"""
+    cutoff = timezone.now() - timedelta(minutes=older_than or settings.PAYOUT_VERIFY_AFTER)
+    stale = WithdrawalRequest.objects.filter(
+        status='processing', method__in=BACKENDS, updated_at__lt=cutoff
+    ).select_related('transaction').order_by('pk')
+
+    counts = Counter()
+    results = []
+    for withdrawal in stale.iterator(chunk_size=500):
+        backend = BACKENDS[withdrawal.method]
+        result = backend.verify(get_client(backend.provider), withdrawal)
+        if result is not None:
+            results.append((withdrawal, result))
+        if len(results) >= 500:
+            counts.update(record_results(results))
+            results = []
+    if results:
+        counts.update(record_results(results))
+    return counts
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def _pay_out(methods, batch_size, concurrency, counts, latencies):
+    slots = asyncio.Semaphore(concurrency)
+    claim = sync_to_async(claim_batch)
+    record = sync_to_async(record_results)
+
+    async def worker(method, backend, retried):
+        client = get_async_client(backend.provider)
+        while True:
+            batch = await claim(method, min(batch_size, backend.max_batch), frozenset(retried))
+            if not batch:
+                return
+            async with slots:
+                started = time.perf_counter()
+                results = await backend.submit(client, batch)
+                latencies.append((time.perf_counter() - started) * 1000)
+            # Put back, but not claimed again in this run
+            retried.update(withdrawal.pk for withdrawal, result in results if result.outcome == RETRY)
+            counts.update(await record(results))
+
+    try:
+        workers = []
+        for method in methods:
+            retried = set()
+            workers.extend(worker(method, BACKENDS[method], retried) for _ in range(concurrency))
+        await asyncio.gather(*workers)
+    finally:
+        await sync_to_async(connections.close_all)()
+
+
+def process_payouts(methods=None, batch_size=None, concurrency=None):
+    """Pay out every approved withdrawal that has a backend; returns a summary dict"""
+    methods = [method for method in (methods or BACKENDS) if method in BACKENDS]
+    batch_size = batch_size or settings.PAYOUT_BATCH_SIZE
+    concurrency = concurrency or settings.PAYOUT_CONCURRENCY
+
+    counts = Counter()
+    latencies = []
+    started = time.perf_counter()
+    asyncio.run(_pay_out(methods, batch_size, concurrency, counts, latencies))
+    elapsed = time.perf_counter() - started
+
+    payouts = sum(counts.values())
+    return {
+        'payouts': payouts,
+        'completed': counts[COMPLETED],
+        'processing': counts[PROCESSING],
+        'failed': counts[FAILED],
+        'retry': counts[RETRY],
+        'batches': len(latencies),
+        'seconds': round(elapsed, 3),
+        'payouts_per_second': round(payouts / elapsed, 1) if elapsed else None,
+        'batch_p50_ms': _percentile(latencies, 0.5),
+        'batch_p95_ms': _percentile(latencies, 0.95),
+        'batch_max_ms': max(latencies) if latencies else None,
+        'batch_mean_ms': statistics.mean(latencies) if latencies else None,
+    }
@@ -1,22 +1,42 @@
-import requests
+import logging
+
 from django.conf import settings
-import json
+
+from .clients import get_client, get_async_client, ProviderError
+
+logger = logging.getLogger(__name__)
 
 class PaystackService:
     def __init__(self):
         self.secret_key = settings.PAYSTACK_SECRET_KEY
         self.public_key = settings.PAYSTACK_PUBLIC_KEY
-        self.base_url = 'https://api.paystack.co'
+        self.client = get_client('paystack')
     
     def initialize_payment(self, email, amount, reference, callback_url=None):
         """Initialize payment with Paystack"""
-        url = f"{self.base_url}/transaction/initialize"
+        data = self._initialize_data(email, amount, reference, callback_url)
         
-        headers = {
-            'Authorization': f'Bearer {self.secret_key}',
-            'Content-Type': 'application/json'
-        }
+        try:
+            response_data = self.client.post('/transaction/initialize', json=data)
+            return self._authorization_url(response_data, reference)
+        except ProviderError as e:
+            logger.error("Paystack initialization error for %s: %s", reference, e)
+        
+        return None
+    
+    async def ainitialize_payment(self, email, amount, reference, callback_url=None):
+        """Async initialize_payment, for views served over ASGI"""
+        data = self._initialize_data(email, amount, reference, callback_url)
+        
+        try:
+            response_data = await get_async_client('paystack').post('/transaction/initialize', json=data)
+            return self._authorization_url(response_data, reference)
+        except ProviderError as e:
+            logger.error("Paystack initialization error for %s: %s", reference, e)
         
+        return None
+    
+    def _initialize_data(self, email, amount, reference, callback_url):
         data = {
             'email': email,
             'amount': amount,  # Amount in kobo
@@ -25,34 +45,24 @@ class PaystackService:
         
         if callback_url:
             data['callback_url'] = callback_url
-        
-        try:
-            response = requests.post(url, headers=headers, json=data)
-            response_data = response.json()
-            
-            if response_data.get('status'):
-                return response_data['data']['authorization_url']
-        except Exception as e:
-            print(f"Paystack initialization error: {e}")
-        
+        return data
+    
+    def _authorization_url(self, response_data, reference):
+        if response_data.get('status'):
+            return response_data['data']['authorization_url']
+        logger.warning("Paystack initialization rejected for %s: %s", reference, response_data.get('message'))
         return None
     
     def verify_payment(self, reference):
         """Verify payment with Paystack"""
-        url = f"{self.base_url}/transaction/verify/{reference}"
-        
-        headers = {
-            'Authorization': f'Bearer {self.secret_key}',
-        }
-        
         try:
-            response = requests.get(url, headers=headers)
-            response_data = response.json()
+            response_data = self.client.get(f'/transaction/verify/{reference}')
             
             if response_data.get('status'):
                 return response_data['data']
-        except Exception as e:
-            print(f"Paystack verification error: {e}")
+            logger.warning("Paystack verification rejected for %s: %s", reference, response_data.get('message'))
+        except ProviderError as e:
+            logger.error("Paystack verification error for %s: %s", reference, e)
         
         return None
 
@@ -60,17 +70,10 @@ class FlutterwaveService:
     def __init__(self):
         self.secret_key = settings.FLUTTERWAVE_SECRET_KEY
         self.public_key = settings.FLUTTERWAVE_PUBLIC_KEY
-        self.base_url = 'https://api.flutterwave.com/v3'
+        self.client = get_client('flutterwave')
     
     def initialize_payment(self, email, amount, reference, callback_url=None):
         """Initialize payment with Flutterwave"""
-        url = f"{self.base_url}/payments"
-        
-        headers = {
-            'Authorization': f'Bearer {self.secret_key}',
-            'Content-Type': 'application/json'
-        }
-        
         data = {
             'tx_ref': reference,
             'amount': amount,
@@ -82,12 +85,12 @@ class FlutterwaveService:
         }
         
         try:
-            response = requests.post(url, headers=headers, json=data)
-            response_data = response.json()
+            response_data = self.client.post('/payments', json=data)
             
             if response_data.get('status') == 'success':
                 return response_data['data']['link']
-        except Exception as e:
-            print(f"Flutterwave initialization error: {e}")
+            logger.warning("Flutterwave initialization rejected for %s: %s", reference, response_data.get('message'))
+        except ProviderError as e:
+            logger.error("Flutterwave initialization error for %s: %s", reference, e)
         
         return None
\ No newline at end of file
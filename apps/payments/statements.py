@@ -0,0 +1,231 @@
+"""Streaming statements over transactions, escrow payments and withdrawals.
+
+Rows are read with values_list().iterator(), ordered by owner and date, so
+an export holds one chunk in memory no matter how many rows it covers.
+Running columns are cumulative sums per owner of a per-row SQL expression
+(for example the signed amount of completed transactions), added up in
+Python as rows stream past. With a start date, each owner's running
+columns open at the sum over their earlier rows, fetched by one grouped
+query that is merged with the main stream in owner order.
+"""
+import csv
+import json
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When
+from django.utils import timezone
+
+from .models import EscrowPayment, Transaction, WithdrawalRequest
+
+ZERO = Value(Decimal('0'), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+# owner: field the running columns are kept per; columns: (header, lookup);
+# running: (header, expression summed per owner); type_field: what the type filter matches
+Statement = namedtuple('Statement', ['model', 'date_field', 'owner', 'columns', 'running', 'type_field'])
+
+
+def _when(condition, value):
+    return Case(When(condition, then=value), default=ZERO, output_field=ZERO.output_field)
+
+
+STATEMENTS = {
+    'transactions': Statement(
+        model=Transaction,
+        date_field='created_at',
+        owner='user_id',
+        columns=[
+            ('date', 'created_at'),
+            ('reference', 'reference'),
+            ('user_id', 'user_id'),
+            ('username', 'user__username'),
+            ('type', 'transaction_type'),
+            ('status', 'status'),
+            ('currency', 'currency'),
+            ('amount', 'amount'),
+            ('completed_at', 'completed_at'),
+        ],
+        running=[
+            # Net flow of the user's own completed transactions (payments they
+            # made, commissions, withdrawals), not their wallet balance: escrow
+            # releases credit the payee's wallet without a transaction of theirs.
+            # Amounts are stored signed (commissions are negative); withdrawals are stored positive
+            ('net_amount', Case(
+                When(status='completed', transaction_type='withdrawal', then=-F('amount')),
+                When(status='completed', then=F('amount')),
+                default=ZERO,
+                output_field=ZERO.output_field,
+            )),
+        ],
+        type_field='transaction_type',
+    ),
+    'escrow': Statement(
+        model=EscrowPayment,
+        date_field='created_at',
+        owner='payee_id',
+        columns=[
+            ('date', 'created_at'),
+            ('escrow_id', 'id'),
+            ('reference', 'transaction__reference'),
+            ('payer_id', 'payer_id'),
+            ('payee_id', 'payee_id'),
+            ('status', 'status'),
+            ('amount', 'amount'),
+            ('commission', 'commission'),
+            ('auto_release_date', 'auto_release_date'),
+            ('released_at', 'released_at'),
+        ],
+        running=[
+            ('held', _when(Q(status__in=('held', 'disputed')), F('amount'))),
+            ('released_net', _when(Q(status='released'), F('amount') - F('commission'))),
+            ('refunded', _when(Q(status='refunded'), F('amount'))),
+        ],
+        type_field=None,
+    ),
+    'withdrawals': Statement(
+        model=WithdrawalRequest,
+        date_field='created_at',
+        owner='user_id',
+        columns=[
+            ('date', 'created_at'),
+            ('withdrawal_id', 'id'),
+            ('user_id', 'user_id'),
+            ('username', 'user__username'),
+            ('method', 'method'),
+            ('status', 'status'),
+            ('amount', 'amount'),
+            ('processed_at', 'processed_at'),
+        ],
+        running=[
+            ('withdrawn', _when(Q(status='completed'), F('amount'))),
+            ('outstanding', _when(Q(status__in=('pending', 'approved', 'processing')), F('amount'))),
+        ],
+        type_field='method',
+    ),
+}
+
+
+def headers(kind):
+    statement = STATEMENTS[kind]
+    return [header for header, _ in statement.columns] + [header for header, _ in statement.running]
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _filtered(statement, owner_ids, types, statuses):
+    queryset = statement.model._default_manager.all()
+    if owner_ids is not None:
+        queryset = queryset.filter(**{f'{statement.owner}__in': owner_ids})
+    if types:
+        if not statement.type_field:
+            raise ValueError('This statement has no type to filter on')
+        queryset = queryset.filter(**{f'{statement.type_field}__in': types})
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    return queryset
+
+
+def _openings(statement, queryset, start, chunk_size):
+    """(owner, [opening value per running column]) for rows before `start`, in owner order"""
+    names = [f'_running_{n}' for n in range(len(statement.running))]
+    rows = queryset.filter(**{f'{statement.date_field}__lt': start}).order_by().values(statement.owner).annotate(
+        **{name: Sum(expression) for name, (_, expression) in zip(names, statement.running)}
+    ).order_by(statement.owner).values_list(statement.owner, *names)
+    for owner, *values in rows.iterator(chunk_size=chunk_size):
+        yield owner, [value or Decimal('0') for value in values]
+
+
+def statement_rows(kind, owner_ids=None, start=None, end=None, types=None, statuses=None, chunk_size=None):
+    """Yield one tuple per row, matching headers(kind), with running columns per owner.
+
+    `owner_ids` limits the export to those owners (None means everyone);
+    `start` and `end` are inclusive dates.
+    """
+    statement = STATEMENTS[kind]
+    chunk_size = chunk_size or settings.STATEMENT_EXPORT_CHUNK_SIZE
+    queryset = _filtered(statement, owner_ids, types, statuses)
+
+    openings = iter(())
+    if start:
+        openings = _openings(statement, queryset, _day_start(start), chunk_size)
+        queryset = queryset.filter(**{f'{statement.date_field}__gte': _day_start(start)})
+    if end:
+        queryset = queryset.filter(**{f'{statement.date_field}__lt': _day_start(end + timedelta(days=1))})
+
+    names = [f'_running_{n}' for n in range(len(statement.running))]
+    queryset = queryset.annotate(
+        **{name: expression for name, (_, expression) in zip(names, statement.running)}
+    ).order_by(statement.owner, statement.date_field, 'pk')
+    lookups = [lookup for _, lookup in statement.columns]
+    width = len(lookups)
+
+    pending_opening = next(openings, None)
+    current_owner = object()
+    totals = []
+    for row in queryset.values_list(*lookups, statement.owner, *names).iterator(chunk_size=chunk_size):
+        owner = row[width]
+        if owner != current_owner:
+            current_owner = owner
+            # Both streams are in owner order, so skip openings of owners with no rows in range
+            while pending_opening is not None and pending_opening[0] < owner:
+                pending_opening = next(openings, None)
+            if pending_opening is not None and pending_opening[0] == owner:
+                totals = list(pending_opening[1])
+            else:
+                totals = [Decimal('0')] * len(names)
+        for n, delta in enumerate(row[width + 1:]):
+            totals[n] += delta
+        yield row[:width] + tuple(totals)
+
+
+class _Echo:
+    """File-like object whose write() returns what it was given, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def encode(kind, rows, format='csv', batch_size=500):
+    """Yield CSV or JSON Lines text for `rows`, a few hundred rows per chunk"""
+    columns = headers(kind)
+    lines = []
+    if format == 'csv':
+        writer = csv.writer(_Echo())
+        lines.append(writer.writerow(columns))
+        render = writer.writerow
+    elif format == 'jsonl':
+        def render(row):
+            return json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n'
+    else:
+        raise ValueError(f'Unknown format {format!r}')
+
+    for row in rows:
+        lines.append(render(row))
+        if len(lines) >= batch_size:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+async def aiterate(chunks):
+    """Async iterator over `chunks`, pulling one chunk per sync_to_async call.
+
+    Under ASGI, StreamingHttpResponse given a sync iterator collects it into a
+    list before sending anything. Thread-sensitive calls keep the server-side
+    cursor on the connection that opened it.
+    """
+    chunks = iter(chunks)
+    done = object()
+    pull = sync_to_async(next, thread_sensitive=True)
+    while True:
+        chunk = await pull(chunks, done)
+        if chunk is done:
+            return
+        yield chunk
@@ -0,0 +1,229 @@
+"""Local stand-in for the Paystack and Flutterwave APIs.
+
+Used by benchmarks and local testing: point PAYSTACK_BASE_URL /
+FLUTTERWAVE_BASE_URL at `server.url` and every provider call stays on
+this machine. Latency and failures can be injected, for whole requests
+(`failure_rate`) or for single transfers in a bulk payout
+(`transfer_failure_rate`).
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from copy import deepcopy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.respond('GET')
+
+    def do_POST(self):
+        self.respond('POST')
+
+    def respond(self, method):
+        stub = self.server.stub
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}') if length else {}
+        stub.requests.append((method, self.path, body))
+
+        with stub.lock:
+            stub.in_flight += 1
+            stub.peak_in_flight = max(stub.peak_in_flight, stub.in_flight)
+        try:
+            if stub.delay:
+                time.sleep(stub.delay)
+            self.answer(stub, method, body)
+        finally:
+            with stub.lock:
+                stub.in_flight -= 1
+
+    def answer(self, stub, method, body):
+        if stub.failure_rate and random.random() < stub.failure_rate:
+            self.send_json(503, {'status': False, 'message': 'Service unavailable'})
+            return
+
+        route = stub.routes.get((method, self.path.split('?')[0].rstrip('/')))
+        if route is None:
+            for (route_method, prefix), handler in stub.prefix_routes.items():
+                if route_method == method and self.path.startswith(prefix):
+                    route = handler
+                    break
+        if route is None:
+            self.send_json(404, {'status': False, 'message': 'Not found'})
+            return
+
+        status, payload = route(self.path, body)
+        self.send_json(status, payload)
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for hundreds of simultaneous connections from concurrency tests
+    request_queue_size = 1024
+
+
+class StubProviderServer:
+    """Threaded HTTP server answering the provider endpoints we call"""
+
+    def __init__(self, host='127.0.0.1', port=0, delay=0, failure_rate=0, transfer_failure_rate=0):
+        self.delay = delay
+        self.failure_rate = failure_rate
+        self.transfer_failure_rate = transfer_failure_rate
+        self.requests = []
+        # reference -> transfer, to check that no payout is made twice
+        self.transfers = {}
+        self.duplicate_transfers = 0
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.routes = {
+            ('POST', '/transaction/initialize'): self.paystack_initialize,
+            ('POST', '/payments'): self.flutterwave_initialize,
+            ('POST', '/transferrecipient/bulk'): self.paystack_bulk_recipients,
+            ('POST', '/transfer/bulk'): self.paystack_bulk_transfer,
+        }
+        self.prefix_routes = {
+            ('GET', '/transaction/verify/'): self.paystack_verify,
+            ('GET', '/transfer/verify/'): self.paystack_verify_transfer,
+        }
+        self.httpd = StubHTTPServer((host, port), StubProviderHandler)
+        self.httpd.stub = self
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='stub-provider', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def paystack_initialize(self, path, body):
+        return 200, {
+            'status': True,
+            'message': 'Authorization URL created',
+            'data': {
+                'authorization_url': f"{self.url}/checkout/{body.get('reference')}",
+                'access_code': uuid.uuid4().hex[:12],
+                'reference': body.get('reference'),
+            },
+        }
+
+    def paystack_verify(self, path, body):
+        reference = path.rstrip('/').rsplit('/', 1)[-1]
+        return 200, {
+            'status': True,
+            'message': 'Verification successful',
+            'data': {
+                'id': random.randint(10 ** 8, 10 ** 9),
+                'status': 'success',
+                'reference': reference,
+                'currency': 'NGN',
+            },
+        }
+
+    def paystack_bulk_recipients(self, path, body):
+        success = []
+        for recipient in body.get('batch') or []:
+            success.append({
+                'recipient_code': f"RCP_{recipient.get('bank_code')}_{recipient.get('account_number')}",
+                'name': recipient.get('name'),
+                'type': recipient.get('type'),
+                'details': {
+                    'account_number': recipient.get('account_number'),
+                    'bank_code': recipient.get('bank_code'),
+                },
+            })
+        return 200, {
+            'status': True,
+            'message': 'Recipients added successfully',
+            'data': {'success': success, 'errors': []},
+        }
+
+    def paystack_bulk_transfer(self, path, body):
+        data = []
+        with self.lock:
+            for transfer in body.get('transfers') or []:
+                reference = transfer.get('reference')
+                if reference in self.transfers:
+                    # Paystack refuses a reference it has seen; report the original transfer
+                    self.duplicate_transfers += 1
+                else:
+                    failed = self.transfer_failure_rate and random.random() < self.transfer_failure_rate
+                    self.transfers[reference] = {
+                        'reference': reference,
+                        'recipient': transfer.get('recipient'),
+                        'amount': transfer.get('amount'),
+                        'currency': body.get('currency', 'NGN'),
+                        'transfer_code': f'TRF_{uuid.uuid4().hex[:12]}',
+                        'status': 'failed' if failed else 'success',
+                    }
+                data.append(dict(self.transfers[reference]))
+        return 200, {
+            'status': True,
+            'message': f'{len(data)} transfers queued.',
+            'data': data,
+        }
+
+    def paystack_verify_transfer(self, path, body):
+        reference = path.rstrip('/').rsplit('/', 1)[-1]
+        with self.lock:
+            transfer = self.transfers.get(reference)
+        if transfer is None:
+            return 404, {'status': False, 'message': 'Transfer not found'}
+        return 200, {'status': True, 'message': 'Transfer retrieved', 'data': dict(transfer)}
+
+    def flutterwave_initialize(self, path, body):
+        return 200, {
+            'status': 'success',
+            'message': 'Hosted Link',
+            'data': {'link': f"{self.url}/checkout/{body.get('tx_ref')}"},
+        }
+
+
+@contextmanager
+def stub_providers(**options):
+    """Run a StubProviderServer with `options` and point every PAYMENT_PROVIDERS client at it"""
+    from django.conf import settings
+    from django.test.utils import override_settings
+
+    from . import clients
+
+    with StubProviderServer(**options) as stub:
+        providers = deepcopy(settings.PAYMENT_PROVIDERS)
+        for config in providers.values():
+            config['BASE_URL'] = stub.url
+        with override_settings(PAYMENT_PROVIDERS=providers):
+            clients.reset_clients()
+            try:
+                yield stub
+            finally:
+                clients.reset_clients()
@@ -0,0 +1,33 @@
+from django.core.mail import send_mail
+
+from apps.jobs.queue import task
+
+from .models import Transaction
+from .webhooks import process_event
+
+
+@task(queue='payments', priority=10, max_attempts=8)
+def process_webhook_event(event_id):
+    # A failed event is retried by the queue with backoff; process_event records why it failed
+    if process_event(event_id) == 'failed':
+        raise RuntimeError(f'Webhook event {event_id} could not be applied')
+
+
+@task(queue='notifications')
+def notify_payment_confirmed(transaction_id):
+    payment = Transaction.objects.select_related('user', 'escrow__payee').get(pk=transaction_id)
+    if payment.user.email:
+        send_mail(
+            'Payment received',
+            f'Your payment of ₦{payment.amount:,.2f} ({payment.reference}) has been confirmed.',
+            None,
+            [payment.user.email],
+        )
+    payee = getattr(getattr(payment, 'escrow', None), 'payee', None)
+    if payee is not None and payee.email:
+        send_mail(
+            'New funded order',
+            f'{payment.description}. The payment is held in escrow until the work is approved.',
+            None,
+            [payee.email],
+        )
@@ -0,0 +1,98 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TransactionTestCase, override_settings
+
+from apps.payments.models import Wallet, WithdrawalRequest
+from apps.payments.payouts import process_payouts
+from apps.payments.stub import stub_providers
+
+User = get_user_model()
+
+
+class ProcessPayoutsTests(TransactionTestCase):
+    """process_payouts runs its provider calls on an event loop with its own
+    database connections, so the data has to be committed"""
+
+    WITHDRAWALS = 20
+    EARNED = Decimal('10000.00')
+    AMOUNT = Decimal('4000.00')
+
+    def setUp(self):
+        for n in range(self.WITHDRAWALS):
+            user = User.objects.create_user(username=f'payee_{n}', password=None)
+            wallet = Wallet.objects.create(user=user)
+            wallet.add_funds(self.EARNED, 'Sale')
+            # As request_withdrawal does: the money leaves the wallet when the request is made
+            self.assertTrue(wallet.withdraw_funds(self.AMOUNT))
+            WithdrawalRequest.objects.create(
+                user=user,
+                amount=self.AMOUNT,
+                method='bank_transfer',
+                account_details={'account_number': f'{n:010d}', 'bank_code': '058', 'account_name': f'Payee {n}'},
+                status='approved',
+            )
+
+    def test_completed_and_failed_transfers_are_recorded_and_failures_refunded(self):
+        with stub_providers(transfer_failure_rate=0.5) as stub:
+            report = process_payouts(batch_size=7, concurrency=3)
+
+        self.assertEqual(report['payouts'], self.WITHDRAWALS)
+        self.assertEqual(len(stub.transfers), self.WITHDRAWALS)
+        self.assertEqual(stub.duplicate_transfers, 0)
+        self.assertEqual(report['completed'] + report['failed'], self.WITHDRAWALS)
+        # 20 transfers failing at random half of the time
+        self.assertGreater(report['completed'], 0)
+        self.assertGreater(report['failed'], 0)
+
+        for withdrawal in WithdrawalRequest.objects.select_related('transaction', 'user__wallet'):
+            payment = withdrawal.transaction
+            wallet = withdrawal.user.wallet
+            sent = stub.transfers[payment.reference]
+            self.assertEqual(sent['amount'], int(self.AMOUNT * 100))
+            self.assertEqual(payment.provider_reference, sent['transfer_code'])
+            if sent['status'] == 'success':
+                self.assertEqual(withdrawal.status, 'completed')
+                self.assertEqual(payment.status, 'completed')
+                self.assertIsNotNone(payment.completed_at)
+                self.assertEqual(wallet.balance, self.EARNED - self.AMOUNT)
+                self.assertEqual(wallet.total_withdrawn, self.AMOUNT)
+            else:
+                self.assertEqual(withdrawal.status, 'rejected')
+                self.assertEqual(payment.status, 'failed')
+                self.assertIn('Payout failed', withdrawal.admin_notes)
+                self.assertEqual(wallet.balance, self.EARNED)
+                self.assertEqual(wallet.total_withdrawn, 0)
+            self.assertEqual(wallet.total_earned, self.EARNED)
+            self.assertIsNotNone(withdrawal.processed_at)
+
+        out = StringIO()
+        call_command('reconcile_wallets', stdout=out)
+        self.assertIn('All wallets match the journal', out.getvalue())
+
+    def test_rerun_pays_nothing_twice(self):
+        with stub_providers() as stub:
+            process_payouts()
+            report = process_payouts()
+
+        self.assertEqual(report['payouts'], 0)
+        self.assertEqual(len(stub.transfers), self.WITHDRAWALS)
+        self.assertEqual(stub.duplicate_transfers, 0)
+
+    @override_settings(DEBUG=False)
+    def test_stub_refuses_to_run_without_debug(self):
+        with self.assertRaises(CommandError):
+            call_command('process_payouts', stub=True, stdout=StringIO())
+
+        self.assertEqual(WithdrawalRequest.objects.filter(status='approved').count(), self.WITHDRAWALS)
+
+    @override_settings(DEBUG=True)
+    def test_stub_command_runs_with_debug(self):
+        out = StringIO()
+        call_command('process_payouts', stub=True, provider_delay=0, stdout=out)
+
+        self.assertIn(f'Stub received {self.WITHDRAWALS} transfers, 0 duplicates', out.getvalue())
+        self.assertEqual(WithdrawalRequest.objects.filter(status='completed').count(), self.WITHDRAWALS)
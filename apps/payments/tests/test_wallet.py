@@ -0,0 +1,98 @@
+import threading
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import close_old_connections, OperationalError
+from django.test import TestCase, TransactionTestCase
+
+from apps.payments import ledger
+from apps.payments.models import Wallet
+
+User = get_user_model()
+
+
+class ConcurrentWalletTests(TransactionTestCase):
+    THREADS = 8
+    OPERATIONS = 25
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='concurrent_wallet', password=None)
+        self.wallet = Wallet.objects.create(user=self.user)
+        # Enough for some but not all of the releases and withdrawals below
+        ledger.add_pending_funds(self.wallet, Decimal('5000'), 'Escrow')
+
+    def test_concurrent_operations_keep_wallet_and_journal_in_step(self):
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def worker(number):
+            operations = [ledger.release_pending_funds, ledger.withdraw_funds, ledger.add_pending_funds]
+            try:
+                barrier.wait()
+                for step in range(self.OPERATIONS):
+                    operation = operations[(number + step) % len(operations)]
+                    try:
+                        operation(self.wallet, Decimal(100 + 25 * number), 'Concurrent')
+                    except (ledger.InsufficientFunds, OperationalError):
+                        # Refused for lack of funds, or SQLite was busy; neither may change the wallet
+                        pass
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=worker, args=(number,)) for number in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.wallet.refresh_from_db()
+        expected = ledger.journal_balances([self.wallet.pk])[self.wallet.pk]
+        for field in ('balance', 'pending_balance', 'total_earned', 'total_withdrawn'):
+            self.assertEqual(getattr(self.wallet, field), expected[field], field)
+        self.assertGreaterEqual(self.wallet.balance, 0)
+        self.assertGreaterEqual(self.wallet.pending_balance, 0)
+        self.assertFalse(ledger.unbalanced_journals().exists())
+
+    def test_stress_command_finds_wallet_consistent(self):
+        out = StringIO()
+        call_command('stress_wallet', threads=4, operations=20, stdout=out)
+        self.assertIn('Wallet matches the journal', out.getvalue())
+
+
+class ReconcileWalletsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.opened = Wallet.objects.create(user=User.objects.create_user(username='opened', password=None))
+        ledger.add_funds(cls.opened, Decimal('300'), 'Sale')
+        # A balance from before the ledger existed
+        cls.legacy = Wallet.objects.create(
+            user=User.objects.create_user(username='legacy', password=None),
+            balance=Decimal('700'),
+            total_earned=Decimal('700'),
+        )
+
+    def test_fix_leaves_wallets_without_entries_alone(self):
+        Wallet.objects.filter(pk=self.opened.pk).update(balance=Decimal('999'))
+        out = StringIO()
+
+        call_command('reconcile_wallets', fix=True, stdout=out)
+
+        self.opened.refresh_from_db()
+        self.legacy.refresh_from_db()
+        self.assertEqual(self.opened.balance, Decimal('300'))
+        self.assertEqual(self.legacy.balance, Decimal('700'))
+        self.assertIn('Fixed 1 wallets', out.getvalue())
+        self.assertIn('1 wallets have balances but no ledger entries', out.getvalue())
+
+    def test_open_journals_legacy_balances(self):
+        out = StringIO()
+
+        call_command('reconcile_wallets', open=True, stdout=out)
+
+        self.assertEqual(ledger.journal_balances([self.legacy.pk])[self.legacy.pk]['balance'], Decimal('700'))
+        self.assertIn('All wallets match the journal', out.getvalue())
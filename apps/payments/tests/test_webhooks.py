@@ -0,0 +1,75 @@
+import json
+from io import StringIO
+from decimal import Decimal
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.payments.models import EscrowPayment, LedgerEntry, Transaction, Wallet, WebhookEvent
+
+User = get_user_model()
+
+PAYLOADS = Path(__file__).resolve().parent / 'payloads'
+
+# Recorded notifications: (provider, file)
+RECORDED = (
+    ('paystack', 'paystack_charge_success.json'),
+    ('flutterwave', 'flutterwave_charge_completed.json'),
+)
+
+
+class WebhookReplayTests(TestCase):
+    AMOUNT = Decimal('25000.00')
+    COMMISSION = Decimal('2500.00')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = User.objects.create_user(username='replay_buyer', password=None)
+        cls.seller = User.objects.create_user(username='replay_seller', password=None)
+
+    def pending_payment(self, provider, filename):
+        payload = json.loads((PAYLOADS / filename).read_text())
+        data = payload['data']
+        reference = data['reference'] if provider == 'paystack' else data['tx_ref']
+        payment = Transaction.objects.create(
+            reference=reference,
+            user=self.buyer,
+            transaction_type='payment',
+            amount=self.AMOUNT,
+        )
+        EscrowPayment.objects.create(
+            transaction=payment,
+            payer=self.buyer,
+            payee=self.seller,
+            amount=self.AMOUNT,
+            commission=self.COMMISSION,
+        )
+        return payment
+
+    def replay(self, provider, filename, replay=False):
+        call_command('process_webhooks', file=str(PAYLOADS / filename), provider=provider, replay=replay, stdout=StringIO())
+
+    def test_each_recorded_payload_credits_escrow_once(self):
+        for provider, filename in RECORDED:
+            with self.subTest(provider=provider):
+                payment = self.pending_payment(provider, filename)
+
+                # Delivered twice, then force-replayed
+                self.replay(provider, filename)
+                self.replay(provider, filename)
+                self.replay(provider, filename, replay=True)
+
+                payment.refresh_from_db()
+                self.assertEqual(payment.status, 'completed')
+                self.assertEqual(WebhookEvent.objects.filter(provider=provider, reference=payment.reference).count(), 1)
+                self.assertEqual(
+                    WebhookEvent.objects.get(provider=provider, reference=payment.reference).status, 'processed'
+                )
+                # One balanced escrow posting for the payment: a debit and a credit
+                self.assertEqual(LedgerEntry.objects.filter(transaction=payment).count(), 2)
+
+        wallet = Wallet.objects.get(user=self.seller)
+        self.assertEqual(wallet.pending_balance, (self.AMOUNT - self.COMMISSION) * len(RECORDED))
+        self.assertEqual(wallet.balance, 0)
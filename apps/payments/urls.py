@@ -6,8 +6,11 @@ app_name = 'payments'
 urlpatterns = [
     path('wallet/', views.wallet_dashboard, name='wallet_dashboard'),
     path('transactions/', views.TransactionListView.as_view(), name='transaction_list'),
+    path('statements/<str:kind>/', views.export_statement, name='export_statement'),
     path('pay/<int:order_id>/<str:order_type>/', views.initiate_payment, name='initiate_payment'),
     path('verify/', views.verify_payment, name='verify_payment'),
+    path('webhooks/paystack/', views.paystack_webhook, name='paystack_webhook'),
+    path('webhooks/flutterwave/', views.flutterwave_webhook, name='flutterwave_webhook'),
     path('withdraw/', views.request_withdrawal, name='request_withdrawal'),
     path('withdrawals/', views.withdrawal_history, name='withdrawal_history'),
 ]
\ No newline at end of file
@@ -3,29 +3,45 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.views.generic import ListView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction as db_transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from asgiref.sync import sync_to_async
 import json
 import uuid
+from decimal import Decimal
 from .models import Transaction, Wallet, WithdrawalRequest, PaymentMethod, EscrowPayment
 from .forms import WithdrawalRequestForm
 from .services import PaystackService, FlutterwaveService
+from .statements import STATEMENTS, statement_rows, encode, aiterate
+from apps.core.pagination import CursorPaginationMixin
+from apps.core.decorators import async_login_required
+from apps.analytics.rollups import daily_series, series_totals
+from .webhooks import record_event, enqueue_event, verify_paystack_signature, verify_flutterwave_signature
 
 @login_required
 def wallet_dashboard(request):
     wallet, created = Wallet.objects.get_or_create(user=request.user)
     recent_transactions = Transaction.objects.filter(user=request.user)[:10]
     
+    # Daily earnings for the chart, one rollup row per day
+    end = timezone.localdate()
+    earnings = daily_series(request.user.pk, end - timezone.timedelta(days=settings.ANALYTICS_DEFAULT_DAYS - 1), end)
+    
     context = {
         'wallet': wallet,
         'recent_transactions': recent_transactions,
+        'earnings': earnings,
+        'earnings_totals': series_totals(earnings),
     }
     return render(request, 'payments/wallet_dashboard.html', context)
 
-class TransactionListView(LoginRequiredMixin, ListView):
+class TransactionListView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     model = Transaction
     template_name = 'payments/transaction_list.html'
     context_object_name = 'transactions'
@@ -34,111 +50,182 @@ class TransactionListView(LoginRequiredMixin, ListView):
     def get_queryset(self):
         return Transaction.objects.filter(user=self.request.user).order_by('-created_at')
 
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
 @login_required
-def initiate_payment(request, order_id, order_type):
-    """Initiate payment for gig order or project"""
+def export_statement(request, kind):
+    """Stream a statement as CSV or JSON Lines.
+    
+    Query parameters: format (csv or jsonl), start and end (YYYY-MM-DD,
+    inclusive), type and status (repeatable). Staff may pass user=<id>, or
+    user=all for every user.
+    """
+    if kind not in STATEMENTS:
+        return HttpResponseBadRequest('Unknown statement.')
+    format = request.GET.get('format', 'csv')
+    if format not in EXPORT_CONTENT_TYPES:
+        return HttpResponseBadRequest('Format must be csv or jsonl.')
+    
+    owner_ids = [request.user.pk]
+    if request.user.is_staff and request.GET.get('user'):
+        if request.GET['user'] == 'all':
+            owner_ids = None
+        elif request.GET['user'].isdigit():
+            owner_ids = [int(request.GET['user'])]
+        else:
+            return HttpResponseBadRequest('Invalid user.')
+    
+    dates = {}
+    for name in ('start', 'end'):
+        value = request.GET.get(name)
+        try:
+            dates[name] = parse_date(value) if value else None
+        except ValueError:
+            dates[name] = None
+        if value and dates[name] is None:
+            return HttpResponseBadRequest(f'Invalid {name} date.')
+    
+    types = request.GET.getlist('type')
+    if types and not STATEMENTS[kind].type_field:
+        return HttpResponseBadRequest('This statement cannot be filtered by type.')
+    
+    rows = statement_rows(kind, owner_ids, dates['start'], dates['end'], types, request.GET.getlist('status'))
+    chunks = encode(kind, rows, format)
+    if isinstance(request, ASGIRequest):
+        # An async iterator is streamed as it is read instead of being collected first
+        chunks = aiterate(chunks)
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_CONTENT_TYPES[format])
+    response['Content-Disposition'] = f'attachment; filename="{kind}-{timezone.localdate():%Y%m%d}.{format}"'
+    return response
+
+@async_login_required
+async def initiate_payment(request, order_id, order_type):
+    """Initiate payment for gig order or project.
+    
+    Async so that waiting on Paystack does not hold a worker; the ORM work
+    runs in one sync_to_async call.
+    """
+    if order_type not in ('gig', 'project'):
+        messages.error(request, 'Invalid order type.')
+        return redirect('payments:wallet_dashboard')
+    
+    transaction = await sync_to_async(create_payment)(request.user, order_id, order_type)
+    
+    # Initialize payment with Paystack
+    paystack = PaystackService()
+    payment_url = await paystack.ainitialize_payment(
+        email=request.user.email,
+        amount=int(transaction.amount * 100),  # Paystack expects amount in kobo
+        reference=transaction.reference,
+        callback_url=request.build_absolute_uri('/payments/verify/')
+    )
+    
+    if payment_url:
+        return redirect(payment_url)
+    else:
+        messages.error(request, 'Failed to initialize payment. Please try again.')
+        return redirect('payments:wallet_dashboard')
+
+@db_transaction.atomic
+def create_payment(user, order_id, order_type):
+    """Create the pending transaction and its escrow for a gig order or accepted proposal"""
     if order_type == 'gig':
         from apps.gigs.models import GigOrder
-        order = get_object_or_404(GigOrder, id=order_id, buyer=request.user)
+        order = get_object_or_404(GigOrder.objects.select_related('gig__freelancer'), id=order_id, buyer=user)
         amount = order.total_price
         description = f"Payment for gig: {order.gig.title}"
-    elif order_type == 'project':
+    else:
         from apps.projects.models import ProjectProposal
-        proposal = get_object_or_404(ProjectProposal, id=order_id, status='accepted')
+        proposal = get_object_or_404(
+            ProjectProposal.objects.select_related('project__assigned_freelancer'), id=order_id, status='accepted'
+        )
         amount = proposal.proposed_amount
         description = f"Payment for project: {proposal.project.title}"
         order = proposal
-    else:
-        messages.error(request, 'Invalid order type.')
-        return redirect('payments:wallet_dashboard')
     
     # Calculate commission
-    commission = amount * settings.PLATFORM_COMMISSION_RATE
+    commission = (amount * Decimal(str(settings.PLATFORM_COMMISSION_RATE))).quantize(Decimal('0.01'))
     
     # Create transaction
     reference = f"PAY_{order_type.upper()}_{order_id}_{uuid.uuid4().hex[:8]}"
     transaction = Transaction.objects.create(
         reference=reference,
-        user=request.user,
+        user=user,
         transaction_type='payment',
         amount=amount,
         description=description,
-        **{f'{order_type}_order' if order_type == 'gig' else 'project': order}
+        **({'gig_order': order} if order_type == 'gig' else {'project': order.project})
     )
     
     # Create escrow payment
     payee = order.gig.freelancer if order_type == 'gig' else order.project.assigned_freelancer
     EscrowPayment.objects.create(
         transaction=transaction,
-        payer=request.user,
+        payer=user,
         payee=payee,
         amount=amount,
         commission=commission,
         auto_release_date=timezone.now() + timezone.timedelta(days=14)
     )
-    
-    # Initialize payment with Paystack
-    paystack = PaystackService()
-    payment_url = paystack.initialize_payment(
-        email=request.user.email,
-        amount=int(amount * 100),  # Paystack expects amount in kobo
-        reference=reference,
-        callback_url=request.build_absolute_uri('/payments/verify/')
-    )
-    
-    if payment_url:
-        return redirect(payment_url)
-    else:
-        messages.error(request, 'Failed to initialize payment. Please try again.')
-        return redirect('payments:wallet_dashboard')
+    return transaction
 
-@csrf_exempt
-def verify_payment(request):
-    """Verify payment from Paystack"""
-    reference = request.GET.get('reference')
+async def verify_payment(request):
+    """Payment callback page; the provider webhook confirms the payment"""
+    reference = request.GET.get('reference') or request.GET.get('tx_ref')
     
     if not reference:
         messages.error(request, 'Invalid payment reference.')
         return redirect('payments:wallet_dashboard')
     
     try:
-        transaction = Transaction.objects.get(reference=reference)
+        transaction = await Transaction.objects.aget(reference=reference)
     except Transaction.DoesNotExist:
         messages.error(request, 'Transaction not found.')
         return redirect('payments:wallet_dashboard')
     
-    # Verify with Paystack
-    paystack = PaystackService()
-    verification_result = paystack.verify_payment(reference)
-    
-    if verification_result and verification_result.get('status') == 'success':
-        transaction.status = 'completed'
-        transaction.provider_reference = verification_result.get('id')
-        transaction.provider_response = verification_result
-        transaction.completed_at = timezone.now()
-        transaction.save()
-        
-        # Add funds to escrow (pending balance)
-        if hasattr(transaction, 'escrow'):
-            wallet, created = Wallet.objects.get_or_create(user=transaction.escrow.payee)
-            wallet.add_pending_funds(transaction.amount - transaction.escrow.commission)
-        
+    # Only local state is read here, so refreshing this page never changes anything
+    if transaction.status == 'completed':
         messages.success(request, 'Payment completed successfully!')
-        
-        # Update order status
-        if transaction.gig_order:
-            transaction.gig_order.status = 'in_progress'
-            transaction.gig_order.save()
-        elif transaction.project:
-            transaction.project.status = 'in_progress'
-            transaction.project.save()
-    else:
-        transaction.status = 'failed'
-        transaction.save()
+    elif transaction.status in ('failed', 'cancelled'):
         messages.error(request, 'Payment verification failed.')
+    else:
+        messages.info(request, 'Your payment is being confirmed. This page will reflect it shortly.')
     
     return redirect('payments:wallet_dashboard')
 
+@csrf_exempt
+@require_POST
+def paystack_webhook(request):
+    """Receive Paystack events, store them and process them in the background"""
+    if not verify_paystack_signature(request.body, request.headers.get('x-paystack-signature')):
+        return HttpResponse(status=401)
+    return accept_webhook(request, 'paystack')
+
+@csrf_exempt
+@require_POST
+def flutterwave_webhook(request):
+    """Receive Flutterwave events, store them and process them in the background"""
+    if not verify_flutterwave_signature(request.headers.get('verif-hash')):
+        return HttpResponse(status=401)
+    return accept_webhook(request, 'flutterwave')
+
+def accept_webhook(request, provider):
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return HttpResponse(status=400)
+    
+    with db_transaction.atomic():
+        event, created = record_event(provider, payload)
+        if created:
+            enqueue_event(event)
+    
+    # Acknowledge duplicates too, so the provider stops retrying
+    return HttpResponse(status=200)
+
 @login_required
 def request_withdrawal(request):
     wallet, created = Wallet.objects.get_or_create(user=request.user)
@@ -148,14 +235,19 @@ def request_withdrawal(request):
         if form.is_valid():
             amount = form.cleaned_data['amount']
             
-            if wallet.balance >= amount:
+            with db_transaction.atomic():
                 withdrawal_request = form.save(commit=False)
                 withdrawal_request.user = request.user
                 withdrawal_request.save()
                 
-                # Deduct from wallet
-                wallet.withdraw_funds(amount)
-                
+                # Deduct from wallet; the balance check and the deduction are one UPDATE
+                if wallet.withdraw_funds(amount):
+                    submitted = True
+                else:
+                    db_transaction.set_rollback(True)
+                    submitted = False
+            
+            if submitted:
                 messages.success(request, 'Withdrawal request submitted successfully!')
                 return redirect('payments:wallet_dashboard')
             else:
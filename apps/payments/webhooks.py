@@ -0,0 +1,189 @@
+import hashlib
+import hmac
+import logging
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Transaction, Wallet, WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+# Events that confirm or fail a charge, per provider
+SUCCESS_EVENTS = {
+    'paystack': {'charge.success'},
+    'flutterwave': {'charge.completed'},
+}
+FAILURE_EVENTS = {
+    'paystack': {'charge.failed'},
+    'flutterwave': {'charge.failed'},
+}
+# Payout transfer events and whether the transfer went through
+TRANSFER_EVENTS = {
+    'paystack': {'transfer.success': True, 'transfer.failed': False},
+}
+# Transfers sent back by the bank, possibly after a success was reported
+REVERSAL_EVENTS = {
+    'paystack': {'transfer.reversed'},
+}
+
+
+def verify_paystack_signature(body, signature):
+    """Paystack signs the raw body with HMAC-SHA512 of the secret key"""
+    if not signature or not settings.PAYSTACK_SECRET_KEY:
+        return False
+    expected = hmac.new(settings.PAYSTACK_SECRET_KEY.encode(), body, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def verify_flutterwave_signature(signature):
+    """Flutterwave echoes the secret hash configured on the dashboard in `verif-hash`"""
+    if not signature or not settings.FLUTTERWAVE_WEBHOOK_HASH:
+        return False
+    return hmac.compare_digest(settings.FLUTTERWAVE_WEBHOOK_HASH, signature)
+
+
+def parse_event(provider, payload):
+    """Return (event_id, event_type, reference) for a provider payload"""
+    data = payload.get('data') or {}
+    event_type = payload.get('event') or payload.get('event.type') or ''
+    if provider == 'paystack':
+        reference = data.get('reference') or ''
+    else:
+        reference = data.get('tx_ref') or ''
+    event_id = f"{event_type}:{data.get('id') or reference}"
+    return event_id, event_type, reference
+
+
+def record_event(provider, payload):
+    """Store a verified notification; returns (event, created). Duplicates are not stored twice."""
+    event_id, event_type, reference = parse_event(provider, payload)
+    return WebhookEvent.objects.get_or_create(
+        provider=provider,
+        event_id=event_id,
+        defaults={
+            'event_type': event_type,
+            'reference': reference,
+            'payload': payload,
+        }
+    )
+
+
+def enqueue_event(event):
+    """Queue a job to process the event; it becomes visible to workers when the current transaction commits"""
+    from .tasks import process_webhook_event
+    process_webhook_event.enqueue(event.pk)
+
+
+def process_event(event_id, replay=False):
+    """Apply a stored notification. Safe to run any number of times for the same event."""
+    with transaction.atomic():
+        event = WebhookEvent.objects.select_for_update().get(pk=event_id)
+        if event.status in ('processed', 'ignored') and not replay:
+            return event.status
+
+        event.attempts += 1
+        try:
+            event.status = apply_event(event)
+            event.last_error = ''
+        except Exception as exc:
+            event.status = 'failed'
+            event.last_error = str(exc)
+            logger.exception('Could not apply %s webhook %s', event.provider, event.event_id)
+        event.processed_at = timezone.now()
+        event.save(update_fields=['status', 'attempts', 'last_error', 'processed_at'])
+        return event.status
+
+
+def apply_event(event):
+    data = event.payload.get('data') or {}
+    if not event.reference:
+        return 'ignored'
+
+    if event.event_type in SUCCESS_EVENTS.get(event.provider, ()):
+        if not charge_succeeded(event.provider, data):
+            fail_payment(event.reference, data)
+            return 'processed'
+        confirm_payment(event.reference, event.provider, data)
+        return 'processed'
+
+    if event.event_type in FAILURE_EVENTS.get(event.provider, ()):
+        fail_payment(event.reference, data)
+        return 'processed'
+
+    transfer_events = TRANSFER_EVENTS.get(event.provider, {})
+    if event.event_type in transfer_events:
+        from .payouts import settle_transfer
+        settle_transfer(event.reference, transfer_events[event.event_type], data)
+        return 'processed'
+
+    if event.event_type in REVERSAL_EVENTS.get(event.provider, ()):
+        from .payouts import reverse_transfer
+        reverse_transfer(event.reference, data)
+        return 'processed'
+
+    return 'ignored'
+
+
+def charge_succeeded(provider, data):
+    if provider == 'paystack':
+        return data.get('status') == 'success'
+    return data.get('status') == 'successful'
+
+
+def charged_amount(provider, data):
+    """Amount the provider says it collected, in naira"""
+    amount = Decimal(str(data.get('amount') or 0))
+    if provider == 'paystack':
+        return amount / 100  # kobo
+    return amount
+
+
+def confirm_payment(reference, provider, data):
+    """Complete a pending transaction, fund escrow and start the order. Idempotent per reference."""
+    with transaction.atomic():
+        try:
+            payment = Transaction.objects.select_for_update().get(reference=reference)
+        except Transaction.DoesNotExist:
+            logger.warning('%s webhook for unknown reference %s', provider, reference)
+            return False
+
+        if payment.status == 'completed':
+            return False
+
+        if charged_amount(provider, data) < payment.amount:
+            raise ValueError(f'Charged amount {data.get("amount")} is less than {payment.amount} for {reference}')
+
+        payment.status = 'completed'
+        payment.provider_reference = str(data.get('id') or '')
+        payment.provider_response = data
+        payment.completed_at = timezone.now()
+        payment.save()
+
+        # Add funds to escrow (pending balance)
+        if hasattr(payment, 'escrow'):
+            wallet, created = Wallet.objects.get_or_create(user=payment.escrow.payee)
+            wallet.add_pending_funds(payment.amount - payment.escrow.commission, payment)
+
+        # Update order status
+        if payment.gig_order:
+            payment.gig_order.status = 'in_progress'
+            payment.gig_order.save()
+        elif payment.project:
+            payment.project.status = 'in_progress'
+            payment.project.save()
+
+        from .tasks import notify_payment_confirmed
+        notify_payment_confirmed.enqueue(payment.pk)
+        return True
+
+
+def fail_payment(reference, data):
+    """Mark a still-pending transaction as failed"""
+    return Transaction.objects.filter(reference=reference, status__in=['pending', 'processing']).update(
+        status='failed',
+        provider_response=data,
+        updated_at=timezone.now(),
+    )
@@ -48,6 +48,15 @@ class Project(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # The public project list only shows open projects
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(status='open'), name='project_open_recent'),
+            models.Index(
+                fields=['project_type', 'experience_level', '-created_at'],
+                condition=models.Q(status='open'), name='project_open_type_level'
+            ),
+            models.Index(fields=['status', '-created_at'], name='project_status_recent'),
+        ]
     
     def __str__(self):
         return self.title
@@ -123,4 +132,17 @@ class ProjectView(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     
     class Meta:
-        unique_together = ('project', 'user', 'ip_address')
\ No newline at end of file
+        unique_together = ('project', 'user', 'ip_address')
+
+class ProjectViewDaily(models.Model):
+    """Unique viewers per project per day, maintained by the view tracking pipeline"""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='daily_views')
+    date = models.DateField()
+    unique_views = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('project', 'date')
+        ordering = ['-date']
+    
+    def __str__(self):
+        return f"{self.project.title} - {self.date}: {self.unique_views}"
\ No newline at end of file
@@ -0,0 +1,54 @@
+import time
+
+import numpy as np
+from scipy import sparse
+
+from django.core.management.base import BaseCommand
+
+from apps.projects.matching import (
+    BUDGET_BANDS, EXPERIENCE_LEVELS, Vectors, normalize_rows, to_distribution, top_matches,
+)
+
+
+class Command(BaseCommand):
+    help = 'Time matching on synthetic vectors (default 100k projects x 50k freelancers), without the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=100000)
+        parser.add_argument('--freelancers', type=int, default=50000)
+        parser.add_argument('--skills', type=int, default=2000, help='Size of the skill vocabulary')
+        parser.add_argument('--skills-per-project', type=int, default=5)
+        parser.add_argument('--skills-per-freelancer', type=int, default=15)
+        parser.add_argument('--top-k', type=int, default=50)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+
+        start = time.perf_counter()
+        projects = self.vectors(rng, options['projects'], options['skills'], options['skills_per_project'])
+        freelancers = self.vectors(rng, options['freelancers'], options['skills'], options['skills_per_freelancer'])
+        self.stdout.write(f'Built vectors in {time.perf_counter() - start:.1f}s')
+
+        start = time.perf_counter()
+        scored = candidates = 0
+        for row, project_rows, scores in top_matches(freelancers, projects, options['top_k'], options['batch_size']):
+            scored += 1
+            candidates += len(project_rows)
+        seconds = time.perf_counter() - start
+
+        self.stdout.write(
+            f"{options['freelancers']} freelancers x {options['projects']} projects: {seconds:.1f}s, "
+            f'{scored / seconds:.0f} freelancers/s, {candidates / max(scored, 1):.1f} matches each'
+        )
+
+    def vectors(self, rng, count, vocabulary, per_row):
+        # Skill popularity follows a power law, as on the site
+        popularity = 1 / np.arange(1, vocabulary + 1)
+        columns = rng.choice(vocabulary, size=count * per_row, p=popularity / popularity.sum())
+        rows = np.repeat(np.arange(count), per_row)
+        skills = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, columns)), shape=(count, vocabulary))
+        experience = np.eye(len(EXPERIENCE_LEVELS), dtype=np.float32)[rng.integers(len(EXPERIENCE_LEVELS), size=count)]
+        budget = np.eye(len(BUDGET_BANDS), dtype=np.float32)[rng.integers(len(BUDGET_BANDS), size=count)]
+        return Vectors(list(range(count)), normalize_rows(skills), to_distribution(experience), to_distribution(budget))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.projects.matching import compute_matches
+
+
+class Command(BaseCommand):
+    help = 'Score freelancers against open projects and cache the top matches per freelancer (run on a schedule)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=None)
+        parser.add_argument('--batch-size', type=int, default=None, help='Freelancers scored per matrix product')
+        parser.add_argument('--user', type=int, action='append', dest='users', help='Only recompute these user ids')
+
+    def handle(self, *args, **options):
+        freelancers, projects, seconds = compute_matches(options['top_k'], options['batch_size'], options['users'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Matched {freelancers} freelancers against {projects} open projects in {seconds:.1f}s'
+        ))
@@ -0,0 +1,259 @@
+"""Skill-based project recommendations for freelancers.
+
+Open projects and freelancers are encoded over the same columns: a sparse
+vector over the Skill vocabulary plus small dense experience-level and
+budget-band distributions. A freelancer's vector comes from the skills
+and prices of their active gigs and from the projects where their
+proposal was accepted. Scores are computed batch by batch as sparse
+matrix products, so only projects sharing at least one skill are scored.
+The top K projects per freelancer are cached until the next scheduled run
+of `manage.py compute_matches`.
+"""
+import time
+from collections import namedtuple
+
+import numpy as np
+from scipy import sparse
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.search.facets import PROJECT_BUDGET_BANDS, band_for
+
+EXPERIENCE_LEVELS = ('entry', 'intermediate', 'expert')
+BUDGET_BANDS = tuple(band[0] for band in PROJECT_BUDGET_BANDS)
+
+# Contribution of each part to a score; skill overlap dominates
+SKILL_WEIGHT = 1.0
+EXPERIENCE_WEIGHT = 0.3
+BUDGET_WEIGHT = 0.2
+# A skill used on an accepted project counts more than one listed on a gig
+ACCEPTED_WEIGHT = 2.0
+
+CACHE_KEY = 'matches:{user_id}'
+
+# ids: row -> object id; skills: CSR (rows x skills); experience, budget: dense (rows x levels/bands)
+Vectors = namedtuple('Vectors', ['ids', 'skills', 'experience', 'budget'])
+
+
+def skill_columns():
+    from apps.accounts.models import Skill
+    return {skill_id: column for column, skill_id in enumerate(Skill.objects.order_by('pk').values_list('pk', flat=True))}
+
+
+def normalize_rows(matrix):
+    """Scale each CSR row to unit L2 norm (empty rows stay empty)"""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags((1 / norms).astype(np.float32)).dot(matrix).tocsr()
+
+
+def to_distribution(array):
+    """Scale each dense row to sum to 1 (all-zero rows stay zero)"""
+    totals = array.sum(axis=1, keepdims=True)
+    totals[totals == 0] = 1
+    return array / totals
+
+
+def _skill_matrix(rows, columns, values, shape):
+    # Duplicate (row, column) pairs are summed by the constructor
+    return sparse.csr_matrix(
+        (np.asarray(values, dtype=np.float32), (np.asarray(rows, dtype=np.int32), np.asarray(columns, dtype=np.int32))),
+        shape=shape,
+    )
+
+
+def project_vectors(projects, columns):
+    """Vectors for a Project queryset"""
+    from .models import Project
+
+    ids = list(projects.order_by('pk').values_list('pk', flat=True))
+    index = {pk: row for row, pk in enumerate(ids)}
+    experience = np.zeros((len(ids), len(EXPERIENCE_LEVELS)), dtype=np.float32)
+    budget = np.zeros((len(ids), len(BUDGET_BANDS)), dtype=np.float32)
+
+    rows, cols = [], []
+    through = Project.skills_required.through
+    for project_id, skill_id in through.objects.filter(project__in=projects).values_list('project_id', 'skill_id').iterator():
+        if project_id in index and skill_id in columns:
+            rows.append(index[project_id])
+            cols.append(columns[skill_id])
+
+    for pk, level, budget_max in projects.values_list('pk', 'experience_level', 'budget_max').iterator():
+        # Each query sees its own snapshot; skip projects created after ids was read
+        if pk not in index:
+            continue
+        if level in EXPERIENCE_LEVELS:
+            experience[index[pk], EXPERIENCE_LEVELS.index(level)] = 1
+        band = band_for(budget_max, PROJECT_BUDGET_BANDS)
+        if band:
+            budget[index[pk], BUDGET_BANDS.index(band)] = 1
+
+    skills = _skill_matrix(rows, cols, [1] * len(rows), (len(ids), len(columns)))
+    return Vectors(ids, normalize_rows(skills), experience, budget)
+
+
+def freelancer_vectors(columns, user_ids=None):
+    """Vectors for every user with an active gig or an accepted proposal"""
+    from apps.gigs.models import Gig
+    from .models import Project, ProjectProposal
+
+    gigs = Gig.objects.filter(is_active=True)
+    accepted = ProjectProposal.objects.filter(status='accepted')
+    if user_ids is not None:
+        gigs = gigs.filter(freelancer_id__in=user_ids)
+        accepted = accepted.filter(freelancer_id__in=user_ids)
+
+    ids = sorted(set(gigs.values_list('freelancer_id', flat=True)) | set(accepted.values_list('freelancer_id', flat=True)))
+    index = {pk: row for row, pk in enumerate(ids)}
+    experience = np.zeros((len(ids), len(EXPERIENCE_LEVELS)), dtype=np.float32)
+    budget = np.zeros((len(ids), len(BUDGET_BANDS)), dtype=np.float32)
+    rows, cols, values = [], [], []
+
+    # Gigs and proposals may appear while the queries below run; rows for
+    # freelancers missing from ids are skipped
+    for freelancer_id, skill_id in Gig.skills.through.objects.filter(gig__in=gigs).values_list(
+        'gig__freelancer_id', 'skill_id'
+    ).iterator():
+        if freelancer_id in index and skill_id in columns:
+            rows.append(index[freelancer_id])
+            cols.append(columns[skill_id])
+            values.append(1)
+
+    for freelancer_id, price in gigs.values_list('freelancer_id', 'basic_price').iterator():
+        band = band_for(price, PROJECT_BUDGET_BANDS)
+        if band and freelancer_id in index:
+            budget[index[freelancer_id], BUDGET_BANDS.index(band)] += 1
+
+    freelancers_by_project = {}
+    for freelancer_id, project_id, level, amount in accepted.values_list(
+        'freelancer_id', 'project_id', 'project__experience_level', 'proposed_amount'
+    ).iterator():
+        if freelancer_id not in index:
+            continue
+        freelancers_by_project.setdefault(project_id, []).append(freelancer_id)
+        if level in EXPERIENCE_LEVELS:
+            experience[index[freelancer_id], EXPERIENCE_LEVELS.index(level)] += 1
+        band = band_for(amount, PROJECT_BUDGET_BANDS)
+        if band:
+            budget[index[freelancer_id], BUDGET_BANDS.index(band)] += ACCEPTED_WEIGHT
+
+    through = Project.skills_required.through
+    for project_id, skill_id in through.objects.filter(
+        project_id__in=accepted.values('project_id')
+    ).values_list('project_id', 'skill_id').iterator():
+        if skill_id not in columns:
+            continue
+        for freelancer_id in freelancers_by_project.get(project_id, ()):
+            rows.append(index[freelancer_id])
+            cols.append(columns[skill_id])
+            values.append(ACCEPTED_WEIGHT)
+
+    skills = _skill_matrix(rows, cols, values, (len(ids), len(columns)))
+    # Damp repeated skills so one heavily listed skill does not swamp the rest
+    skills.data = np.log1p(skills.data)
+    return Vectors(ids, normalize_rows(skills), to_distribution(experience), to_distribution(budget))
+
+
+def exclusion_matrix(freelancers, projects, queryset):
+    """Freelancer x project CSR with 1 where the project must not be recommended
+    (the freelancer posted it or already sent a proposal)
+
+    `queryset` is the one `projects` was built from; it is used as a subquery
+    rather than binding every project id.
+    """
+    from .models import ProjectProposal
+
+    freelancer_rows = {pk: row for row, pk in enumerate(freelancers.ids)}
+    project_rows = {pk: row for row, pk in enumerate(projects.ids)}
+    pairs = set(
+        ProjectProposal.objects.filter(project__in=queryset.values('pk')).values_list('freelancer_id', 'project_id').iterator()
+    )
+    pairs.update(queryset.values_list('client_id', 'pk').iterator())
+
+    rows, cols = [], []
+    for freelancer_id, project_id in pairs:
+        # Projects opened since the vectors were built have no column
+        if freelancer_id in freelancer_rows and project_id in project_rows:
+            rows.append(freelancer_rows[freelancer_id])
+            cols.append(project_rows[project_id])
+    return _skill_matrix(rows, cols, [1] * len(rows), (len(freelancers.ids), len(projects.ids)))
+
+
+def top_matches(freelancers, projects, k, batch_size=1000, exclude=None):
+    """Yield (freelancer row, project rows, scores) with the k best projects per freelancer, best first"""
+    project_skills = projects.skills.T.tocsr()
+    for start in range(0, len(freelancers.ids), batch_size):
+        stop = min(start + batch_size, len(freelancers.ids))
+        scores = (freelancers.skills[start:stop] @ project_skills).tocsr()
+        if exclude is not None:
+            scores = (scores - scores.multiply(exclude[start:stop])).tocsr()
+            scores.eliminate_zeros()
+        scores.data *= SKILL_WEIGHT
+
+        # Experience and budget only adjust projects that already share a skill
+        batch_rows = np.repeat(np.arange(start, stop), np.diff(scores.indptr))
+        scores.data += EXPERIENCE_WEIGHT * np.einsum(
+            'ij,ij->i', freelancers.experience[batch_rows], projects.experience[scores.indices]
+        )
+        scores.data += BUDGET_WEIGHT * np.einsum(
+            'ij,ij->i', freelancers.budget[batch_rows], projects.budget[scores.indices]
+        )
+
+        for offset in range(stop - start):
+            begin, end = scores.indptr[offset], scores.indptr[offset + 1]
+            data = scores.data[begin:end]
+            columns = scores.indices[begin:end]
+            if len(data) > k:
+                best = np.argpartition(-data, k - 1)[:k]
+            else:
+                best = np.arange(len(data))
+            best = best[np.argsort(-data[best], kind='stable')]
+            yield start + offset, columns[best], data[best]
+
+
+def compute_matches(k=None, batch_size=None, user_ids=None):
+    """Score freelancers against all open projects and cache each one's top k.
+
+    Returns (freelancers scored, projects scored, seconds).
+    """
+    from .models import Project
+
+    k = k or settings.MATCHING_TOP_K
+    batch_size = batch_size or settings.MATCHING_BATCH_SIZE
+    started = time.perf_counter()
+
+    columns = skill_columns()
+    open_projects = Project.objects.filter(status='open')
+    projects = project_vectors(open_projects, columns)
+    freelancers = freelancer_vectors(columns, user_ids)
+    exclude = exclusion_matrix(freelancers, projects, open_projects)
+
+    entries = {}
+    for row, project_rows, scores in top_matches(freelancers, projects, k, batch_size, exclude):
+        # Written even when empty so last run's matches do not linger
+        entries[CACHE_KEY.format(user_id=freelancers.ids[row])] = [
+            (projects.ids[project_row], round(float(score), 4)) for project_row, score in zip(project_rows, scores)
+        ]
+        if len(entries) >= batch_size:
+            cache.set_many(entries, settings.MATCHING_CACHE_TIMEOUT)
+            entries = {}
+    if entries:
+        cache.set_many(entries, settings.MATCHING_CACHE_TIMEOUT)
+
+    return len(freelancers.ids), len(projects.ids), time.perf_counter() - started
+
+
+def recommended_projects(user, limit=10):
+    """Cached matches for `user` that are still open, best first, each with a `match_score`"""
+    from .models import Project
+
+    matches = cache.get(CACHE_KEY.format(user_id=user.pk))
+    if not matches:
+        return []
+    scores = dict(matches)
+    projects = Project.objects.filter(pk__in=scores, status='open').exclude(proposals__freelancer=user).select_related('client')
+    projects = sorted(projects, key=lambda project: -scores[project.pk])[:limit]
+    for project in projects:
+        project.match_score = scores[project.pk]
+    return projects
@@ -0,0 +1,44 @@
+from django.core.mail import send_mail, send_mass_mail
+from django.conf import settings
+from django.db import transaction
+
+from apps.jobs.queue import task
+
+from .models import ProjectProposal
+
+
+@task(queue='default', priority=5)
+def reject_other_proposals(project_id, accepted_proposal_id):
+    """Reject the remaining proposals of a project once one was accepted, and tell their authors"""
+    # If sending fails the rejections roll back, so the retry finds the same
+    # proposals still pending and mails them again instead of nobody
+    with transaction.atomic():
+        rejected = list(
+            ProjectProposal.objects.filter(project_id=project_id, status='pending')
+            .exclude(pk=accepted_proposal_id)
+            .select_related('freelancer', 'project')
+            .select_for_update(of=('self',))
+        )
+        ProjectProposal.objects.filter(pk__in=[proposal.pk for proposal in rejected]).update(status='rejected')
+
+        send_mass_mail([
+            (
+                'Proposal not selected',
+                f'The client chose another proposal for "{proposal.project.title}". Thank you for applying.',
+                settings.DEFAULT_FROM_EMAIL,
+                [proposal.freelancer.email],
+            )
+            for proposal in rejected if proposal.freelancer.email
+        ])
+
+
+@task(queue='notifications')
+def notify_proposal_accepted(proposal_id):
+    proposal = ProjectProposal.objects.select_related('freelancer', 'project').get(pk=proposal_id)
+    if proposal.freelancer.email:
+        send_mail(
+            'Proposal accepted',
+            f'Your proposal for "{proposal.project.title}" was accepted.',
+            None,
+            [proposal.freelancer.email],
+        )
@@ -0,0 +1,186 @@
+import atexit
+import hashlib
+import logging
+import os
+import queue
+import threading
+from collections import Counter, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import F, Case, When, Value
+from django.utils import timezone
+
+from .models import ProjectView, ProjectViewDaily
+
+logger = logging.getLogger(__name__)
+
+ViewEvent = namedtuple('ViewEvent', ['project_id', 'user_id', 'ip_address', 'date'])
+
+
+class BloomFilter:
+    """Fixed-size set membership test with no false negatives"""
+
+    def __init__(self, bits=2 ** 20, hashes=7):
+        self.bits = bits
+        self.hashes = hashes
+        self._array = bytearray(bits // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.bits for i in range(self.hashes)]
+
+    def add(self, key):
+        """Add `key`; returns False if it was (probably) already present"""
+        added = False
+        for position in self._positions(key):
+            byte, bit = divmod(position, 8)
+            if not self._array[byte] & (1 << bit):
+                self._array[byte] |= 1 << bit
+                added = True
+        return added
+
+
+class ProjectViewPipeline:
+    """Append-only project view tracking.
+
+    Request handlers only put an event on an in-process queue. A background
+    consumer drains it in batches, drops repeat viewers with a per-day Bloom
+    filter, inserts ProjectView rows with bulk_create(ignore_conflicts=True)
+    and bumps the per-project daily unique-view rollups.
+    """
+
+    def __init__(self, max_queue=10000, batch_size=500, flush_interval=5):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._consumer = None
+        self._seen = {}
+
+    def track(self, project_id, user_id, ip_address):
+        """Record a view without touching the database"""
+        self._check_fork()
+        event = ViewEvent(project_id, user_id, ip_address, timezone.localdate())
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            logger.warning('Project view queue is full, dropping view of project %s', project_id)
+            return
+        self._start_consumer()
+
+    def flush(self):
+        """Drain and write everything queued so far"""
+        self._check_fork()
+        while True:
+            events = self._take(block=False)
+            if not events:
+                return
+            self.process(events)
+
+    def process(self, events):
+        events = self._dedupe(events)
+        if not events:
+            return
+
+        with transaction.atomic():
+            ProjectView.objects.bulk_create(
+                [ProjectView(project_id=e.project_id, user_id=e.user_id, ip_address=e.ip_address) for e in events],
+                ignore_conflicts=True
+            )
+            self._update_rollups(Counter((e.project_id, e.date) for e in events))
+
+    def _update_rollups(self, counts):
+        ProjectViewDaily.objects.bulk_create(
+            [ProjectViewDaily(project_id=project_id, date=date) for project_id, date in counts],
+            ignore_conflicts=True
+        )
+
+        by_date = {}
+        for (project_id, date), count in counts.items():
+            by_date.setdefault(date, {})[project_id] = count
+
+        for date, project_counts in by_date.items():
+            increment = Case(
+                *[When(project_id=project_id, then=Value(count)) for project_id, count in project_counts.items()],
+                default=Value(0)
+            )
+            ProjectViewDaily.objects.filter(date=date, project_id__in=list(project_counts)).update(
+                unique_views=F('unique_views') + increment
+            )
+
+    def _dedupe(self, events):
+        unique = []
+        for event in events:
+            seen = self._seen.get(event.date)
+            if seen is None:
+                # New day: forget older filters, keep at most yesterday's for late events
+                self._seen = {date: f for date, f in self._seen.items() if (event.date - date).days < 2}
+                seen = self._seen[event.date] = BloomFilter(bits=getattr(settings, 'PROJECT_VIEW_DEDUPE_BITS', 2 ** 23))
+            if seen.add((event.project_id, event.user_id, event.ip_address)):
+                unique.append(event)
+        return unique
+
+    def _take(self, block=True):
+        events = []
+        try:
+            events.append(self._queue.get(block=block, timeout=self.flush_interval if block else None))
+            while len(events) < self.batch_size:
+                events.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return events
+
+    def _check_fork(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid != pid:
+                self._queue = queue.Queue(maxsize=self.max_queue)
+                self._consumer = None
+                self._seen = {}
+                self._pid = pid
+
+    def _start_consumer(self):
+        if self._consumer is not None:
+            return
+        with self._lock:
+            if self._consumer is not None:
+                return
+            self._consumer = threading.Thread(target=self._run_consumer, name='project-view-consumer', daemon=True)
+            self._consumer.start()
+
+    def _run_consumer(self):
+        while True:
+            events = self._take()
+            if not events:
+                continue
+            try:
+                self.process(events)
+            except DatabaseError:
+                logger.exception('Failed to write %d project view events', len(events))
+            finally:
+                close_old_connections()
+
+
+project_view_pipeline = ProjectViewPipeline(
+    max_queue=getattr(settings, 'PROJECT_VIEW_QUEUE_SIZE', 10000),
+    batch_size=getattr(settings, 'PROJECT_VIEW_BATCH_SIZE', 500),
+)
+atexit.register(project_view_pipeline.flush)
+
+
+def daily_unique_views(project, days=30):
+    """(date, unique_views) pairs for the last `days` days, read from the rollup table"""
+    since = timezone.localdate() - timedelta(days=days - 1)
+    return list(
+        ProjectViewDaily.objects.filter(project=project, date__gte=since)
+        .order_by('date')
+        .values_list('date', 'unique_views')
+    )
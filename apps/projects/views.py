@@ -2,16 +2,24 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db.models import Q, Count
+from django.db import transaction
+from django.db.models import Count
 from django.views.generic import ListView, DetailView, CreateView, UpdateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from .models import Project, ProjectProposal, ProjectMilestone
 from .forms import ProjectForm, ProjectProposalForm, MilestoneForm
-from apps.accounts.models import Skill
+from .tracking import project_view_pipeline, daily_unique_views
+from .matching import recommended_projects
+from .tasks import reject_other_proposals, notify_proposal_accepted
+from apps.search.documents import search_queryset, search_ids
+from apps.search.facets import project_facets, project_selection, band_filter, PROJECT_BUDGET_BANDS
+from apps.core.pagination import CursorPaginationMixin
+from apps.core.cache import CachedPageMixin, PROJECTS, skills
 
-class ProjectListView(ListView):
+class ProjectListView(CachedPageMixin, CursorPaginationMixin, ListView):
     model = Project
+    cache_namespace = PROJECTS
     template_name = 'projects/project_list.html'
     context_object_name = 'projects'
     paginate_by = 12
@@ -19,29 +27,27 @@ class ProjectListView(ListView):
     def get_queryset(self):
         queryset = Project.objects.filter(status='open').select_related('client').prefetch_related('skills_required')
         
-        # Search functionality
-        search = self.request.GET.get('search')
-        if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) | 
-                Q(description__icontains=search) |
-                Q(skills_required__name__icontains=search)
-            ).distinct()
-        
-        # Filter by skills
+        # Filter by skills (any of); a subquery so a project matching several skills is listed once
         skills = self.request.GET.getlist('skills')
         if skills:
-            queryset = queryset.filter(skills_required__id__in=skills)
+            queryset = queryset.filter(
+                pk__in=Project.skills_required.through.objects.filter(skill_id__in=skills).values('project_id')
+            )
         
         # Filter by project type
-        project_type = self.request.GET.get('project_type')
-        if project_type:
-            queryset = queryset.filter(project_type=project_type)
+        project_types = self.request.GET.getlist('project_type')
+        if project_types:
+            queryset = queryset.filter(project_type__in=project_types)
         
         # Filter by experience level
-        experience_level = self.request.GET.get('experience_level')
-        if experience_level:
-            queryset = queryset.filter(experience_level=experience_level)
+        experience_levels = self.request.GET.getlist('experience_level')
+        if experience_levels:
+            queryset = queryset.filter(experience_level__in=experience_levels)
+        
+        # Budget bands picked from the sidebar
+        budget_bands = self.request.GET.getlist('budget')
+        if budget_bands:
+            queryset = queryset.filter(band_filter('budget_max', PROJECT_BUDGET_BANDS, budget_bands))
         
         # Filter by budget range
         budget_min = self.request.GET.get('budget_min')
@@ -51,12 +57,31 @@ class ProjectListView(ListView):
         if budget_max:
             queryset = queryset.filter(budget_max__lte=budget_max)
         
-        return queryset.annotate(proposal_count=Count('proposals'))
+        # Search functionality, after the filters so the result cap counts filtered hits
+        search = self.request.GET.get('search')
+        self.search_hits = None
+        if search:
+            queryset = search_queryset(queryset, search)
+            # Facet counts apply the selection themselves, so they take the unfiltered hits
+            self.search_hits = search_ids(Project, search)
+        
+        queryset = queryset.annotate(proposal_count=Count('proposals'))
+        
+        # Best matches first when searching
+        if search:
+            queryset = queryset.order_by('search_rank')
+        
+        return queryset
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['all_skills'] = Skill.objects.all()
+        context['all_skills'] = skills()
         context['search_query'] = self.request.GET.get('search', '')
+        # Result counts for every filter value, from the in-memory facet bitmaps
+        context['facets'] = project_facets.counts(project_selection(self.request.GET), self.search_hits)
+        context['budget_bands'] = PROJECT_BUDGET_BANDS
+        if self.request.user.is_authenticated:
+            context['recommended_projects'] = recommended_projects(self.request.user, 5)
         return context
 
 class ProjectDetailView(DetailView):
@@ -66,7 +91,7 @@ class ProjectDetailView(DetailView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        project = self.get_object()
+        project = self.object
         context['proposals'] = project.proposals.select_related('freelancer').order_by('-created_at')
         context['user_proposal'] = None
         
@@ -76,15 +101,13 @@ class ProjectDetailView(DetailView):
             except ProjectProposal.DoesNotExist:
                 pass
         
-        # Track project view
+        # Track project view (queued, written in the background)
         if self.request.user.is_authenticated:
-            from .models import ProjectView
-            ProjectView.objects.get_or_create(
-                project=project,
-                user=self.request.user,
-                ip_address=self.get_client_ip(),
-                defaults={'ip_address': self.get_client_ip()}
-            )
+            project_view_pipeline.track(project.id, self.request.user.id, self.get_client_ip())
+        
+        # The client sees unique views per day, read from the rollups
+        if self.request.user.is_authenticated and self.request.user.pk == project.client_id:
+            context['daily_views'] = daily_unique_views(project)
         
         return context
     
@@ -174,18 +197,18 @@ def accept_proposal(request, proposal_id):
     proposal = get_object_or_404(ProjectProposal, id=proposal_id, project__client=request.user)
     
     if proposal.project.status == 'open':
-        proposal.status = 'accepted'
-        proposal.save()
-        
-        # Update project status and assign freelancer
-        proposal.project.status = 'in_progress'
-        proposal.project.assigned_freelancer = proposal.freelancer
-        proposal.project.save()
-        
-        # Reject other proposals
-        ProjectProposal.objects.filter(
-            project=proposal.project
-        ).exclude(id=proposal.id).update(status='rejected')
+        with transaction.atomic():
+            proposal.status = 'accepted'
+            proposal.save()
+            
+            # Update project status and assign freelancer
+            proposal.project.status = 'in_progress'
+            proposal.project.assigned_freelancer = proposal.freelancer
+            proposal.project.save()
+            
+            # Rejecting the other proposals and emailing everyone happens in the background
+            reject_other_proposals.enqueue(proposal.project_id, proposal.id)
+            notify_proposal_accepted.enqueue(proposal.id)
         
         messages.success(request, f'Proposal from {proposal.freelancer.username} has been accepted!')
     else:
@@ -40,4 +40,69 @@ class ReviewResponse(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
-        return f"Response to review by {self.review.reviewer.username}"
\ No newline at end of file
+        return f"Response to review by {self.review.reviewer.username}"
+
+class RatingAggregate(models.Model):
+    """Running totals of public reviews, kept current as reviews are saved"""
+    review_count = models.PositiveIntegerField(default=0)
+    rating_total = models.PositiveIntegerField(default=0)
+    communication_total = models.PositiveIntegerField(default=0)
+    quality_total = models.PositiveIntegerField(default=0)
+    timeliness_total = models.PositiveIntegerField(default=0)
+    
+    # Histogram of overall ratings
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        abstract = True
+    
+    def _average(self, total):
+        return total / self.review_count if self.review_count else None
+    
+    @property
+    def average_rating(self):
+        return self._average(self.rating_total)
+    
+    @property
+    def average_communication(self):
+        return self._average(self.communication_total)
+    
+    @property
+    def average_quality(self):
+        return self._average(self.quality_total)
+    
+    @property
+    def average_timeliness(self):
+        return self._average(self.timeliness_total)
+    
+    @property
+    def distribution(self):
+        return {i: getattr(self, f'stars_{i}') for i in range(1, 6)}
+    
+    def as_stats(self):
+        """Same keys as the aggregate() the review pages used to run"""
+        return {
+            'average_rating': self.average_rating,
+            'total_reviews': self.review_count,
+            'average_communication': self.average_communication,
+            'average_quality': self.average_quality,
+            'average_timeliness': self.average_timeliness,
+        }
+
+class UserRating(RatingAggregate):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='rating_aggregate')
+    
+    def __str__(self):
+        return f"{self.user.username} ({self.review_count} reviews)"
+
+class GigRating(RatingAggregate):
+    gig = models.OneToOneField('gigs.Gig', on_delete=models.CASCADE, related_name='rating_aggregate')
+    
+    def __str__(self):
+        return f"{self.gig.title} ({self.review_count} reviews)"
@@ -0,0 +1,115 @@
+from django.db.models import F, Q, Count, Sum, Value, IntegerField
+from django.db.models.functions import Coalesce
+
+from .models import Review, UserRating, GigRating
+
+DIMENSIONS = ('communication', 'quality', 'timeliness')
+AGGREGATE_FIELDS = [
+    'review_count', 'rating_total', 'communication_total', 'quality_total', 'timeliness_total',
+    'stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5',
+]
+
+
+def review_gig_id(review):
+    if not review.gig_order_id:
+        return None
+    from apps.gigs.models import GigOrder
+    return GigOrder.objects.filter(pk=review.gig_order_id).values_list('gig_id', flat=True).first()
+
+
+def contribution(review):
+    """What one review adds to an aggregate, or None if it does not count"""
+    if not review.is_public:
+        return None
+    return {
+        'rating': review.rating,
+        'communication': review.communication,
+        'quality': review.quality,
+        'timeliness': review.timeliness,
+        'gig_id': review_gig_id(review),
+        'reviewee_id': review.reviewee_id,
+    }
+
+
+def _changes(values, sign):
+    changes = {
+        'review_count': F('review_count') + sign,
+        'rating_total': F('rating_total') + sign * values['rating'],
+        f"stars_{values['rating']}": F(f"stars_{values['rating']}") + sign,
+    }
+    for dimension in DIMENSIONS:
+        changes[f'{dimension}_total'] = F(f'{dimension}_total') + sign * values[dimension]
+    return changes
+
+
+def apply(values, sign):
+    """Add (sign=1) or remove (sign=-1) one review's contribution with single-row UPDATEs"""
+    if values is None:
+        return
+
+    changes = _changes(values, sign)
+    UserRating.objects.get_or_create(user_id=values['reviewee_id'])
+    UserRating.objects.filter(user_id=values['reviewee_id']).update(**changes)
+
+    if values['gig_id']:
+        GigRating.objects.get_or_create(gig_id=values['gig_id'])
+        GigRating.objects.filter(gig_id=values['gig_id']).update(**changes)
+        sync_gig(values['gig_id'])
+
+
+def sync_gig(gig_id):
+    """Keep Gig.rating (used for sorting) equal to the aggregate average"""
+    from apps.gigs.models import Gig
+
+    aggregate = GigRating.objects.get(gig_id=gig_id)
+    Gig.objects.filter(pk=gig_id).update(rating=aggregate.average_rating or 0)
+
+
+def _totals(reviews, group_by):
+    zero = Value(0, output_field=IntegerField())
+    annotations = {
+        'review_count': Count('id'),
+        'rating_total': Coalesce(Sum('rating'), zero),
+    }
+    for dimension in DIMENSIONS:
+        annotations[f'{dimension}_total'] = Coalesce(Sum(dimension), zero)
+    for stars in range(1, 6):
+        annotations[f'stars_{stars}'] = Count('id', filter=Q(rating=stars))
+    return reviews.values(group_by).annotate(**annotations).order_by()
+
+
+def rebuild(batch_size=1000):
+    """Recompute every aggregate from the reviews table; returns (users, gigs)"""
+    from apps.gigs.models import Gig
+
+    reviews = Review.objects.filter(is_public=True)
+
+    users = [
+        UserRating(user_id=row.pop('reviewee'), **row)
+        for row in _totals(reviews, 'reviewee')
+    ]
+    UserRating.objects.exclude(user_id__in=reviews.values('reviewee')).delete()
+    UserRating.objects.bulk_create(
+        users, batch_size=batch_size,
+        update_conflicts=True, unique_fields=['user'], update_fields=AGGREGATE_FIELDS,
+    )
+
+    gig_reviews = reviews.filter(gig_order__isnull=False)
+    gigs = [
+        GigRating(gig_id=row.pop('gig_order__gig'), **row)
+        for row in _totals(gig_reviews, 'gig_order__gig')
+    ]
+    GigRating.objects.exclude(gig_id__in=gig_reviews.values('gig_order__gig')).delete()
+    GigRating.objects.bulk_create(
+        gigs, batch_size=batch_size,
+        update_conflicts=True, unique_fields=['gig'], update_fields=AGGREGATE_FIELDS,
+    )
+
+    # Denormalised sort column
+    Gig.objects.exclude(pk__in=gig_reviews.values('gig_order__gig')).exclude(rating=0).update(rating=0)
+    Gig.objects.bulk_update(
+        [Gig(pk=rating.gig_id, rating=rating.average_rating) for rating in gigs],
+        ['rating'], batch_size=batch_size,
+    )
+
+    return len(users), len(gigs)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.reviews.aggregates import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute user and gig rating aggregates (and Gig.rating) from all public reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            users, gigs = rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rating aggregates for {users} users and {gigs} gigs.'))
@@ -0,0 +1,24 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import aggregates
+from .models import Review
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_contribution(sender, instance, **kwargs):
+    previous = None
+    if instance.pk:
+        previous = Review.objects.filter(pk=instance.pk).first()
+    instance._previous_contribution = aggregates.contribution(previous) if previous else None
+
+
+@receiver(post_save, sender=Review)
+def update_rating_aggregates(sender, instance, **kwargs):
+    aggregates.apply(getattr(instance, '_previous_contribution', None), -1)
+    aggregates.apply(aggregates.contribution(instance), 1)
+
+
+@receiver(post_delete, sender=Review)
+def remove_from_rating_aggregates(sender, instance, **kwargs):
+    aggregates.apply(aggregates.contribution(instance), -1)
@@ -3,9 +3,14 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.views.generic import ListView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Avg, Count
-from .models import Review, ReviewResponse
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from .models import Review, ReviewResponse, UserRating
 from .forms import ReviewForm, ReviewResponseForm
+from apps.core.pagination import CursorPaginationMixin
+from apps.core.cache import cache_anonymous_page, REVIEWS
+
+User = get_user_model()
 
 @login_required
 def create_review(request, order_id, order_type):
@@ -46,10 +51,9 @@ def create_review(request, order_id, order_type):
             else:
                 review.project = order
                 
-            review.save()
-            
-            # Update reviewee's rating
-            update_user_rating(reviewee)
+            # Rating aggregates are updated in the same transaction (see signals)
+            with transaction.atomic():
+                review.save()
             
             messages.success(request, 'Review submitted successfully!')
             return redirect('reviews:user_reviews', user_id=reviewee.id)
@@ -64,24 +68,16 @@ def create_review(request, order_id, order_type):
     }
     return render(request, 'reviews/create_review.html', context)
 
+@cache_anonymous_page(REVIEWS)
 def user_reviews(request, user_id):
     """Display all reviews for a specific user"""
     user = get_object_or_404(User, id=user_id)
     reviews = Review.objects.filter(reviewee=user, is_public=True).select_related('reviewer').order_by('-created_at')
     
-    # Calculate statistics
-    stats = reviews.aggregate(
-        average_rating=Avg('rating'),
-        total_reviews=Count('id'),
-        average_communication=Avg('communication'),
-        average_quality=Avg('quality'),
-        average_timeliness=Avg('timeliness')
-    )
-    
-    # Rating distribution
-    rating_distribution = {}
-    for i in range(1, 6):
-        rating_distribution[i] = reviews.filter(rating=i).count()
+    # Statistics are maintained incrementally as reviews are saved
+    rating = UserRating.objects.filter(user=user).first() or UserRating(user=user)
+    stats = rating.as_stats()
+    rating_distribution = rating.distribution
     
     context = {
         'reviewed_user': user,
@@ -119,21 +115,10 @@ def respond_to_review(request, review_id):
     }
     return render(request, 'reviews/respond_to_review.html', context)
 
-class MyReviewsView(LoginRequiredMixin, ListView):
+class MyReviewsView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     template_name = 'reviews/my_reviews.html'
     context_object_name = 'reviews'
     paginate_by = 10
     
     def get_queryset(self):
-        return Review.objects.filter(reviewer=self.request.user).select_related('reviewee').order_by('-created_at')
-
-def update_user_rating(user):
-    """Update user's overall rating based on reviews"""
-    reviews = Review.objects.filter(reviewee=user)
-    if reviews.exists():
-        avg_rating = reviews.aggregate(avg=Avg('rating'))['avg']
-        
-        # Update freelancer profile if exists
-        if hasattr(user, 'freelancer_profile'):
-            user.freelancer_profile.success_rate = (avg_rating / 5) * 100
-            user.freelancer_profile.save()
\ No newline at end of file
+        return Review.objects.filter(reviewer=self.request.user).select_related('reviewee').order_by('-created_at')
\ No newline at end of file
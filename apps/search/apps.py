@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.search'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .backends import ensure_search_schema
+
+        post_migrate.connect(ensure_search_schema, sender=self)
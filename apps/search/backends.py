@@ -0,0 +1,204 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils.module_loading import import_string
+
+from .models import SearchDocument
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    """Split a raw user query into plain word tokens"""
+    return TOKEN_RE.findall(query.lower())[:10]
+
+
+class BaseSearchBackend:
+    """Keeps the full-text structures in step with SearchDocument rows"""
+
+    def ensure_schema(self):
+        """Create any auxiliary tables or indexes the backend needs"""
+
+    def index(self, documents):
+        """Called after the given SearchDocument rows were written"""
+
+    def remove(self, document_ids):
+        """Called before the given SearchDocument rows are deleted"""
+
+    def rebuild(self):
+        """Re-index every SearchDocument row"""
+
+    def search(self, kind, query, limit, offset=0):
+        """Return object ids of the given kind, best match first"""
+        raise NotImplementedError
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """Fallback for databases without full-text support.
+
+    Still a scan, but over one narrow table instead of the catalogue
+    joined through the skills M2M table.
+    """
+
+    def search(self, kind, query, limit, offset=0):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        documents = SearchDocument.objects.filter(kind=kind)
+        for token in tokens:
+            documents = documents.filter(
+                Q(title__icontains=token) |
+                Q(body__icontains=token) |
+                Q(skills__icontains=token) |
+                Q(category__icontains=token)
+            )
+
+        # Title matches first, then most recently updated
+        title_matches = Q()
+        for token in tokens:
+            title_matches &= Q(title__icontains=token)
+        documents = documents.annotate(
+            title_match=Case(When(title_matches, then=Value(1)), default=Value(0), output_field=IntegerField())
+        )
+        ranked = documents.order_by('-title_match', '-updated_at', '-id').values_list('object_id', flat=True)
+        return list(ranked[offset:offset + limit])
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """SQLite FTS5 virtual table, ranked with bm25()"""
+
+    # Column weights for bm25(): title, body, skills, category
+    WEIGHTS = (10.0, 1.0, 5.0, 2.0)
+
+    @property
+    def table(self):
+        return f'{SearchDocument._meta.db_table}_fts'
+
+    def ensure_schema(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                f"kind UNINDEXED, object_id UNINDEXED, title, body, skills, category, "
+                f"tokenize='porter unicode61')"
+            )
+
+    def index(self, documents):
+        rows = [
+            (doc.id, doc.kind, doc.object_id, doc.title, doc.body, doc.skills, doc.category)
+            for doc in documents
+        ]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(row[0],) for row in rows])
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, kind, object_id, title, body, skills, category) "
+                f"VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                rows
+            )
+
+    def remove(self, document_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(pk,) for pk in document_ids])
+
+    def rebuild(self):
+        self.ensure_schema()
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, kind, object_id, title, body, skills, category) "
+                f"SELECT id, kind, object_id, title, body, skills, category FROM {SearchDocument._meta.db_table}"
+            )
+
+    def search(self, kind, query, limit, offset=0):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        # Quote every token so user input can never be parsed as FTS syntax,
+        # and prefix-match the last one so partial words still hit.
+        match = ' '.join(f'"{token}"' for token in tokens[:-1])
+        match = f'{match} "{tokens[-1]}"*'.strip()
+        weights = ', '.join(str(weight) for weight in self.WEIGHTS)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT object_id FROM {self.table} "
+                f"WHERE {self.table} MATCH %s AND kind = %s "
+                f"ORDER BY bm25({self.table}, 0, 0, {weights}), rowid LIMIT %s OFFSET %s",
+                [match, kind, limit, offset]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Generated tsvector column with a GIN index, ranked with ts_rank_cd()"""
+
+    CONFIG = 'english'
+
+    @property
+    def table(self):
+        return SearchDocument._meta.db_table
+
+    def ensure_schema(self):
+        config = self.CONFIG
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"ALTER TABLE {self.table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                f"GENERATED ALWAYS AS ("
+                f"setweight(to_tsvector('{config}', coalesce(title, '')), 'A') || "
+                f"setweight(to_tsvector('{config}', coalesce(skills, '')), 'B') || "
+                f"setweight(to_tsvector('{config}', coalesce(category, '')), 'C') || "
+                f"setweight(to_tsvector('{config}', coalesce(body, '')), 'D')"
+                f") STORED"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_vector_gin "
+                f"ON {self.table} USING GIN (search_vector)"
+            )
+
+    def search(self, kind, query, limit, offset=0):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        # Prefix-match every token, all of them required
+        tsquery = ' & '.join(f'{token}:*' for token in tokens)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT object_id FROM {self.table} "
+                f"WHERE kind = %s AND search_vector @@ to_tsquery('{self.CONFIG}', %s) "
+                f"ORDER BY ts_rank_cd(search_vector, to_tsquery('{self.CONFIG}', %s)) DESC, id DESC "
+                f"LIMIT %s OFFSET %s",
+                [kind, tsquery, tsquery, limit, offset]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+VENDOR_BACKENDS = {
+    'sqlite': SQLiteFTSBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+_backend = None
+
+
+def get_backend():
+    """Return the configured search backend, picking one from the database vendor by default"""
+    global _backend
+    if _backend is None:
+        backend_path = getattr(settings, 'SEARCH_BACKEND', None)
+        if backend_path:
+            backend_class = import_string(backend_path)
+        else:
+            backend_class = VENDOR_BACKENDS.get(connection.vendor, SimpleSearchBackend)
+        _backend = backend_class()
+    return _backend
+
+
+def ensure_search_schema(sender, **kwargs):
+    """post_migrate hook: make sure the backend's tables and indexes exist"""
+    get_backend().ensure_schema()
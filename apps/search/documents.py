@@ -0,0 +1,132 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, When, Value, IntegerField
+
+from .backends import get_backend
+from .models import SearchDocument
+
+
+def gig_document(gig):
+    """Build the search document fields for a gig"""
+    return {
+        'kind': 'gig',
+        'object_id': gig.id,
+        'title': gig.title,
+        'body': gig.description,
+        'skills': ' '.join(skill.name for skill in gig.skills.all()),
+        'category': gig.category.name if gig.category_id else '',
+    }
+
+
+def project_document(project):
+    """Build the search document fields for a project"""
+    return {
+        'kind': 'project',
+        'object_id': project.id,
+        'title': project.title,
+        'body': project.description,
+        'skills': ' '.join(skill.name for skill in project.skills_required.all()),
+        'category': f"{project.get_project_type_display()} {project.get_experience_level_display()}",
+    }
+
+
+def document_kind(model):
+    from apps.gigs.models import Gig
+    from apps.projects.models import Project
+
+    if issubclass(model, Gig):
+        return 'gig'
+    if issubclass(model, Project):
+        return 'project'
+    raise ValueError(f"{model.__name__} is not searchable")
+
+
+def build_document(instance):
+    if document_kind(type(instance)) == 'gig':
+        return gig_document(instance)
+    return project_document(instance)
+
+
+def index_objects(instances):
+    """Write (or overwrite) the search documents for the given gigs/projects"""
+    documents = [SearchDocument(**build_document(instance)) for instance in instances]
+    if not documents:
+        return
+    SearchDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['title', 'body', 'skills', 'category', 'updated_at'],
+    )
+    # bulk_create does not hand back ids for updated rows on every backend
+    kind = documents[0].kind
+    saved = SearchDocument.objects.filter(kind=kind, object_id__in=[doc.object_id for doc in documents])
+    get_backend().index(list(saved))
+
+
+def remove_objects(kind, object_ids):
+    """Drop the search documents for the given object ids"""
+    documents = SearchDocument.objects.filter(kind=kind, object_id__in=object_ids)
+    get_backend().remove(list(documents.values_list('id', flat=True)))
+    documents.delete()
+
+
+def schedule_index(instance):
+    """Re-index an object once the current transaction commits"""
+    model = type(instance)
+    pk = instance.pk
+    transaction.on_commit(lambda: reindex(model, [pk]))
+
+
+def reindex(model, pks):
+    """Reload the given objects from the database and re-index them"""
+    queryset = model.objects.filter(pk__in=pks)
+    if document_kind(model) == 'gig':
+        queryset = queryset.select_related('category').prefetch_related('skills')
+    else:
+        queryset = queryset.prefetch_related('skills_required')
+    index_objects(list(queryset))
+
+
+def search_ids(model, query, limit=None, queryset=None):
+    """Ranked object ids for a free-text query.
+
+    With `queryset`, only hits inside it are returned and `limit` counts
+    those, so listing filters never drop matches ranked below the limit.
+    Hits are read from the backend a page at a time until enough pass.
+    """
+    limit = limit or getattr(settings, 'SEARCH_MAX_RESULTS', 1000)
+    backend = get_backend()
+    kind = document_kind(model)
+    if queryset is None:
+        return backend.search(kind, query, limit)
+
+    hits = []
+    offset = 0
+    while len(hits) < limit:
+        ids = backend.search(kind, query, limit, offset)
+        if not ids:
+            break
+        allowed = set(queryset.filter(pk__in=ids).values_list('pk', flat=True))
+        hits.extend(pk for pk in ids if pk in allowed)
+        if len(ids) < limit:
+            break
+        offset += limit
+    return hits[:limit]
+
+
+def search_queryset(queryset, query, limit=None, ids=None):
+    """Restrict a queryset to search hits, annotated with a `search_rank` (0 = best)
+
+    Apply the listing's filters first: hits are limited after filtering.
+    """
+    if ids is None:
+        ids = search_ids(queryset.model, query, limit, queryset=queryset)
+    if not ids:
+        return queryset.none()
+
+    ranking = Case(
+        *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)],
+        output_field=IntegerField()
+    )
+    return queryset.filter(pk__in=ids).annotate(search_rank=ranking)
@@ -0,0 +1,393 @@
+"""Facet counts from in-memory bitmaps.
+
+Each process keeps one bitmap (a Python int, bit n = object id n) per
+facet value over the active gigs / open projects. Counts for a request
+are popcounts of bitmap intersections, so no GROUP BY runs per request.
+Bitmaps are built once, then kept current by replaying the FacetChange
+log written by the save/delete signals, so every worker converges on the
+same state without a broker. Full builds run in a background thread; only
+requests that arrive before a process's first build has finished wait.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import FacetChange
+
+# (key, label, lower bound inclusive, upper bound exclusive)
+GIG_PRICE_BANDS = (
+    ('under-5k', 'Under ₦5,000', 0, 5000),
+    ('5k-20k', '₦5,000 - ₦20,000', 5000, 20000),
+    ('20k-50k', '₦20,000 - ₦50,000', 20000, 50000),
+    ('50k-150k', '₦50,000 - ₦150,000', 50000, 150000),
+    ('150k-plus', '₦150,000 and above', 150000, None),
+)
+DELIVERY_BANDS = (
+    ('1', 'Up to 1 day', 0, 2),
+    ('3', 'Up to 3 days', 2, 4),
+    ('7', 'Up to 7 days', 4, 8),
+    ('14', 'Up to 14 days', 8, 15),
+    ('14-plus', 'More than 14 days', 15, None),
+)
+PROJECT_BUDGET_BANDS = (
+    ('under-50k', 'Under ₦50,000', 0, 50000),
+    ('50k-200k', '₦50,000 - ₦200,000', 50000, 200000),
+    ('200k-1m', '₦200,000 - ₦1,000,000', 200000, 1000000),
+    ('1m-plus', '₦1,000,000 and above', 1000000, None),
+)
+
+logger = logging.getLogger(__name__)
+
+# A larger backlog of changes is cheaper to apply by rebuilding
+MAX_REPLAY = 5000
+
+
+def band_for(value, bands):
+    if value is None:
+        return None
+    for key, label, low, high in bands:
+        if value >= low and (high is None or value < high):
+            return key
+    return None
+
+
+def bands_overlapping(bands, low=None, high=None):
+    """Band keys that can contain values in [low, high] (for free-form range filters)"""
+    keys = []
+    for key, label, band_low, band_high in bands:
+        if high is not None and band_low > high:
+            continue
+        if low is not None and band_high is not None and band_high <= low:
+            continue
+        keys.append(key)
+    return keys
+
+
+def to_bitmap(ids):
+    if not ids:
+        return 0
+    bits = bytearray(max(ids) // 8 + 1)
+    for pk in ids:
+        bits[pk >> 3] |= 1 << (pk & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def popcount(value):
+    return bin(value).count('1')
+
+
+class FacetIndex:
+    """Bitmaps for one kind of object; subclasses say which rows count and their facet values"""
+    kind = None
+    facets = ()
+
+    def __init__(self, refresh_interval=None):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._bitmaps = None
+        self._members = {}
+        self._all = 0
+        self._checked_at = 0
+        # Replay position: the highest change id seen, the time of the last poll and
+        # the change ids already applied inside the overlap window
+        self._last_change = 0
+        self._synced_at = None
+        self._applied = {}
+        self._building = False
+        self._build_lock = threading.Lock()
+        self._ready = threading.Event()
+
+    def get_refresh_interval(self):
+        if self.refresh_interval is not None:
+            return self.refresh_interval
+        return getattr(settings, 'FACET_REFRESH_INTERVAL', 5)
+
+    def rows(self, ids=None):
+        """Yield (id, {facet: [values]}) for countable objects, optionally only `ids`"""
+        raise NotImplementedError
+
+    def get_change_overlap(self):
+        return timedelta(seconds=getattr(settings, 'FACET_CHANGE_OVERLAP', 60))
+
+    def build(self):
+        started = timezone.now()
+        last_change = FacetChange.objects.filter(kind=self.kind).order_by('-id').values_list('id', flat=True).first() or 0
+        postings = defaultdict(lambda: defaultdict(list))
+        members = {}
+        for pk, values in self.rows():
+            members[pk] = values
+            for facet, facet_values in values.items():
+                for value in facet_values:
+                    postings[facet][value].append(pk)
+
+        bitmaps = {facet: {value: to_bitmap(ids) for value, ids in postings[facet].items()} for facet in self.facets}
+        with self._lock:
+            self._bitmaps = bitmaps
+            self._members = members
+            self._all = to_bitmap(list(members))
+            self._last_change = last_change
+            # Changes still uncommitted when the build read the rows are replayed from here
+            self._synced_at = started
+            self._applied = {}
+            self._checked_at = time.monotonic()
+        self._ready.set()
+
+    def build_in_background(self):
+        """Start a build unless one is running; current bitmaps keep being served meanwhile"""
+        with self._build_lock:
+            if self._building:
+                return
+            self._building = True
+        threading.Thread(target=self._background_build, name=f'facets-{self.kind}', daemon=True).start()
+
+    def _background_build(self):
+        try:
+            self.build()
+        except Exception:
+            logger.exception('Could not build %s facet bitmaps', self.kind)
+        finally:
+            with self._build_lock:
+                self._building = False
+            # Wake requests waiting for a first build even if it failed
+            self._ready.set()
+            connection.close()
+
+    def refresh(self, force=False):
+        """Apply changes logged since the last refresh (at most once per refresh interval).
+
+        Change ids are taken before the writer's transaction commits, so a
+        change can appear below the highest id already seen. Every poll
+        therefore re-reads the changes logged within FACET_CHANGE_OVERLAP of
+        the previous one and applies those it has not applied yet.
+        """
+        if self._bitmaps is None:
+            self.build_in_background()
+            self._ready.wait()
+            return
+        if self._building:
+            # The build's overlap window picks up whatever changes in the meantime
+            return
+        if not force and time.monotonic() - self._checked_at < self.get_refresh_interval():
+            return
+
+        polled_at = timezone.now()
+        window_start = self._synced_at - self.get_change_overlap()
+        logged = FacetChange.objects.filter(kind=self.kind).filter(
+            Q(id__gt=self._last_change) | Q(created_at__gte=window_start)
+        )
+        changes = [
+            change for change in logged.order_by('id').values_list('id', 'object_id', 'created_at')
+            if change[0] not in self._applied
+        ]
+        if len(changes) > MAX_REPLAY:
+            self.build_in_background()
+            return
+
+        self._checked_at = time.monotonic()
+        ids = {object_id for change_id, object_id, created_at in changes}
+        current = dict(self.rows(ids)) if ids else {}
+        with self._lock:
+            for pk in ids:
+                self._remove(pk)
+                if pk in current:
+                    self._add(pk, current[pk])
+            for change_id, object_id, created_at in changes:
+                self._applied[change_id] = created_at
+                self._last_change = max(self._last_change, change_id)
+            # Forget applied ids that the next window no longer reaches
+            next_start = polled_at - self.get_change_overlap()
+            self._applied = {
+                change_id: created_at for change_id, created_at in self._applied.items() if created_at >= next_start
+            }
+            self._synced_at = polled_at
+
+    def _add(self, pk, values):
+        bit = 1 << pk
+        self._members[pk] = values
+        self._all |= bit
+        for facet, facet_values in values.items():
+            for value in facet_values:
+                self._bitmaps[facet][value] = self._bitmaps[facet].get(value, 0) | bit
+
+    def _remove(self, pk):
+        values = self._members.pop(pk, None)
+        if values is None:
+            return
+        bit = 1 << pk
+        self._all &= ~bit
+        for facet, facet_values in values.items():
+            for value in facet_values:
+                self._bitmaps[facet][value] &= ~bit
+
+    def _selection_mask(self, facet, values):
+        mask = 0
+        for value in values:
+            mask |= self._bitmaps[facet].get(value, 0)
+        return mask
+
+    def counts(self, selected=None, restrict_ids=None):
+        """{facet: {value: count}} for the current selection.
+
+        `selected` maps facets to the chosen values (OR within a facet, AND
+        across facets). Each facet is counted against every other facet's
+        selection but not its own, so alternatives stay visible.
+        `restrict_ids` limits counts to e.g. the ids of search hits.
+        Returns None if the bitmaps could not be built.
+        """
+        self.refresh()
+        if self._bitmaps is None:
+            return None
+        selected = {facet: values for facet, values in (selected or {}).items() if values and facet in self.facets}
+
+        with self._lock:
+            base = self._all
+            if restrict_ids is not None:
+                base &= to_bitmap(list(restrict_ids))
+            masks = {facet: self._selection_mask(facet, values) for facet, values in selected.items()}
+
+            result = {}
+            for facet in self.facets:
+                mask = base
+                for other, other_mask in masks.items():
+                    if other != facet:
+                        mask &= other_mask
+                result[facet] = {
+                    value: popcount(mask & bitmap)
+                    for value, bitmap in self._bitmaps[facet].items()
+                    if bitmap
+                }
+            total = base
+            for other_mask in masks.values():
+                total &= other_mask
+            result['total'] = popcount(total)
+        return result
+
+
+class GigFacets(FacetIndex):
+    kind = 'gig'
+    facets = ('category', 'skills', 'price', 'delivery')
+
+    def rows(self, ids=None):
+        from apps.gigs.models import Gig
+
+        gigs = Gig.objects.filter(is_active=True)
+        if ids is not None:
+            gigs = gigs.filter(pk__in=ids)
+
+        skills = defaultdict(list)
+        for gig_id, skill_id in Gig.skills.through.objects.filter(gig__in=gigs).values_list('gig_id', 'skill_id').iterator():
+            skills[gig_id].append(skill_id)
+
+        for pk, category_id, price, delivery in gigs.values_list(
+            'pk', 'category_id', 'basic_price', 'basic_delivery_time'
+        ).iterator():
+            yield pk, {
+                'category': [category_id],
+                'skills': skills.get(pk, []),
+                'price': [band for band in [band_for(price, GIG_PRICE_BANDS)] if band],
+                'delivery': [band for band in [band_for(delivery, DELIVERY_BANDS)] if band],
+            }
+
+
+class ProjectFacets(FacetIndex):
+    kind = 'project'
+    facets = ('skills', 'project_type', 'experience_level', 'budget')
+
+    def rows(self, ids=None):
+        from apps.projects.models import Project
+
+        projects = Project.objects.filter(status='open')
+        if ids is not None:
+            projects = projects.filter(pk__in=ids)
+
+        skills = defaultdict(list)
+        through = Project.skills_required.through
+        for project_id, skill_id in through.objects.filter(project__in=projects).values_list('project_id', 'skill_id').iterator():
+            skills[project_id].append(skill_id)
+
+        for pk, project_type, experience_level, budget in projects.values_list(
+            'pk', 'project_type', 'experience_level', 'budget_max'
+        ).iterator():
+            yield pk, {
+                'skills': skills.get(pk, []),
+                'project_type': [project_type],
+                'experience_level': [experience_level],
+                'budget': [band for band in [band_for(budget, PROJECT_BUDGET_BANDS)] if band],
+            }
+
+
+gig_facets = GigFacets()
+project_facets = ProjectFacets()
+
+
+def record_changes(kind, object_ids):
+    """Log objects whose facet values may have changed"""
+    FacetChange.objects.bulk_create([FacetChange(kind=kind, object_id=pk) for pk in object_ids])
+
+
+def _int_values(values):
+    result = []
+    for value in values:
+        try:
+            result.append(int(value))
+        except (TypeError, ValueError):
+            pass
+    return result
+
+
+def _decimal(value):
+    try:
+        return Decimal(value) if value not in (None, '') else None
+    except ArithmeticError:
+        return None
+
+
+def gig_selection(params):
+    """Facet selection from the gig list's query parameters"""
+    price = params.getlist('price')
+    if not price and (params.get('price_min') or params.get('price_max')):
+        price = bands_overlapping(GIG_PRICE_BANDS, _decimal(params.get('price_min')), _decimal(params.get('price_max')))
+    delivery = params.getlist('delivery')
+    if not delivery and params.get('delivery_time'):
+        delivery = bands_overlapping(DELIVERY_BANDS, None, _decimal(params.get('delivery_time')))
+    return {
+        'category': _int_values(params.getlist('category')),
+        'skills': _int_values(params.getlist('skills')),
+        'price': price,
+        'delivery': delivery,
+    }
+
+
+def project_selection(params):
+    """Facet selection from the project list's query parameters"""
+    budget = params.getlist('budget')
+    if not budget and (params.get('budget_min') or params.get('budget_max')):
+        budget = bands_overlapping(
+            PROJECT_BUDGET_BANDS, _decimal(params.get('budget_min')), _decimal(params.get('budget_max'))
+        )
+    return {
+        'skills': _int_values(params.getlist('skills')),
+        'project_type': params.getlist('project_type'),
+        'experience_level': params.getlist('experience_level'),
+        'budget': budget,
+    }
+
+
+def band_filter(field, bands, keys):
+    """Q object matching any of the chosen bands on `field`"""
+    condition = Q()
+    for key, label, low, high in bands:
+        if key in keys:
+            band = Q(**{f'{field}__gte': low})
+            if high is not None:
+                band &= Q(**{f'{field}__lt': high})
+            condition |= band
+    return condition
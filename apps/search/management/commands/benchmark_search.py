@@ -0,0 +1,106 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.search.backends import get_backend
+from apps.search.models import SearchDocument
+
+BENCHMARK_KIND = 'benchmark'
+
+WORDS = (
+    'logo design website django react python wordpress seo marketing content writing '
+    'translation video editing animation mobile app android ios flutter branding '
+    'illustration landing page ecommerce shopify copywriting voice over podcast audio '
+    'data entry excel dashboard analytics api backend frontend database migration '
+    'social media strategy ads campaign product photography resume editing business plan'
+).split()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark search latency of the configured backend against an icontains scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--skip-scan', action='store_true', help='Do not time the icontains baseline')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        backend = get_backend()
+        backend.ensure_schema()
+        queries = [
+            ' '.join(rng.sample(WORDS, rng.choice([1, 1, 2])))
+            for _ in range(options['queries'])
+        ]
+
+        self.cleanup(backend)
+        self.stdout.write(f'Backend: {type(backend).__name__}')
+        self.stdout.write(f"{'documents':>10} {'p50 ms':>9} {'p95 ms':>9} {'scan p50 ms':>12} {'scan p95 ms':>12}")
+
+        created = 0
+        try:
+            for size in sorted(options['sizes']):
+                while created < size:
+                    count = min(options['batch_size'], size - created)
+                    self.create_documents(backend, rng, created, count)
+                    created += count
+
+                timings = self.time_queries(lambda q: backend.search(BENCHMARK_KIND, q, 12), queries)
+                if options['skip_scan']:
+                    scan = [0.0]
+                else:
+                    scan = self.time_queries(self.scan, queries)
+
+                self.stdout.write(
+                    f'{size:>10} {self.p(timings, 50):>9.2f} {self.p(timings, 95):>9.2f} '
+                    f'{self.p(scan, 50):>12.2f} {self.p(scan, 95):>12.2f}'
+                )
+        finally:
+            self.cleanup(backend)
+
+    def create_documents(self, backend, rng, offset, count):
+        documents = [
+            SearchDocument(
+                kind=BENCHMARK_KIND,
+                object_id=offset + i + 1,
+                title=' '.join(rng.sample(WORDS, 4)).title(),
+                body=' '.join(rng.choices(WORDS, k=60)),
+                skills=' '.join(rng.sample(WORDS, 3)),
+                category=rng.choice(WORDS),
+            )
+            for i in range(count)
+        ]
+        SearchDocument.objects.bulk_create(documents)
+        backend.index(list(SearchDocument.objects.filter(
+            kind=BENCHMARK_KIND, object_id__gt=offset, object_id__lte=offset + count
+        )))
+
+    def scan(self, query):
+        # What GigListView used to run, minus the M2M join
+        filters = Q()
+        for token in query.split():
+            filters &= Q(title__icontains=token) | Q(body__icontains=token) | Q(skills__icontains=token)
+        return list(SearchDocument.objects.filter(kind=BENCHMARK_KIND).filter(filters).values_list('object_id', flat=True)[:12])
+
+    def time_queries(self, run, queries):
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            run(query)
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def p(self, timings, percentile):
+        if len(timings) < 2:
+            return timings[0]
+        return statistics.quantiles(timings, n=100)[percentile - 1]
+
+    def cleanup(self, backend):
+        documents = SearchDocument.objects.filter(kind=BENCHMARK_KIND)
+        backend.remove(list(documents.values_list('id', flat=True)))
+        documents.delete()
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.search.facets import gig_facets, project_facets
+from apps.search.models import FacetChange
+
+
+class Command(BaseCommand):
+    help = 'Delete old facet change-log rows and print current facet counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=1, help='Keep changes newer than this many days')
+
+    def handle(self, *args, **options):
+        # Processes further behind than this rebuild their bitmaps from scratch anyway
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted, _ = FacetChange.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(f'Deleted {deleted} facet changes')
+
+        for name, index in (('gig', gig_facets), ('project', project_facets)):
+            counts = index.counts()
+            if counts is None:
+                self.stdout.write(self.style.ERROR(f'{name}: facet bitmaps could not be built'))
+                continue
+            self.stdout.write(f"{name}: {counts['total']} objects")
+            for facet in index.facets:
+                self.stdout.write(f'  {facet}: {len(counts[facet])} values')
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from apps.gigs.models import Gig
+from apps.projects.models import Project
+from apps.search.backends import get_backend
+from apps.search.documents import index_objects
+from apps.search.models import SearchDocument
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search documents and full-text index for gigs and projects'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        backend = get_backend()
+        backend.ensure_schema()
+
+        querysets = {
+            'gig': Gig.objects.select_related('category').prefetch_related('skills'),
+            'project': Project.objects.prefetch_related('skills_required'),
+        }
+
+        for kind, queryset in querysets.items():
+            SearchDocument.objects.filter(kind=kind).exclude(object_id__in=queryset.values('pk')).delete()
+
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+            for start in range(0, len(ids), batch_size):
+                index_objects(list(queryset.filter(pk__in=ids[start:start + batch_size])))
+            self.stdout.write(f'Indexed {len(ids)} {kind} documents')
+
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt.'))
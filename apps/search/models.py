@@ -0,0 +1,38 @@
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """Denormalized, searchable copy of a gig or project"""
+    KIND_CHOICES = (
+        ('gig', 'Gig'),
+        ('project', 'Project'),
+    )
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True)
+    skills = models.TextField(blank=True)
+    category = models.CharField(max_length=200, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id}: {self.title}"
+
+
+class FacetChange(models.Model):
+    """Change log read by every process to update its in-memory facet bitmaps"""
+    kind = models.CharField(max_length=20, choices=SearchDocument.KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id} changed"
@@ -0,0 +1,73 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from apps.gigs.models import Gig, GigCategory
+from apps.projects.models import Project
+from .documents import schedule_index, reindex, remove_objects, document_kind
+from .facets import record_changes
+
+
+@receiver(post_save, sender=Gig)
+@receiver(post_save, sender=Project)
+def index_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_index(instance)
+
+
+@receiver(m2m_changed, sender=Gig.skills.through)
+@receiver(m2m_changed, sender=Project.skills_required.through)
+def index_on_skills_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        schedule_index(instance)
+        return
+
+    # A skill was attached to / removed from many gigs or projects at once
+    model = Gig if sender is Gig.skills.through else Project
+    if pk_set:
+        pks = list(pk_set)
+        transaction.on_commit(lambda: reindex(model, pks))
+
+
+@receiver(post_delete, sender=Gig)
+def remove_gig_document(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: remove_objects('gig', [pk]))
+
+
+@receiver(post_delete, sender=Project)
+def remove_project_document(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: remove_objects('project', [pk]))
+
+
+@receiver(post_save, sender=GigCategory)
+def reindex_category_gigs(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+
+    pks = list(instance.gigs.values_list('pk', flat=True))
+    if pks:
+        transaction.on_commit(lambda: reindex(Gig, pks))
+
+
+@receiver([post_save, post_delete], sender=Gig)
+@receiver([post_save, post_delete], sender=Project)
+def log_facet_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_changes(document_kind(sender), [instance.pk])
+
+
+@receiver(m2m_changed, sender=Gig.skills.through)
+@receiver(m2m_changed, sender=Project.skills_required.through)
+def log_facet_skills_change(sender, instance, action, reverse, pk_set, model, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        record_changes(document_kind(type(instance)), [instance.pk])
+    elif pk_set:
+        record_changes(document_kind(model), pk_set)
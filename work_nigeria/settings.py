@@ -49,9 +49,14 @@ INSTALLED_APPS = [
     'apps.payments',
     'apps.messaging',
     'apps.reviews',
+    'apps.search',
+    'apps.core',
+    'apps.jobs',
+    'apps.analytics',
 ]
 
 MIDDLEWARE = [
+    'apps.core.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -146,17 +151,131 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 SITE_ID = 1
 
 # Channels
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer'
-    },
-}
+# In-memory layer for development and tests; set REDIS_URL in production so
+# every ASGI worker shares one layer.
+REDIS_URL = os.environ.get('REDIS_URL', '')
+
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [REDIS_URL],
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer'
+        },
+    }
 
 # Payment Settings
 PAYSTACK_PUBLIC_KEY = os.environ.get('PAYSTACK_PUBLIC_KEY', '')
 PAYSTACK_SECRET_KEY = os.environ.get('PAYSTACK_SECRET_KEY', '')
 FLUTTERWAVE_PUBLIC_KEY = os.environ.get('FLUTTERWAVE_PUBLIC_KEY', '')
 FLUTTERWAVE_SECRET_KEY = os.environ.get('FLUTTERWAVE_SECRET_KEY', '')
+# Secret hash set on the Flutterwave dashboard, sent back in the verif-hash header
+FLUTTERWAVE_WEBHOOK_HASH = os.environ.get('FLUTTERWAVE_WEBHOOK_HASH', '')
+
+# Payment provider HTTP clients (one pooled keep-alive session per provider and process)
+PAYMENT_PROVIDERS = {
+    'paystack': {
+        'BASE_URL': os.environ.get('PAYSTACK_BASE_URL', 'https://api.paystack.co'),
+        'SECRET_KEY': PAYSTACK_SECRET_KEY,
+    },
+    'flutterwave': {
+        'BASE_URL': os.environ.get('FLUTTERWAVE_BASE_URL', 'https://api.flutterwave.com/v3'),
+        'SECRET_KEY': FLUTTERWAVE_SECRET_KEY,
+    },
+}
+PAYMENT_PROVIDER_CONNECT_TIMEOUT = 3.05  # seconds
+PAYMENT_PROVIDER_READ_TIMEOUT = 15  # seconds
+PAYMENT_PROVIDER_RETRIES = 2  # extra attempts for idempotent calls
+PAYMENT_PROVIDER_POOL_SIZE = 10
+PAYMENT_PROVIDER_ASYNC_POOL_SIZE = 100  # connections per event loop for the async views
+PAYMENT_PROVIDER_BREAKER_THRESHOLD = 5  # consecutive failures before the circuit opens
+PAYMENT_PROVIDER_BREAKER_RESET = 30  # seconds before a probe call is allowed
+
+# Cache
+# CACHE_BACKEND is one of locmem (default), file or redis (uses REDIS_URL).
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'redis' if REDIS_URL else 'locmem')
+
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+
+# Rendered public catalogue pages (anonymous visitors only) and reference data
+CATALOGUE_CACHE_TIMEOUT = int(os.environ.get('CATALOGUE_CACHE_TIMEOUT', 300))  # seconds
+REFERENCE_DATA_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Request profiling
+# Fraction of requests whose SQL, template and total time are recorded (0 disables the middleware).
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_FLUSH_INTERVAL = 60  # seconds between snapshot writes per process
+
+# Gig view counters
+# Views are buffered per process and written back at most this many seconds later,
+# or sooner once this many gigs have pending views.
+GIG_VIEW_FLUSH_INTERVAL = int(os.environ.get('GIG_VIEW_FLUSH_INTERVAL', 30))
+GIG_VIEW_MAX_PENDING = 1000
+
+# Search
+# Dotted path to a backend class in apps.search.backends; empty picks one from the database vendor
+# (SQLite FTS5 locally, Postgres tsvector/GIN in production).
+SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', '')
+SEARCH_MAX_RESULTS = 1000
+FACET_REFRESH_INTERVAL = 5  # seconds between facet change-log polls per process
+FACET_CHANGE_OVERLAP = 60  # seconds of change log re-read each poll; longer than any writer's transaction
+
+# Project recommendations (manage.py compute_matches, run on a schedule)
+MATCHING_TOP_K = 50
+MATCHING_BATCH_SIZE = 500  # freelancers per sparse matrix product
+MATCHING_CACHE_TIMEOUT = 60 * 60 * 26  # a daily run plus slack
+
+# Background jobs (manage.py run_jobs)
+JOB_POLL_INTERVAL = 1  # seconds a worker sleeps when no job is ready
+JOB_RETRY_BACKOFF = 10  # seconds before the first retry, doubled on each attempt
+JOB_RETRY_BACKOFF_MAX = 60 * 60
+JOB_HEARTBEAT_INTERVAL = 30  # seconds between a worker's heartbeats on its running jobs
+JOB_TIMEOUT = 5 * 60  # running jobs without a heartbeat for this long are assumed lost and requeued
+
+# Seller dashboard (apps.analytics daily rollups)
+ANALYTICS_DEFAULT_DAYS = 30
+ANALYTICS_MAX_DAYS = 366
+
+# Statement exports (payments:export_statement and manage.py export_statement)
+STATEMENT_EXPORT_CHUNK_SIZE = 2000  # rows fetched per database round trip
+
+# Withdrawal payouts (manage.py process_payouts, run on a schedule)
+PAYOUT_BATCH_SIZE = 100  # transfers per bulk request (Paystack's maximum)
+PAYOUT_CONCURRENCY = 4  # bulk requests in flight at once
+PAYOUT_VERIFY_AFTER = 30  # minutes before a processing payout is checked with the provider
+
+# Gig image renditions (apps.gigs.images; backfill with manage.py process_gig_images)
+GIG_IMAGE_WIDTHS = (320, 640, 1280)
+GIG_IMAGE_FORMATS = ('webp', 'jpeg')
+GIG_IMAGE_QUALITY = 80
+GIG_IMAGE_CARD_WIDTH = 320  # rendition list pages serve
+GIG_IMAGE_WORKERS = None  # render processes per job worker or backfill; None uses every core
 
 # Platform commission rate
 PLATFORM_COMMISSION_RATE = 0.10  # 10%
@@ -6,4 +6,5 @@ urlpatterns = [
     path('accounts/', include('apps.accounts.urls')),
     path('projects/', include('apps.projects.urls')),
     path('payments/', include('apps.payments.urls')),
+    path('analytics/', include('apps.analytics.urls')),
 ]
\ No newline at end of file